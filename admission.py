@@ -0,0 +1,166 @@
+import asyncio
+import io
+from collections import deque
+from PIL import Image, UnidentifiedImageError
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload is over the byte, pixel or memory limit"""
+
+
+async def read_upload(upload, max_bytes, chunk_size=1024 * 1024, name="image") -> bytes:
+    """Read an UploadFile in chunks, giving up as soon as it exceeds max_bytes"""
+    message = f"The {name} is larger than {max_bytes / 1e6:g} MB."
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLarge(message)
+    chunks = []
+    total = 0
+    while chunk := await upload.read(chunk_size):
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadTooLarge(message)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def decode_footprint(width, height, bands) -> int:
+    """Estimated peak memory to decode and process one image, in bytes"""
+    # The decoded pixels (at least RGB) plus one working copy for conversion
+    # or resizing; the upload itself is held separately while it is queued
+    return width * height * max(bands, 3) * 2
+
+
+def image_footprint(image_bytes, max_pixels):
+    """Check an image's pixel count from its header and estimate its footprint
+
+    Only the header is parsed; pixel data is not decoded. Returns None when
+    the bytes are not a readable image.
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            width, height = image.size
+            bands = len(image.getbands())
+    except Image.DecompressionBombError:
+        width, height, bands = max_pixels + 1, 1, 3
+    except (UnidentifiedImageError, OSError):
+        return None
+
+    if width * height > max_pixels:
+        raise UploadTooLarge(
+            f"The image is {width * height / 1e6:.0f} megapixels; "
+            f"the limit is {max_pixels / 1e6:.0f}."
+        )
+    return decode_footprint(width, height, bands)
+
+
+class MemoryBudget:
+    """Admit image decodes only while their estimated footprints fit
+
+    Callers acquire their estimated bytes before decoding and release them
+    afterwards. Those that do not fit wait in arrival order, so a large photo
+    is not starved by a stream of small ones. A footprint larger than the
+    decode share can never be admitted and is rejected by `fits`.
+
+    Uploads waiting in the job queue are in memory too. `upload_share` of the
+    budget is set aside for them: `hold` takes an upload's bytes when it is
+    queued and refuses, rather than waits, once that share is used up.
+    """
+
+    def __init__(self, max_bytes, upload_share=0.25):
+        self.max_bytes = max_bytes
+        self.max_held = int(max_bytes * upload_share)
+        self.decode_bytes = max_bytes - self.max_held
+        self.in_use = 0
+        self.held = 0
+        self._waiters = deque()
+        self.admitted = 0
+        self.waited = 0
+        self.refused = 0
+
+    def fits(self, nbytes) -> bool:
+        return nbytes <= self.decode_bytes
+
+    def hold(self, nbytes) -> bool:
+        """Take nbytes of the upload share now, or return False if it is full"""
+        if self.held + nbytes > self.max_held:
+            self.refused += 1
+            return False
+        self.held += nbytes
+        return True
+
+    def unhold(self, nbytes):
+        self.held -= nbytes
+
+    async def acquire(self, nbytes):
+        if not self.fits(nbytes):
+            raise UploadTooLarge("The image is too large to process.")
+        if not self._waiters and self.in_use + nbytes <= self.decode_bytes:
+            self.in_use += nbytes
+            self.admitted += 1
+            return
+
+        self.waited += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append((nbytes, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just as we were cancelled; hand the bytes back
+                self.release(nbytes)
+            else:
+                if (nbytes, waiter) in self._waiters:
+                    self._waiters.remove((nbytes, waiter))
+                # The next waiter may fit now that this one has left
+                self._wake()
+            raise
+
+    def release(self, nbytes):
+        self.in_use -= nbytes
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_use + self._waiters[0][0] <= self.decode_bytes:
+            nbytes, waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_use += nbytes
+            self.admitted += 1
+            waiter.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "max_bytes": self.max_bytes,
+            "in_use": self.in_use,
+            "held": self.held,
+            "max_held": self.max_held,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "waited": self.waited,
+            "refused": self.refused,
+        }
+
+
+class AdmittedVerifier:
+    """Apply the pixel limit and decode budget to each image a verifier gets
+
+    For paths such as batch verification that hand many images to one
+    verifier. An image over the limit raises UploadTooLarge, which the batch
+    runner reports on that row.
+    """
+
+    def __init__(self, verifier, budget, max_pixels):
+        self.verifier = verifier
+        self.budget = budget
+        self.max_pixels = max_pixels
+
+    async def verify(self, form_data: dict, image_bytes: bytes, on_check=None) -> dict:
+        footprint = image_footprint(image_bytes, self.max_pixels)
+        if footprint is None:
+            # Not an image; the verifier reports that itself
+            return await self.verifier.verify(form_data, image_bytes, on_check=on_check)
+        await self.budget.acquire(footprint)
+        try:
+            return await self.verifier.verify(form_data, image_bytes, on_check=on_check)
+        finally:
+            self.budget.release(footprint)
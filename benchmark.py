@@ -0,0 +1,287 @@
+"""Benchmark OCR, verification and /verify on synthetic labels
+
+    python benchmark.py --output bench.json
+    python benchmark.py --output new.json --baseline bench.json --threshold 0.2
+
+Labels come from the generator in tests/test_ocr.py. The corpus varies one
+of size, font, noise and rotation at a time from a base label. Results are
+saved as JSON. With --baseline, any metric that got worse by more than its
+threshold is reported and the exit status is 1.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from tests.test_ocr import generate_test_label
+
+BASE_VARIANT = {"scale": 1.0, "font": "sans", "noise": 0.0, "rotation": 0.0}
+VARIANT_AXES = {
+    "scale": (0.5, 2.0),
+    "font": ("serif", "mono"),
+    "noise": (20.0, 50.0),
+    "rotation": (2.0, 5.0),
+}
+FORM_DATA = {
+    "brand_name": "Hammer Whiskey",
+    "product_type": "Kentucky Straight Bourbon Whiskey",
+    "alcohol_content": 45.0,
+    "net_contents": "750 mL",
+}
+LABEL_TEXT = """HAMMER WHISKEY
+Kentucky Straight Bourbon Whiskey
+45% Alc./Vol.
+750 mL
+GOVERNMENT WARNING
+According to the Surgeon General, women should not drink alcoholic beverages"""
+
+
+def encode(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def build_corpus(axes=VARIANT_AXES) -> dict:
+    """Encoded labels keyed by variant name, varying one axis at a time"""
+    corpus = {"base": encode(generate_test_label(**BASE_VARIANT))}
+    for axis, values in axes.items():
+        for value in values:
+            variant = {**BASE_VARIANT, axis: value}
+            corpus[f"{axis}={value}"] = encode(generate_test_label(**variant))
+    return corpus
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def metric(value, unit, better="lower"):
+    return {"value": value, "unit": unit, "better": better}
+
+
+def latency_metrics(prefix, samples):
+    return {
+        f"{prefix}.p50_s": metric(percentile(samples, 0.50), "s"),
+        f"{prefix}.p95_s": metric(percentile(samples, 0.95), "s"),
+    }
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process and its reaped children"""
+    # ru_maxrss is in kilobytes on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own / 1024, children / 1024
+
+
+def tesseract_available():
+    import pytesseract
+
+    try:
+        pytesseract.get_tesseract_version()
+    except (pytesseract.TesseractNotFoundError, OSError):
+        return False
+    return True
+
+
+async def bench_extract_text(ocr, corpus, repeats):
+    """Per-variant extract_text latency"""
+    metrics = {}
+    for name, image_bytes in corpus.items():
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            await ocr.extract_text(image_bytes)
+            samples.append(time.perf_counter() - start)
+        metrics.update(latency_metrics(f"extract_text.{name}", samples))
+    return metrics
+
+
+async def bench_verify_throughput(verifier, corpus, repeats, concurrency):
+    """Labels per second through LabelVerifier.verify with `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    images = list(corpus.values()) * repeats
+
+    async def verify(image_bytes):
+        async with semaphore:
+            await verifier.verify(FORM_DATA, image_bytes)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(verify(image_bytes) for image_bytes in images))
+    elapsed = time.perf_counter() - start
+    return {"verify.labels_per_s": metric(len(images) / elapsed, "labels/s", "higher")}
+
+
+def bench_check_text(iterations):
+    """Rule checks per second on already-extracted text, without OCR"""
+    from verifier import LabelVerifier
+
+    verifier = LabelVerifier(None)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        verifier.check_text(FORM_DATA, LABEL_TEXT)
+    elapsed = time.perf_counter() - start
+    return {
+        "check_text.checks_per_s": metric(iterations / elapsed, "checks/s", "higher")
+    }
+
+
+def bench_endpoint(corpus, repeats, poll_interval=0.01):
+    """End-to-end /verify latency: upload, queue, OCR, checks and result render"""
+    # Configure the app before importing it. The OCR cache and stored results
+    # would hide repeats, and the results database is kept out of the cwd
+    os.environ.setdefault("VERIFY_ENGINE", "tesseract")
+    os.environ["OCR_CACHE_SIZE"] = "0"
+    os.environ["RESULTS_REUSE_TTL"] = "0"
+    os.environ["RESULTS_DB"] = os.path.join(
+        tempfile.mkdtemp(prefix="ttb-bench-"), "results.db"
+    )
+    os.environ["STREAM_RESULTS"] = "0"
+    from starlette.testclient import TestClient
+    import main
+
+    form = {
+        "brand_name": FORM_DATA["brand_name"],
+        "product_type": FORM_DATA["product_type"],
+        "alcohol_content": str(FORM_DATA["alcohol_content"]),
+        "net_contents_value": "750",
+        "net_contents_unit": "mL",
+    }
+    samples = []
+    with TestClient(main.app) as client:
+        for _ in range(repeats):
+            for name, image_bytes in corpus.items():
+                start = time.perf_counter()
+                response = client.post(
+                    "/verify",
+                    data=form,
+                    files={"label_image": (f"{name}.png", image_bytes, "image/png")},
+                )
+                job_id = response.text.split("/jobs/")[1].split('"')[0]
+                while 'hx-trigger="every 1s"' in response.text:
+                    time.sleep(poll_interval)
+                    response = client.get(f"/jobs/{job_id}")
+                samples.append(time.perf_counter() - start)
+    return latency_metrics("endpoint.verify", samples)
+
+
+async def run_benchmarks(args) -> dict:
+    from ocr_service import TesseractOCR
+    from tesseract_pool import TesseractPool
+    from verifier import LabelVerifier
+
+    corpus = build_corpus()
+    metrics = bench_check_text(args.check_iterations)
+    skipped = []
+
+    if tesseract_available():
+        metrics.update(await bench_extract_text(TesseractOCR(), corpus, args.repeats))
+        own, children = peak_rss_mb()
+        metrics["memory.extract_text.peak_rss_mb"] = metric(own, "MB")
+
+        pool = TesseractPool(size=args.workers)
+        try:
+            verifier = LabelVerifier(TesseractOCR(pool=pool))
+            metrics.update(
+                await bench_verify_throughput(
+                    verifier, corpus, args.repeats, pool.size * 2
+                )
+            )
+        finally:
+            pool.shutdown()
+
+        metrics.update(await asyncio.to_thread(bench_endpoint, corpus, args.repeats))
+        own, children = peak_rss_mb()
+        metrics["memory.peak_rss_mb"] = metric(own, "MB")
+        metrics["memory.children_peak_rss_mb"] = metric(children, "MB")
+    else:
+        skipped = ["extract_text", "verify", "endpoint", "memory"]
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "repeats": args.repeats,
+        "corpus": list(corpus),
+        "skipped": skipped,
+        "metrics": metrics,
+    }
+
+
+def parse_thresholds(values, default=0.2):
+    """Read "0.2" (the default) and "prefix=0.5" (per metric prefix) values"""
+    thresholds = {"": default}
+    for value in values or []:
+        prefix, _, fraction = value.rpartition("=")
+        thresholds[prefix] = float(fraction)
+    return thresholds
+
+
+def threshold_for(name, thresholds):
+    # The longest matching prefix wins
+    prefix = max((p for p in thresholds if name.startswith(p)), key=len)
+    return thresholds[prefix]
+
+
+def compare(current, baseline, thresholds) -> list:
+    """Return (name, old, new, change) for metrics worse than their threshold"""
+    regressions = []
+    for name, new in current["metrics"].items():
+        old = baseline.get("metrics", {}).get(name)
+        if not old or not old["value"]:
+            continue
+        change = (new["value"] - old["value"]) / old["value"]
+        if new["better"] == "higher":
+            change = -change
+        if change > threshold_for(name, thresholds):
+            regressions.append((name, old["value"], new["value"], change))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", default="benchmark.json")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument(
+        "--threshold",
+        action="append",
+        help='allowed slowdown as a fraction, e.g. 0.2 or "memory=0.1" per prefix',
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--check-iterations", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_benchmarks(args))
+    with open(args.output, "w") as output:
+        json.dump(results, output, indent=2)
+
+    for name, value in results["metrics"].items():
+        print(f"{name:48} {value['value']:>12.4f} {value['unit']}")
+    if results["skipped"]:
+        print(f"Skipped (tesseract not installed): {', '.join(results['skipped'])}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare(results, baseline, parse_thresholds(args.threshold))
+    for name, old, new, change in regressions:
+        print(f"REGRESSION {name}: {old:.4f} -> {new:.4f} ({change:+.0%} worse)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
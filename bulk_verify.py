@@ -0,0 +1,162 @@
+"""Verify a directory of label images against a manifest, without the web app
+
+    ttb-bulk-verify labels/ manifest.csv --output results.jsonl
+
+Each result is appended to the output as one JSON line as soon as it is
+ready. Rows already in the output are skipped, so re-running the same
+command after an interruption resumes where the last run stopped.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from image_preprocessing import PreprocessConfig
+from ocr_service import TesseractOCR
+from tesseract_pool import TesseractPool
+from utils.batch import parse_manifest, verify_row
+from utils.fuzzy_match import parse_tolerances
+from verifier import LabelVerifier
+
+
+def load_checkpoint(output_path: Path) -> set:
+    """Return manifest row numbers already verified in the output
+
+    Rows written with an error (a missing image, an OCR crash or timeout)
+    are not counted, so a re-run retries them and appends a new line. A
+    trailing partial line left by a crash mid-write is truncated away so
+    that the row is verified again and appended cleanly.
+    """
+    if not output_path.exists():
+        return set()
+
+    completed = set()
+    good_bytes = 0
+    with output_path.open("rb") as output:
+        for line in output:
+            try:
+                result = json.loads(line)
+                if not result.get("error"):
+                    completed.add(result["row"])
+            except (ValueError, KeyError, TypeError, AttributeError):
+                break
+            good_bytes += len(line)
+
+    if good_bytes < output_path.stat().st_size:
+        with output_path.open("r+b") as output:
+            output.truncate(good_bytes)
+    return completed
+
+
+def read_image(images_dir: Path, name: str):
+    try:
+        return (images_dir / name).read_bytes()
+    except OSError:
+        return None
+
+
+async def verify_directory(verifier, rows, images_dir, output, concurrency):
+    """Verify rows with `concurrency` in flight, writing each result to output"""
+    counts = {"passed": 0, "failed": 0, "errors": 0}
+    remaining = iter(rows)
+
+    async def worker():
+        # Workers pull from one iterator so only `concurrency` images are in memory
+        for row in remaining:
+            image_bytes = await asyncio.to_thread(read_image, images_dir, row["image"])
+            result = await verify_row(verifier, row, image_bytes)
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            if result["error"]:
+                counts["errors"] += 1
+            elif result["success"]:
+                counts["passed"] += 1
+            else:
+                counts["failed"] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return counts
+
+
+async def run(args) -> int:
+    manifest = Path(args.manifest)
+    output_path = Path(args.output)
+    try:
+        rows = parse_manifest(manifest.name, manifest.read_bytes())
+    except (OSError, ValueError) as e:
+        print(f"Cannot read manifest: {e}", file=sys.stderr)
+        return 2
+
+    completed = set() if args.restart else load_checkpoint(output_path)
+    if args.restart:
+        output_path.unlink(missing_ok=True)
+    pending = [row for row in rows if row["row"] not in completed]
+    print(
+        f"{len(pending)} rows to verify, {len(rows) - len(pending)} already done",
+        file=sys.stderr,
+    )
+
+    pool = TesseractPool(size=args.workers, max_queue=args.workers)
+    verifier = LabelVerifier(
+        TesseractOCR(
+            pool=pool, preprocess=PreprocessConfig() if args.preprocess else None
+        ),
+        parse_tolerances(args.tolerances),
+    )
+    start = time.perf_counter()
+    try:
+        with output_path.open("a") as output:
+            # Twice the workers keeps every process busy while images are read
+            counts = await verify_directory(
+                verifier, pending, Path(args.images_dir), output, pool.size * 2
+            )
+    finally:
+        pool.shutdown()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Verified {len(pending)} rows in {elapsed:.1f}s: {counts['passed']} passed, "
+        f"{counts['failed']} failed, {counts['errors']} errors",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Verify label images in a directory against a CSV or JSONL manifest."
+    )
+    parser.add_argument(
+        "images_dir", help="directory the manifest's image paths are relative to"
+    )
+    parser.add_argument("manifest", help="manifest in .csv or .jsonl format")
+    parser.add_argument(
+        "-o", "--output", default="results.jsonl", help="JSONL results and checkpoint"
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Tesseract worker processes (default: one per core)",
+    )
+    parser.add_argument(
+        "--preprocess", action="store_true", help="clean up images before OCR"
+    )
+    parser.add_argument(
+        "--tolerances",
+        default=os.getenv("MATCH_TOLERANCES", ""),
+        help="OCR edits allowed per field, e.g. brand_name=1,product_type=2",
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore and replace existing output"
+    )
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
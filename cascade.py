@@ -0,0 +1,133 @@
+import logging
+import re
+from llm_client import llm_unavailable
+
+logger = logging.getLogger(__name__)
+
+# Tokens made of characters that plausibly appear on a label
+WORD_PATTERN = re.compile(
+    r"^[A-Za-z0-9%.,:;/'&()\-]*[A-Za-z0-9][A-Za-z0-9%.,:;/'&()\-]*$"
+)
+
+
+def text_confidence(text: str) -> float:
+    """Estimate OCR quality as the share of tokens that look like label text
+
+    pytesseract's image_to_string does not report confidence, so garbled
+    output (stray symbols, broken glyphs) is used as the low-confidence signal.
+    """
+    tokens = text.split()
+    if not tokens:
+        return 0.0
+    return sum(1 for token in tokens if WORD_PATTERN.match(token)) / len(tokens)
+
+
+class StreamedChecks:
+    """Pass checks on to on_check, counting how many were sent
+
+    When the LLM fails part way through a streamed reply, the fallback's
+    checks would be shown after (and repeat) the ones already sent, so the
+    fallback runs without streaming and its final results replace them.
+    """
+
+    def __init__(self, on_check):
+        self.on_check = on_check
+        self.sent = 0
+
+    def __call__(self, check):
+        self.sent += 1
+        self.on_check(check)
+
+
+class CascadeVerifier:
+    """Verify with the cheap local path first, escalating to the LLM on doubt"""
+
+    def __init__(self, local_verifier, llm_verifier, min_confidence=0.6):
+        self.local_verifier = local_verifier
+        self.llm_verifier = llm_verifier
+        self.min_confidence = min_confidence
+        self.counts = {"tesseract": 0, "llm": 0}
+        self.escalations = {"failed_checks": 0, "low_confidence": 0}
+        self.fallbacks = 0
+
+    def _escalation_reason(self, results):
+        if text_confidence(results["extracted_text"]) < self.min_confidence:
+            return "low_confidence"
+        if not results["success"]:
+            return "failed_checks"
+        return None
+
+    async def verify(self, form_data: dict, image_bytes: bytes, on_check=None) -> dict:
+        # Local checks are only reported once we know they are final
+        results = await self.local_verifier.verify(form_data, image_bytes)
+        reason = self._escalation_reason(results)
+        if reason is None:
+            self.counts["tesseract"] += 1
+            if on_check is not None:
+                for check in results["checks"]:
+                    on_check(check)
+            return {**results, "tier": "tesseract"}
+
+        self.escalations[reason] += 1
+        streamed = StreamedChecks(on_check) if on_check is not None else None
+        try:
+            llm_results = await self.llm_verifier.verify(
+                form_data, image_bytes, on_check=streamed
+            )
+        except Exception as e:
+            if not llm_unavailable(e):
+                raise
+            # Keep serving with the local answer while Gemini is out of quota or down
+            logger.warning("LLM escalation failed, keeping local result: %r", e)
+            self.fallbacks += 1
+            self.counts["tesseract"] += 1
+            if streamed is not None and not streamed.sent:
+                for check in results["checks"]:
+                    on_check(check)
+            return {
+                **results,
+                "tier": "tesseract",
+                "escalation_reason": reason,
+                "fallback": True,
+            }
+        self.counts["llm"] += 1
+        return {**llm_results, "tier": "llm", "escalation_reason": reason}
+
+    def stats(self) -> dict:
+        total = sum(self.counts.values())
+        return {
+            **{f"{tier}_results": count for tier, count in self.counts.items()},
+            **{f"escalated_{reason}": n for reason, n in self.escalations.items()},
+            "escalation_rate": self.counts["llm"] / total if total else 0.0,
+            "llm_fallbacks": self.fallbacks,
+        }
+
+
+class FallbackVerifier:
+    """Use the LLM verifier, falling back to local OCR while Gemini is unavailable"""
+
+    def __init__(self, llm_verifier, local_verifier):
+        self.llm_verifier = llm_verifier
+        self.local_verifier = local_verifier
+        self.fallbacks = 0
+
+    async def verify(self, form_data: dict, image_bytes: bytes, on_check=None) -> dict:
+        streamed = StreamedChecks(on_check) if on_check is not None else None
+        try:
+            return await self.llm_verifier.verify(
+                form_data, image_bytes, on_check=streamed
+            )
+        except Exception as e:
+            if not llm_unavailable(e):
+                raise
+            logger.warning("LLM verification failed, using Tesseract: %r", e)
+            self.fallbacks += 1
+        if streamed is not None and streamed.sent:
+            on_check = None
+        results = await self.local_verifier.verify(
+            form_data, image_bytes, on_check=on_check
+        )
+        return {**results, "tier": "tesseract", "fallback": True}
+
+    def stats(self) -> dict:
+        return {"fallbacks": self.fallbacks}
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import os
+import random
+from types import SimpleNamespace
+from google.genai import errors
+
+LABEL_TEXT = """HAMMER WHISKEY
+Kentucky Straight Bourbon Whiskey
+45% Alc./Vol.
+750 mL
+GOVERNMENT WARNING
+According to the Surgeon General, women should not drink alcoholic beverages
+during pregnancy because of the risk of birth defects."""
+
+CHECK_FIELDS = (
+    ("Brand Name", "brand_name"),
+    ("Product Type", "product_type"),
+    ("Alcohol Content", "alcohol_content"),
+    ("Net Contents", "net_contents"),
+)
+
+
+def canned_reply(contents) -> str:
+    """Reply text for a request, shaped like what the real model would send
+
+    Structured verification requests (a JSON payload of form values) get a
+    passing VerificationResult echoing those values. Inline-prompt
+    verification requests get a passing result without expected values.
+    Anything else is treated as OCR and gets the label text.
+    """
+    prompt = contents[0] if contents and isinstance(contents[0], str) else ""
+    try:
+        payload = json.loads(prompt)
+    except ValueError:
+        payload = None
+
+    if isinstance(payload, dict) or "MATCHING RULES" in prompt:
+        values = payload if isinstance(payload, dict) else {}
+        checks = [
+            {"field": field, "expected": str(values.get(key, "")), "found": True}
+            for field, key in CHECK_FIELDS
+        ]
+        checks.append(
+            {"field": "Government Warning", "expected": "Present", "found": True}
+        )
+        return json.dumps(
+            {"success": True, "checks": checks, "extracted_text": LABEL_TEXT}
+        )
+    return LABEL_TEXT
+
+
+class FakeModels:
+    """Stand-in for genai's async models API with configurable latency and errors
+
+    Each call takes latency +/- jitter seconds. With probability error_rate it
+    then fails, as a 429 quota error for rate_limit_share of failures and a 503
+    otherwise, so retries, the circuit breaker and fallbacks can be exercised.
+    """
+
+    def __init__(
+        self, latency=0.5, jitter=0.2, error_rate=0.0, rate_limit_share=0.5, seed=None
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_share = rate_limit_share
+        self.random = random.Random(seed)
+        self.calls = 0
+        self.errors = 0
+
+    def _delay(self):
+        return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def _maybe_fail(self):
+        if self.random.random() >= self.error_rate:
+            return
+        self.errors += 1
+        if self.random.random() < self.rate_limit_share:
+            raise errors.ClientError(
+                429, {"error": {"code": 429, "message": "Fake quota exhausted"}}
+            )
+        raise errors.ServerError(
+            503, {"error": {"code": 503, "message": "Fake model overloaded"}}
+        )
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        await asyncio.sleep(self._delay())
+        self._maybe_fail()
+        return SimpleNamespace(text=canned_reply(contents))
+
+    async def generate_content_stream(self, model, contents, config=None):
+        self.calls += 1
+        delay = self._delay()
+        # Time to first token, then the rest of the reply spread across chunks
+        await asyncio.sleep(delay * 0.3)
+        self._maybe_fail()
+        text = canned_reply(contents)
+        pieces = [text[start : start + 40] for start in range(0, len(text), 40)]
+
+        async def chunks():
+            for piece in pieces:
+                await asyncio.sleep(delay * 0.7 / len(pieces))
+                yield SimpleNamespace(text=piece)
+
+        return chunks()
+
+
+def make_fake_client(**kwargs):
+    """Object shaped like genai.Client (client.aio.models) backed by FakeModels"""
+    return SimpleNamespace(aio=SimpleNamespace(models=FakeModels(**kwargs)))
+
+
+def fake_client_from_env():
+    return make_fake_client(
+        latency=float(os.getenv("GEMINI_FAKE_LATENCY", 0.5)),
+        jitter=float(os.getenv("GEMINI_FAKE_JITTER", 0.2)),
+        error_rate=float(os.getenv("GEMINI_FAKE_ERROR_RATE", 0)),
+    )
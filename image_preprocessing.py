@@ -0,0 +1,142 @@
+import io
+import time
+from dataclasses import dataclass
+from PIL import Image, ImageChops, ImageFilter, ImageOps
+
+# Long edge of the thumbnail used to estimate skew
+SKEW_SAMPLE_EDGE = 800
+
+
+@dataclass(frozen=True)
+class PreprocessConfig:
+    """Steps applied to a label image before Tesseract; None/False disables a step"""
+
+    max_long_edge: int | None = 2400
+    min_long_edge: int | None = 1000
+    grayscale: bool = True
+    binarize: bool = True
+    binarize_radius: int = 15
+    binarize_offset: int = 10
+    deskew: bool = True
+    max_skew_degrees: float = 5.0
+    skew_step_degrees: float = 0.5
+
+
+class StepTimings:
+    """Accumulate per-step preprocessing and OCR timings across calls"""
+
+    def __init__(self):
+        self.totals = {}
+        self.counts = {}
+
+    def record(self, timings):
+        for step, seconds in timings.items():
+            self.totals[step] = self.totals.get(step, 0.0) + seconds
+            self.counts[step] = self.counts.get(step, 0) + 1
+
+    def summary(self) -> dict:
+        return {
+            step: {
+                "count": self.counts[step],
+                "total_ms": self.totals[step] * 1000,
+                "mean_ms": self.totals[step] * 1000 / self.counts[step],
+            }
+            for step in self.totals
+        }
+
+
+def _decode(image_bytes, config):
+    image = Image.open(io.BytesIO(image_bytes))
+    if config.max_long_edge and image.format == "JPEG":
+        # Let libjpeg decode at a reduced scale instead of full resolution
+        scale = config.max_long_edge / max(image.size)
+        if scale < 1:
+            mode = "L" if config.grayscale else "RGB"
+            image.draft(mode, (int(image.width * scale), int(image.height * scale)))
+    image = ImageOps.exif_transpose(image)
+    image.load()
+    return image
+
+
+def _normalize_size(image, config):
+    long_edge = max(image.size)
+    if config.max_long_edge and long_edge > config.max_long_edge:
+        scale = config.max_long_edge / long_edge
+    elif config.min_long_edge and long_edge < config.min_long_edge:
+        scale = config.min_long_edge / long_edge
+    else:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.Resampling.LANCZOS)
+
+
+def _to_grayscale(image):
+    if image.mode in ("RGBA", "LA", "P"):
+        # Flatten transparency onto white so it does not read as black ink
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image.convert("RGBA"), mask=image.convert("RGBA"))
+        image = background
+    return image.convert("L")
+
+
+def _binarize(image, config):
+    """Mark pixels darker than their local mean (minus an offset) as ink"""
+    gray = image.convert("L")
+    local_mean = gray.filter(ImageFilter.BoxBlur(config.binarize_radius))
+    darkness = ImageChops.subtract(local_mean, gray)
+    offset = config.binarize_offset
+    return darkness.point(lambda value: 0 if value > offset else 255)
+
+
+def _row_profile_score(image):
+    # Row means of the ink mask; text lines aligned with rows give a spiky profile
+    rows = image.resize((1, image.height), Image.Resampling.BOX).tobytes()
+    mean = sum(rows) / len(rows)
+    return sum((value - mean) ** 2 for value in rows)
+
+
+def estimate_skew(image, config):
+    """Return the rotation in degrees that best aligns text lines with rows"""
+    sample = image.convert("L")
+    sample.thumbnail((SKEW_SAMPLE_EDGE, SKEW_SAMPLE_EDGE))
+    ink = ImageOps.invert(sample)
+
+    steps = int(config.max_skew_degrees / config.skew_step_degrees)
+    best_angle, best_score = 0.0, _row_profile_score(ink)
+    for step in range(-steps, steps + 1):
+        angle = step * config.skew_step_degrees
+        if angle == 0:
+            continue
+        score = _row_profile_score(ink.rotate(angle, Image.Resampling.BILINEAR))
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+
+def _deskew(image, config):
+    angle = estimate_skew(image, config)
+    if angle == 0:
+        return image
+    fill = 255 if image.mode == "L" else "white"
+    return image.rotate(angle, Image.Resampling.BICUBIC, expand=True, fillcolor=fill)
+
+
+def preprocess(image_bytes: bytes, config: PreprocessConfig):
+    """Decode and clean up a label image, returning it with per-step timings"""
+    timings = {}
+
+    def timed(step, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[step] = time.perf_counter() - start
+        return result
+
+    image = timed("decode", _decode, image_bytes, config)
+    image = timed("normalize_size", _normalize_size, image, config)
+    if config.grayscale:
+        image = timed("grayscale", _to_grayscale, image)
+    if config.deskew:
+        image = timed("deskew", _deskew, image, config)
+    if config.binarize:
+        image = timed("binarize", _binarize, image, config)
+    return image, timings
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised when the job queue is at its maximum depth"""
+
+
+class Job:
+    def __init__(self, fn):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        # Where the result was persisted, for workers that did not run the job
+        self.result_id = None
+        self.remote = False
+        self._published = None
+        self.checks = []
+        self.created_at = time.time()
+        self.finished_at = None
+        self._changed = asyncio.Event()
+
+    @classmethod
+    def from_record(cls, job_id, record):
+        """A job run by another worker process, as last written to the index"""
+        job = cls(None)
+        job.id = job_id
+        job.status = record["status"]
+        job.error = record["error"]
+        job.result_id = record["result_id"]
+        job.remote = True
+        return job
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def _notify(self):
+        # Wake everyone waiting on the current event, then arm a fresh one
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def add_check(self, check):
+        """Record a check decided before the whole job has finished"""
+        self.checks.append(check)
+        self._notify()
+
+    async def wait_for_update(self, timeout=None):
+        """Wait until a check is added or the job finishes; False on timeout"""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class JobQueue:
+    """Bounded queue of verification jobs run by a pool of background workers
+
+    With an `index` (a SharedCacheStore), each job's status is also written
+    where other worker processes can read it, so a job submitted to one
+    process can be polled through any of them.
+    """
+
+    def __init__(self, workers=4, max_depth=100, ttl_seconds=3600, index=None):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.ttl_seconds = ttl_seconds
+        self.index = index
+        self.jobs = {}
+        self._queue = None
+        self._tasks = []
+        self._background = set()
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _ensure_started(self):
+        # Created on first submit so the queue binds to the server's event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_depth)
+            self._tasks = [
+                asyncio.create_task(self._work()) for _ in range(self.workers)
+            ]
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            try:
+                job.result = await job.fn(job)
+                job.status = "done"
+                self.completed += 1
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+                self.failed += 1
+            finally:
+                job.fn = None
+                job.finished_at = time.time()
+                job._notify()
+                if job._published is not None:
+                    # The queued status must not land after the final one
+                    await job._published
+                await self._publish(job)
+                self._queue.task_done()
+
+    async def _index_call(self, fn, *args):
+        # The index is a SQLite file shared with other processes, so calls
+        # run in a thread; a failure only hides the job from other workers
+        try:
+            await asyncio.to_thread(fn, *args)
+        except Exception as e:
+            logger.warning("Updating the shared job index failed: %s", e)
+
+    async def _publish(self, job):
+        if self.index is not None:
+            record = {
+                "status": job.status,
+                "error": job.error,
+                "result_id": job.result_id,
+            }
+            await self._index_call(self.index.set, job.id, json.dumps(record))
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job_id
+            for job_id, job in self.jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+        if expired and self.index is not None:
+            task = asyncio.create_task(self._index_call(self.index.prune, cutoff))
+            # Keep a reference until it finishes so it is not collected early
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    def submit(self, fn) -> Job:
+        """Queue fn (an async callable taking the Job) and return the Job now"""
+        self._ensure_started()
+        self._prune()
+        job = Job(fn)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFull(f"Verification queue is full ({self.max_depth} waiting)")
+        self.jobs[job.id] = job
+        if self.index is not None:
+            job._published = asyncio.create_task(self._publish(job))
+        return job
+
+    def get(self, job_id):
+        """The job with this id, from this process or else from the index"""
+        job = self.jobs.get(job_id)
+        if job is None and self.index is not None:
+            entry = self.index.get(job_id)
+            if entry is not None:
+                job = Job.from_record(job_id, json.loads(entry[1]))
+        return job
+
+    async def join(self):
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "max_depth": self.max_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
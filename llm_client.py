@@ -0,0 +1,325 @@
+import asyncio
+import os
+import random
+import time
+import httpx
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+
+class CircuitOpen(Exception):
+    """Raised without calling Gemini while the circuit breaker is open"""
+
+
+def is_transient(error) -> bool:
+    """Quota, server and network errors that are worth retrying"""
+    if isinstance(error, (asyncio.TimeoutError, httpx.TransportError)):
+        return True
+    # The SDK is loaded by then: only calls through it raise its errors
+    from google.genai import errors
+
+    return isinstance(error, errors.APIError) and (
+        error.code == 429 or error.code >= 500
+    )
+
+
+def llm_unavailable(error) -> bool:
+    """Whether a failed call means Gemini cannot serve us right now"""
+    return isinstance(error, CircuitOpen) or is_transient(error)
+
+
+class TokenBucket:
+    """Client-side rate limit: rate tokens per second, bursting up to capacity"""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated_at = clock()
+        self.waits = 0
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    async def acquire(self):
+        """Take one token, sleeping until one is available"""
+        self._refill()
+        if self.tokens < 1:
+            self.waits += 1
+        while self.tokens < 1:
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+            self._refill()
+        self.tokens -= 1
+
+
+class CircuitBreaker:
+    """Stop calling a failing service, then let one probe call through
+
+    Opens after failure_threshold consecutive transient failures. After
+    reset_seconds a single half-open probe decides whether to close again.
+    A probe that ends without an outcome (cancelled, or abandoned by its
+    caller) is given up with `abandon`; one that never reports back at all
+    expires after another reset_seconds, so the breaker cannot stay half-open.
+    """
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+        self.opens = 0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if self.clock() - self.opened_at < self.reset_seconds:
+                return False
+            self.state = "half_open"
+        elif self.clock() - self.probe_started_at < self.reset_seconds:
+            # Half-open with the probe call still outstanding
+            return False
+        self.probe_started_at = self.clock()
+        return True
+
+    def abandon(self):
+        """Give up a half-open probe that ended without success or failure"""
+        if self.state == "half_open":
+            # Still past reset_seconds since opening, so the next call probes
+            self.state = "open"
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opens += 1
+            self.state = "open"
+            self.opened_at = self.clock()
+
+
+class GeminiClient:
+    """Process-wide Gemini client on the async API with a concurrency cap
+
+    Calls are rate limited by an optional TokenBucket, retried with jittered
+    exponential backoff on quota/server errors, and refused with CircuitOpen
+    while the CircuitBreaker is open.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        model=DEFAULT_MODEL,
+        max_concurrency=8,
+        timeout_seconds=60.0,
+        max_connections=20,
+        rate_limit=None,
+        max_retries=3,
+        backoff_base=0.5,
+        backoff_max=8.0,
+        breaker=None,
+    ):
+        self._client = client
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_connections = max_connections
+        self.bucket = TokenBucket(rate_limit) if rate_limit else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.calls = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.rejected = 0
+
+    @property
+    def client(self):
+        # Built on first use so importing the app does not require an API key,
+        # or pay for loading the SDK in deployments that never call Gemini
+        if self._client is None:
+            from google import genai
+            from google.genai import types
+
+            self._client = genai.Client(
+                http_options=types.HttpOptions(
+                    timeout=int(self.timeout_seconds * 1000),
+                    async_client_args={
+                        "limits": httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_connections,
+                        )
+                    },
+                )
+            )
+        return self._client
+
+    async def _admit(self):
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpen("Gemini is unavailable; circuit breaker is open")
+        if self.bucket is not None:
+            try:
+                await self.bucket.acquire()
+            except BaseException:
+                self.breaker.abandon()
+                raise
+
+    def _record_error(self, error) -> bool:
+        """Tell the breaker how an attempt failed; True if the error is transient"""
+        if not is_transient(error):
+            # Gemini answered, so it is up even though this request was bad
+            self.breaker.record_success()
+            return False
+        self.breaker.record_failure()
+        return True
+
+    async def _retry_after(self, error, attempt) -> bool:
+        """Record a failed attempt; back off and return True if it is worth retrying"""
+        if not self._record_error(error):
+            return False
+        if attempt >= self.max_retries or self.breaker.state == "open":
+            return False
+        self.retries += 1
+        # Full jitter keeps callers that failed together from retrying together
+        delay = min(self.backoff_max, self.backoff_base * 2**attempt)
+        await asyncio.sleep(random.uniform(0, delay))
+        return True
+
+    async def generate_content(self, contents, model=None, config=None):
+        """Call models.generate_content without blocking the event loop"""
+        attempt = 0
+        while True:
+            await self._admit()
+            try:
+                response = await self._generate_once(contents, model, config)
+            except Exception as e:
+                if not await self._retry_after(e, attempt):
+                    raise
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancelled before Gemini answered, so there is no verdict
+                self.breaker.abandon()
+                raise
+            self.breaker.record_success()
+            return response
+
+    async def _generate_once(self, contents, model, config):
+        async with self._slots:
+            self.in_flight += 1
+            self.calls += 1
+            try:
+                return await asyncio.wait_for(
+                    self.client.aio.models.generate_content(
+                        model=model or self.model, contents=contents, config=config
+                    ),
+                    self.timeout_seconds,
+                )
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    async def generate_content_stream(self, contents, model=None, config=None):
+        """Yield response chunks from models.generate_content_stream as they arrive
+
+        Failures are only retried before the first chunk has been yielded.
+        """
+        attempt = 0
+        while True:
+            await self._admit()
+            started = False
+            try:
+                async for chunk in self._stream_once(contents, model, config):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                if started:
+                    # Too late to retry, but the failure still counts
+                    self._record_error(e)
+                    raise
+                if not await self._retry_after(e, attempt):
+                    raise
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancelled, or closed early by the consumer (GeneratorExit)
+                self.breaker.abandon()
+                raise
+            self.breaker.record_success()
+            return
+
+    async def _stream_once(self, contents, model, config):
+        async with self._slots:
+            self.in_flight += 1
+            self.calls += 1
+            try:
+                async with asyncio.timeout(self.timeout_seconds):
+                    stream = await self.client.aio.models.generate_content_stream(
+                        model=model or self.model, contents=contents, config=config
+                    )
+                    async for chunk in stream:
+                        yield chunk
+            except TimeoutError:
+                self.timeouts += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "circuit_open": int(self.breaker.state != "closed"),
+            "circuit_opens": self.breaker.opens,
+            "rate_limited": self.bucket.waits if self.bucket is not None else 0,
+            "max_concurrency": self.max_concurrency,
+        }
+
+
+_shared_client = None
+
+
+def get_gemini_client() -> GeminiClient:
+    """Return the shared GeminiClient, creating it from the environment once"""
+    global _shared_client
+    if _shared_client is None:
+        # GEMINI_RPM should match the project's Gemini quota; 0 disables the limit
+        requests_per_minute = float(os.getenv("GEMINI_RPM", 1000))
+        fake_client = None
+        if os.getenv("GEMINI_FAKE") == "1":
+            # Answers locally with canned replies, for load tests
+            from fake_gemini import fake_client_from_env
+
+            fake_client = fake_client_from_env()
+        _shared_client = GeminiClient(
+            client=fake_client,
+            max_concurrency=int(os.getenv("GEMINI_CONCURRENCY", 8)),
+            timeout_seconds=float(os.getenv("GEMINI_TIMEOUT", 60)),
+            rate_limit=requests_per_minute / 60 if requests_per_minute > 0 else None,
+            max_retries=int(os.getenv("GEMINI_MAX_RETRIES", 3)),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURES", 5)),
+                reset_seconds=float(os.getenv("GEMINI_BREAKER_RESET", 30)),
+            ),
+        )
+    return _shared_client
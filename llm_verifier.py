@@ -0,0 +1,229 @@
+import asyncio
+import functools
+import json
+import logging
+import re
+from pydantic import BaseModel
+from llm_client import get_gemini_client
+from metrics import timed_stage
+from upload_optimizer import UploadBudget, optimize_upload
+
+logger = logging.getLogger(__name__)
+
+
+def build_prompt(form_data):
+    """Build the label verification prompt with the form values filled in"""
+    brand_name = form_data["brand_name"]
+    product_type = form_data["product_type"]
+    alcohol_content = form_data["alcohol_content"]
+    net_contents = form_data["net_contents"]
+    return f"""
+                You are a TTB Label Verification AI. Extract all text from this alcohol beverage label image and verify it matches the for
+
+        **CRITICAL:** Return ONLY raw JSON. Do NOT wrap in markdown code fences. Do NOT include ```json or ``` markers.m data.
+
+        **OUTPUT FORMAT:**
+        Return ONLY a JSON object (no markdown, no extra text) with this exact structure:
+        {{
+        "success": boolean,
+        "checks": [
+            {{"field": "Brand Name", "expected": "{brand_name}", "found": boolean}},
+            {{"field": "Product Type", "expected": "{product_type}", "found": boolean}},
+            {{"field": "Alcohol Content", "expected": "{alcohol_content}%", "found": boolean}},
+            {{"field": "Net Contents", "expected": "{net_contents}", "found": boolean}},
+            {{"field": "Government Warning", "expected": "Present", "found": boolean}}
+        ],
+        "extracted_text": "all text visible on the label"
+        }}
+
+        **MATCHING RULES:**
+        - Case-insensitive matching
+        - Allow minor spacing/formatting differences
+        - For alcohol content, match the number (e.g., "40% alc/vol" matches "40")
+        - For net contents, match number and unit together
+        - Government Warning: check if "GOVERNMENT WARNING" text is present
+        - Set "success" to true only if ALL checks have "found": true
+    """
+
+
+# Static instructions sent once per call as the system instruction; the
+# per-request part is only the compact JSON payload of form values
+SYSTEM_INSTRUCTION = """You verify alcohol beverage labels for the TTB.
+Read all text on the label image and check it against the form values in the user's JSON.
+Return one check per field, in this order, with "expected" set as shown:
+- "Brand Name": brand_name
+- "Product Type": product_type
+- "Alcohol Content": alcohol_content
+- "Net Contents": net_contents
+- "Government Warning": "Present"; found if "GOVERNMENT WARNING" appears
+Matching: ignore case and minor spacing/formatting; alcohol content matches on the number (e.g. "40% alc/vol" matches "40%"); net contents must match number and unit together.
+success is true only if every check is found. extracted_text is all text visible on the label."""
+
+
+class Check(BaseModel):
+    field: str
+    expected: str
+    found: bool
+
+
+class VerificationResult(BaseModel):
+    """Response schema; checks come first so they can stream before the text"""
+
+    success: bool
+    checks: list[Check]
+    extracted_text: str
+
+
+@functools.cache
+def structured_config():
+    """Request config for schema-constrained replies, built on first use"""
+    from google.genai import types
+
+    return types.GenerateContentConfig(
+        system_instruction=SYSTEM_INSTRUCTION,
+        response_mime_type="application/json",
+        response_schema=VerificationResult,
+    )
+
+
+def build_payload(form_data):
+    """Compact JSON of the form values for the structured-output mode"""
+    return json.dumps(
+        {
+            "brand_name": form_data["brand_name"],
+            "product_type": form_data["product_type"],
+            "alcohol_content": f"{form_data['alcohol_content']}%",
+            "net_contents": form_data["net_contents"],
+        },
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+
+
+def parse_structured(text):
+    """Validate a structured reply against the schema and recompute success"""
+    results = VerificationResult.model_validate_json(text).model_dump()
+    results["success"] = all(check["found"] for check in results["checks"])
+    return results
+
+
+class PartialChecksParser:
+    """Pull completed check objects out of a JSON reply as it streams in"""
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = None
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.object_start = None
+        self.done = False
+
+    def feed(self, chunk):
+        """Add a chunk of reply text and return any newly completed checks"""
+        self.buffer += chunk
+        if self.done:
+            return []
+        if self.position is None:
+            match = re.search(r'"checks"\s*:\s*\[', self.buffer)
+            if not match:
+                return []
+            self.position = match.end()
+
+        checks = []
+        while self.position < len(self.buffer):
+            char = self.buffer[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == "{":
+                if self.depth == 0:
+                    self.object_start = self.position
+                self.depth += 1
+            elif char == "}":
+                self.depth -= 1
+                if self.depth == 0:
+                    checks.append(
+                        json.loads(self.buffer[self.object_start : self.position + 1])
+                    )
+            elif char == "]" and self.depth == 0:
+                # End of the checks array; nothing more to stream
+                self.done = True
+                break
+            self.position += 1
+        return checks
+
+
+class LlmVerifier:
+    """Have the LLM read the label and judge every check in one call
+
+    With structured=True the static instructions go in a system instruction,
+    the form values in a compact JSON payload, and the reply is constrained
+    to VerificationResult; otherwise the original inline prompt is used.
+    """
+
+    def __init__(self, client=None, upload_budget=UploadBudget(), structured=True):
+        self.client = client or get_gemini_client()
+        self.upload_budget = upload_budget
+        self.structured = structured
+
+    @property
+    def config(self):
+        return structured_config() if self.structured else None
+
+    async def _contents(self, form_data, image_bytes):
+        with timed_stage("upload_optimize", "gemini"):
+            data, mime_type = await asyncio.to_thread(
+                optimize_upload, image_bytes, self.upload_budget
+            )
+        from google.genai import types
+
+        text = build_payload(form_data) if self.structured else build_prompt(form_data)
+        return [text, types.Part.from_bytes(data=data, mime_type=mime_type)]
+
+    def _parse(self, text):
+        # Raising fails the job with a message instead of leaving a result
+        # without checks for the page to trip over
+        if not text:
+            raise ValueError("Gemini returned an empty reply")
+        if self.structured:
+            return parse_structured(text)
+        results = json.loads(text)
+        VerificationResult.model_validate(results)
+        return results
+
+    async def verify(self, form_data: dict, image_bytes: bytes, on_check=None) -> dict:
+        if on_check is not None:
+            return await self._verify_streaming(form_data, image_bytes, on_check)
+
+        contents = await self._contents(form_data, image_bytes)
+        with timed_stage("ocr", "gemini"):
+            response = await self.client.generate_content(contents, config=self.config)
+        logger.debug("LLM: %s", response.text)
+
+        with timed_stage("json_parse", "gemini"):
+            return self._parse(response.text)
+
+    async def _verify_streaming(self, form_data, image_bytes, on_check):
+        """Stream the reply and report each check as soon as its JSON closes"""
+        parser = PartialChecksParser()
+        text = ""
+        contents = await self._contents(form_data, image_bytes)
+        with timed_stage("ocr", "gemini"):
+            async for chunk in self.client.generate_content_stream(
+                contents, config=self.config
+            ):
+                if chunk.text:
+                    text += chunk.text
+                    for check in parser.feed(chunk.text):
+                        on_check(check)
+        logger.debug("LLM: %s", text)
+
+        with timed_stage("json_parse", "gemini"):
+            return self._parse(text)
@@ -0,0 +1,152 @@
+"""Drive /verify at a target request rate and report latency percentiles
+
+    python load_test.py --rate 20 --duration 30 --fake-latency 0.8
+    python load_test.py --url http://localhost:5001 --rate 5 --duration 60
+
+Without --url the app runs in-process with the fake Gemini client
+(fake_gemini.py), so no credentials, quota or network are needed. Requests
+arrive on a fixed schedule whether or not earlier ones have finished, and
+each is timed from upload until its job's results are ready.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+import httpx
+from benchmark import FORM_DATA, percentile
+from tests.test_ocr import generate_test_label
+
+FORM = {
+    "brand_name": FORM_DATA["brand_name"],
+    "product_type": FORM_DATA["product_type"],
+    "alcohol_content": str(FORM_DATA["alcohol_content"]),
+    "net_contents_value": "750",
+    "net_contents_unit": "mL",
+}
+PENDING_MARKER = 'hx-trigger="every 1s"'
+
+
+def label_bytes():
+    buffer = io.BytesIO()
+    generate_test_label(scale=0.5).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def verify_once(client, image_bytes, poll_interval, timeout):
+    """Submit one label and poll its job; return (seconds, outcome)"""
+    start = time.perf_counter()
+    try:
+        response = await client.post(
+            "/verify",
+            data=FORM,
+            files={"label_image": ("label.png", image_bytes, "image/png")},
+        )
+        if response.status_code == 503:
+            return time.perf_counter() - start, "rejected"
+        response.raise_for_status()
+        job_id = response.text.split("/jobs/")[1].split('"')[0]
+        while PENDING_MARKER in response.text:
+            if time.perf_counter() - start > timeout:
+                return time.perf_counter() - start, "timeout"
+            await asyncio.sleep(poll_interval)
+            response = await client.get(f"/jobs/{job_id}")
+            response.raise_for_status()
+    except httpx.HTTPError:
+        return time.perf_counter() - start, "http_error"
+
+    outcome = "failed" if "Processing Error" in response.text else "ok"
+    return time.perf_counter() - start, outcome
+
+
+async def run_load(client, rate, duration, poll_interval=0.05, timeout=120):
+    """Start rate requests per second for duration seconds; return all samples"""
+    base_image = label_bytes()
+    start = time.perf_counter()
+    tasks = []
+    for index in range(int(rate * duration)):
+        delay = start + index / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # Bytes after the PNG end chunk are ignored by decoders but make each
+        # upload unique, so duplicate-submission sharing does not hide load
+        image_bytes = base_image + str(index).encode()
+        tasks.append(
+            asyncio.create_task(
+                verify_once(client, image_bytes, poll_interval, timeout)
+            )
+        )
+    samples = await asyncio.gather(*tasks)
+    return samples, time.perf_counter() - start
+
+
+def summarize(samples, wall_seconds) -> dict:
+    outcomes = {}
+    for _, outcome in samples:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    latencies = [seconds for seconds, outcome in samples if outcome == "ok"]
+    summary = {
+        "requests": len(samples),
+        "outcomes": outcomes,
+        "error_rate": 1 - len(latencies) / len(samples) if samples else 0.0,
+        "throughput_per_s": len(latencies) / wall_seconds if wall_seconds else 0.0,
+    }
+    for name, fraction in (("p50_s", 0.50), ("p95_s", 0.95), ("p99_s", 0.99)):
+        summary[name] = percentile(latencies, fraction) if latencies else None
+    return summary
+
+
+async def run(args) -> dict:
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+            samples, wall = await run_load(
+                client, args.rate, args.duration, args.poll_interval, args.timeout
+            )
+        return summarize(samples, wall)
+
+    # The app reads its configuration at import time
+    os.environ["GEMINI_FAKE"] = "1"
+    os.environ["GEMINI_FAKE_LATENCY"] = str(args.fake_latency)
+    os.environ["GEMINI_FAKE_JITTER"] = str(args.fake_jitter)
+    os.environ["GEMINI_FAKE_ERROR_RATE"] = str(args.fake_error_rate)
+    import main
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://loadtest", timeout=args.timeout
+    ) as client:
+        samples, wall = await run_load(
+            client, args.rate, args.duration, args.poll_interval, args.timeout
+        )
+    summary = summarize(samples, wall)
+    summary["app_stats"] = main.get_stats()
+    await main.shutdown()
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="running server to test instead of in-process")
+    parser.add_argument("--rate", type=float, default=10, help="requests per second")
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--fake-latency", type=float, default=0.5)
+    parser.add_argument("--fake-jitter", type=float, default=0.2)
+    parser.add_argument("--fake-error-rate", type=float, default=0.0)
+    parser.add_argument("-o", "--output", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(run(args))
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(summary, output, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,329 @@
+import time
+
+# Start of the cold-start clock, before the heavy imports below
+IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import logging
 import os
+from urllib.parse import urlencode
 from fasthtml.common import *
 from monsterui.all import *
 from ocr_service import LlmOCR, TesseractOCR
+from ocr_backends import BackendRegistry, LazyOCR, blank_label
+from ocr_cache import (
+    CachedOCR,
+    OCRCache,
+    SingleFlight,
+    image_hash,
+    known_image_hash,
+    make_cache_key,
+)
+from results_store import ResultsStore
+from shared_cache import SharedCacheStore
+from perceptual_hash import NearDuplicateIndex
+from tesseract_pool import TesseractPool
+from image_preprocessing import PreprocessConfig
+from upload_optimizer import UploadBudget
+from admission import (
+    AdmittedVerifier,
+    MemoryBudget,
+    UploadTooLarge,
+    image_footprint,
+    read_upload,
+)
 from verifier import LabelVerifier
+from llm_verifier import LlmVerifier
+from cascade import CascadeVerifier, FallbackVerifier
+from llm_client import get_gemini_client
+from jobs import JobQueue, QueueFull
+from metrics import (
+    collect_timings,
+    registry,
+    timed_stage,
+    upload_bytes,
+    verifications,
+)
 from utils.form_validator import validate_form
-from google.genai import types
+from utils.batch import (
+    MAX_ARCHIVE_BYTES,
+    load_zip_images,
+    parse_manifest,
+    verify_batch,
+)
+from utils.fuzzy_match import parse_tolerances
 import json
 
-app, rt = fast_app(hdrs=(Theme.blue.headers(),), pico=False)
+logger = logging.getLogger(__name__)
+
+VERIFY_ENGINE = os.getenv("VERIFY_ENGINE", "llm")
+STREAM_RESULTS = os.getenv("STREAM_RESULTS") == "1"
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 4))
+MATCH_TOLERANCES = parse_tolerances(os.getenv("MATCH_TOLERANCES", ""))
+TESSERACT_WORKERS = int(os.getenv("TESSERACT_WORKERS", 0))
+# Seconds between pings of an idle Tesseract pool; 0 turns them off
+TESSERACT_HEALTH_INTERVAL = float(os.getenv("TESSERACT_HEALTH_INTERVAL", 60))
+TESSERACT_PREPROCESS = (
+    PreprocessConfig() if os.getenv("TESSERACT_PREPROCESS") == "1" else None
+)
+# Schema-constrained replies with a static system instruction; 0 keeps the inline prompt
+GEMINI_STRUCTURED = os.getenv("GEMINI_STRUCTURED", "1") == "1"
+# Larger uploads are downscaled and re-encoded before they are sent to Gemini
+GEMINI_UPLOAD_BUDGET = UploadBudget(
+    max_long_edge=int(os.getenv("GEMINI_UPLOAD_MAX_EDGE", 2048)),
+    max_bytes=int(os.getenv("GEMINI_UPLOAD_MAX_BYTES", 1_500_000)),
+)
+
+# Web worker processes started by `python main.py`; uvicorn reads the same variable
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 1))
+# SQLite file through which workers share cache entries and job status
+SHARED_CACHE_DB = os.getenv(
+    "SHARED_CACHE_DB", "shared_cache.db" if WEB_CONCURRENCY > 1 else ""
+)
+
+
+def make_shared_store(table):
+    return SharedCacheStore(SHARED_CACHE_DB, table) if SHARED_CACHE_DB else None
+
+
+ocr_cache = OCRCache(
+    max_entries=int(os.getenv("OCR_CACHE_SIZE", 256)),
+    ttl_seconds=int(os.getenv("OCR_CACHE_TTL", 24 * 3600)),
+    disk_dir=os.getenv("OCR_CACHE_DIR"),
+    shared=make_shared_store("ocr_cache"),
+)
+# Hamming distance (of 256 dHash bits) at which a re-exported label reuses
+# earlier OCR text; 0 disables the near-duplicate lookup
+NEAR_DUPLICATE_DISTANCE = int(os.getenv("OCR_NEAR_DUPLICATE_DISTANCE", 0))
+NEAR_DUPLICATE_INDEX_SIZE = int(os.getenv("OCR_NEAR_DUPLICATE_INDEX_SIZE", 10000))
+
+
+def make_near_duplicate_index():
+    if NEAR_DUPLICATE_DISTANCE <= 0:
+        return None
+    return NearDuplicateIndex(
+        max_distance=NEAR_DUPLICATE_DISTANCE, max_entries=NEAR_DUPLICATE_INDEX_SIZE
+    )
+
+
+# Extracted text and form values of recent results, for re-checking edits
+recheck_store = OCRCache(
+    max_entries=int(os.getenv("RECHECK_STORE_SIZE", 1024)),
+    ttl_seconds=int(os.getenv("RECHECK_STORE_TTL", 24 * 3600)),
+    shared=make_shared_store("recheck"),
+)
+# Every /verify result, for history, audits and reuse across restarts
+results_store = ResultsStore(os.getenv("RESULTS_DB", "results.db"))
+# Stored results for the same image, form and engine are reused for this long;
+# 0 always verifies afresh
+RESULTS_REUSE_TTL = int(os.getenv("RESULTS_REUSE_TTL", 24 * 3600))
+# Identical submissions already being verified share the running call
+verify_flight = SingleFlight()
+
+# Uploads over these limits are refused before the image is decoded
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 25_000_000))
+MAX_UPLOAD_PIXELS = int(os.getenv("MAX_UPLOAD_PIXELS", 100_000_000))
+MAX_BATCH_BYTES = int(os.getenv("MAX_BATCH_BYTES", 200_000_000))
+# Estimated bytes of images being decoded at once in this process, plus a
+# quarter set aside for uploads waiting in the queue; decodes over it wait
+# their turn and uploads over it are refused, so a burst of large photos
+# cannot exhaust memory
+decode_budget = MemoryBudget(int(os.getenv("DECODE_MEMORY_BUDGET", 1_000_000_000)))
+
+# Browsers shrink photos to this long edge and JPEG quality before uploading;
+# 0 sends the original file
+CLIENT_RESIZE_MAX_EDGE = int(os.getenv("CLIENT_RESIZE_MAX_EDGE", 0))
+CLIENT_RESIZE_QUALITY = float(os.getenv("CLIENT_RESIZE_QUALITY", 0.85))
+
+# Background workers for /verify; a full queue answers 503 instead of piling up
+job_queue = JobQueue(
+    workers=int(os.getenv("VERIFY_WORKERS", 4)),
+    max_depth=int(os.getenv("VERIFY_QUEUE_DEPTH", 100)),
+    index=make_shared_store("jobs"),
+)
+
+# Long-lived OCR worker processes; 0 keeps the per-call thread path
+tesseract_pool = (
+    TesseractPool(
+        size=TESSERACT_WORKERS, max_queue=int(os.getenv("TESSERACT_QUEUE", 64))
+    )
+    if TESSERACT_WORKERS > 0
+    else None
+)
+
+
+async def warm_tesseract(ocr):
+    # One call per pool process, so every worker has started and loaded Tesseract
+    calls = tesseract_pool.size if tesseract_pool is not None else 1
+    await asyncio.gather(*(ocr.extract_text(blank_label()) for _ in range(calls)))
+
+
+async def warm_gemini(ocr):
+    try:
+        await ocr.extract_text(blank_label())
+    except ValueError:
+        # Gemini answered; a blank label just has no text to return
+        pass
+
+
+# OCR engines are built, and their SDKs imported, on first use
+ocr_backends = BackendRegistry()
+ocr_backends.register(
+    "tesseract",
+    lambda: TesseractOCR(pool=tesseract_pool, preprocess=TESSERACT_PREPROCESS),
+    warm=warm_tesseract,
+)
+ocr_backends.register(
+    "gemini", lambda: LlmOCR(upload_budget=GEMINI_UPLOAD_BUDGET), warm=warm_gemini
+)
+# Engines to load and exercise before taking traffic, e.g. "tesseract,gemini"
+OCR_PREWARM = [name for name in os.getenv("OCR_PREWARM", "").split(",") if name]
+
+tesseract_ocr = CachedOCR(
+    LazyOCR(ocr_backends, "tesseract"),
+    ocr_cache,
+    near_duplicates=make_near_duplicate_index(),
+)
+llm_ocr = CachedOCR(
+    LazyOCR(ocr_backends, "gemini"),
+    ocr_cache,
+    near_duplicates=make_near_duplicate_index(),
+)
+cascade_verifier = CascadeVerifier(
+    LabelVerifier(tesseract_ocr, MATCH_TOLERANCES),
+    LabelVerifier(llm_ocr, MATCH_TOLERANCES),
+    min_confidence=float(os.getenv("CASCADE_MIN_CONFIDENCE", 0.6)),
+)
+
+
+# Serve LLM requests with local OCR while Gemini is rate limited or down
+llm_fallback = (
+    FallbackVerifier(
+        LlmVerifier(upload_budget=GEMINI_UPLOAD_BUDGET, structured=GEMINI_STRUCTURED),
+        LabelVerifier(tesseract_ocr, MATCH_TOLERANCES),
+    )
+    if os.getenv("LLM_FALLBACK", "1") == "1"
+    else None
+)
+
+
+def get_verifier():
+    """Pick the verification strategy configured by VERIFY_ENGINE"""
+    if VERIFY_ENGINE == "cascade":
+        return cascade_verifier
+    if VERIFY_ENGINE == "tesseract":
+        return LabelVerifier(tesseract_ocr, MATCH_TOLERANCES)
+    return llm_fallback or LlmVerifier(
+        upload_budget=GEMINI_UPLOAD_BUDGET, structured=GEMINI_STRUCTURED
+    )
+
+
+# Seconds from the start of importing main to each startup milestone
+startup_report = {}
+
+
+async def startup():
+    start = time.perf_counter()
+    await ocr_backends.prewarm(OCR_PREWARM)
+    startup_report["prewarm_s"] = time.perf_counter() - start
+    if tesseract_pool is not None and TESSERACT_HEALTH_INTERVAL > 0:
+        tesseract_pool.start_health_checks(TESSERACT_HEALTH_INTERVAL)
+    startup_report["ready_s"] = time.perf_counter() - IMPORT_STARTED
+    warmed = ", ".join(
+        f"{name} {seconds:.2f}s" for name, seconds in ocr_backends.warm_seconds.items()
+    )
+    logger.info(
+        "Startup: imported in %.2fs, pre-warmed in %.2fs (%s), ready after %.2fs",
+        startup_report["import_s"],
+        startup_report["prewarm_s"],
+        warmed or "none",
+        startup_report["ready_s"],
+    )
+
+
+async def shutdown():
+    await job_queue.stop()
+    if tesseract_pool is not None:
+        tesseract_pool.shutdown()
+    results_store.close()
+    for store in (ocr_cache.shared, recheck_store.shared, job_queue.index):
+        if store is not None:
+            store.close()
+
+
+# htmx skips swapping error responses by default; show our 413 and 503 error cards
+htmx_config = Meta(
+    name="htmx-config",
+    content=json.dumps(
+        {
+            "responseHandling": [
+                {"code": "204", "swap": False},
+                {"code": "[23]..", "swap": True},
+                {"code": "413", "swap": True, "error": False},
+                {"code": "503", "swap": True, "error": False},
+                {"code": "[45]..", "swap": False, "error": True},
+            ]
+        }
+    ),
+)
+
+sse_ext = Script(src="https://cdn.jsdelivr.net/npm/htmx-ext-sse@2.2.2/sse.js")
+
+
+def build_too_large_response(
+    message,
+    title="Image Too Large",
+    hint="Please upload a smaller photo of the label.",
+):
+    return HTMLResponse(
+        to_xml(build_error_ui(title, f"{message} {hint}")),
+        status_code=413,
+    )
+
+
+def build_batch_too_large_response(message):
+    return build_too_large_response(
+        message, "Batch Too Large", "Please split the labels into smaller batches."
+    )
+
+
+def build_busy_response():
+    return HTMLResponse(
+        to_xml(
+            build_error_ui(
+                "Server Busy",
+                "Too many labels are being verified right now. Please try again in a minute.",
+            )
+        ),
+        status_code=503,
+    )
+
+
+def limit_upload_size(req):
+    """Refuse an oversized upload body by its Content-Length, before it is read"""
+    length = req.headers.get("content-length", "")
+    if not length.isdigit():
+        return None
+    # Leave room for the other form fields and the multipart boundaries
+    if req.url.path == "/verify" and int(length) > MAX_UPLOAD_BYTES + 64 * 1024:
+        return build_too_large_response(
+            f"The upload is larger than {MAX_UPLOAD_BYTES / 1e6:g} MB."
+        )
+    batch_limit = MAX_BATCH_BYTES + MAX_UPLOAD_BYTES
+    if req.url.path == "/verify/batch" and int(length) > batch_limit + 64 * 1024:
+        return build_batch_too_large_response(
+            f"The upload is larger than {batch_limit / 1e6:g} MB."
+        )
+    return None
+
+
+app, rt = fast_app(
+    hdrs=(Theme.blue.headers(), htmx_config, sse_ext),
+    pico=False,
+    before=Beforeware(limit_upload_size),
+    on_startup=[startup],
+    on_shutdown=[shutdown],
+)
 
 
 def build_error_ui(title, message, show_back_link=True):
@@ -22,29 +338,117 @@ def build_error_ui(title, message, show_back_link=True):
     return Container(Card(*card_content), style="padding: 2rem;")
 
 
-def build_results_ui(results):
-    """Build verification results UI"""
-    check_items = []
-    for check in results["checks"]:
-        icon = "✓" if check["found"] else "✗"
-        color = "green" if check["found"] else "red"
-        check_items.append(
-            DivHStacked(
-                Span(
-                    icon,
-                    style=f"color: {color}; font-weight: bold; font-size: 1.5rem; margin-right: 1rem;",
+def build_pending_ui(job_id):
+    """Build placeholder that polls a queued job until its results are ready"""
+    return Div(
+        DivHStacked(
+            Div(cls="job-spinner"),
+            Span("Verifying label...", style="color: #666;"),
+            style="gap: 1rem; align-items: center;",
+        ),
+        P(f"Job ID: {job_id}", style="font-size: 0.8rem; color: #999;"),
+        hx_get=f"/jobs/{job_id}",
+        hx_trigger="every 1s",
+        hx_swap="outerHTML",
+        style="padding: 2rem;",
+    )
+
+
+def build_check_row(check):
+    """Build one field's pass/fail row"""
+    icon = "✓" if check["found"] else "✗"
+    color = "green" if check["found"] else "red"
+    return DivHStacked(
+        Span(
+            icon,
+            style=f"color: {color}; font-weight: bold; font-size: 1.5rem; margin-right: 1rem;",
+        ),
+        DivVStacked(
+            Strong(check["field"]),
+            Span(
+                f"Expected: {check['expected']}",
+                style="font-size: 0.9rem; color: #666;",
+            ),
+            style="gap: 0.25rem;",
+        ),
+        style="align-items: center; gap: 1rem; padding: 0.5rem 0;",
+    )
+
+
+def build_streaming_ui(job_id):
+    """Build placeholder that fills in check rows as the job streams them"""
+    return Div(
+        DivHStacked(
+            Div(cls="job-spinner"),
+            Span("Verifying label...", style="color: #666;"),
+            style="gap: 1rem; align-items: center;",
+        ),
+        Card(
+            H3("Verification Details"),
+            DivVStacked(sse_swap="check", hx_swap="beforeend", style="gap: 0.5rem;"),
+        ),
+        P(f"Job ID: {job_id}", style="font-size: 0.8rem; color: #999;"),
+        hx_ext="sse",
+        sse_connect=f"/jobs/{job_id}/stream",
+        sse_swap="done",
+        sse_close="done",
+        hx_swap="outerHTML",
+        style="padding: 2rem;",
+    )
+
+
+def build_recheck_form(result_id, form_data):
+    """Build inline form that re-checks edited fields against the stored text"""
+    return Details(
+        Summary("Edit and re-check"),
+        Form(
+            DivVStacked(
+                DivHStacked(
+                    Label("Brand Name", cls="whitespace-nowrap"),
+                    Input(
+                        name="brand_name", value=form_data["brand_name"], required=True
+                    ),
+                    style="gap: 0.5rem;",
                 ),
-                DivVStacked(
-                    Strong(check["field"]),
-                    Span(
-                        f"Expected: {check['expected']}",
-                        style="font-size: 0.9rem; color: #666;",
+                DivHStacked(
+                    Label("Product Class/Type", cls="whitespace-nowrap"),
+                    Input(
+                        name="product_type",
+                        value=form_data["product_type"],
+                        required=True,
                     ),
-                    style="gap: 0.25rem;",
+                    style="gap: 0.5rem;",
                 ),
-                style="align-items: center; gap: 1rem; padding: 0.5rem 0;",
-            )
-        )
+                DivHStacked(
+                    Label("Alcohol Content (%)", cls="whitespace-nowrap"),
+                    Input(
+                        name="alcohol_content",
+                        type="number",
+                        step="0.1",
+                        value=form_data["alcohol_content"],
+                        required=True,
+                    ),
+                    style="gap: 0.5rem;",
+                ),
+                DivHStacked(
+                    Label("Net Contents", cls="whitespace-nowrap"),
+                    Input(name="net_contents", value=form_data["net_contents"]),
+                    style="gap: 0.5rem;",
+                ),
+                Button("Re-check", type="submit", cls=ButtonT.primary),
+                style="gap: 1rem; align-items: flex-start;",
+            ),
+            hx_post=f"/results/{result_id}/recheck",
+            hx_target="#results",
+            hx_swap="innerHTML",
+            style="padding-top: 1rem;",
+        ),
+    )
+
+
+def build_results_ui(results, result_id=None, form_data=None):
+    """Build verification results UI"""
+    check_items = [build_check_row(check) for check in results["checks"]]
 
     # Overall status card
     if results["success"]:
@@ -60,13 +464,27 @@ def build_results_ui(results):
             style="background-color: #fff0f0; border: 2px solid red;",
         )
 
+    details = [
+        H3("Verification Details"),
+        DivVStacked(*check_items, style="gap: 0.5rem;"),
+    ]
+    if results.get("tier"):
+        engine = "Tesseract OCR" if results["tier"] == "tesseract" else "Gemini"
+        details.append(
+            P(f"Verified by: {engine}", style="font-size: 0.9rem; color: #666;")
+        )
+    if results.get("fallback"):
+        details.append(
+            P(
+                "Gemini was unavailable, so this label was checked with local OCR.",
+                style="font-size: 0.9rem; color: #666;",
+            )
+        )
+
     return Container(
         DivVStacked(
             status_card,
-            Card(
-                H3("Verification Details"),
-                DivVStacked(*check_items, style="gap: 0.5rem;"),
-            ),
+            Card(*details),
             Details(
                 Summary("View Extracted Text"),
                 Pre(
@@ -74,6 +492,7 @@ def build_results_ui(results):
                     style="background: #f5f5f5; padding: 1rem; overflow-x: auto; color: #000; font-size: 0.9rem;",
                 ),
             ),
+            build_recheck_form(result_id, form_data) if result_id else None,
             A("← Verify Another Label", href="/", style="margin-top: 1rem;"),
             style="gap: 1.5rem; align-items: flex-start;",
         ),
@@ -81,6 +500,135 @@ def build_results_ui(results):
     )
 
 
+def build_batch_results_ui(rows):
+    """Build per-row batch verification results table"""
+    fields = [check["field"] for row in rows for check in row["checks"]]
+    fields = list(dict.fromkeys(fields))
+    passed = sum(1 for row in rows if row["success"])
+
+    body = []
+    for row in rows:
+        found = {check["field"]: check["found"] for check in row["checks"]}
+        cells = [Td(row["row"]), Td(row["image"]), Td(row["brand_name"])]
+        for field in fields:
+            if field in found:
+                cells.append(
+                    Td(
+                        "✓" if found[field] else "✗",
+                        style=f"color: {'green' if found[field] else 'red'};",
+                    )
+                )
+            else:
+                cells.append(Td("—"))
+        cells.append(Td(row["error"] or ("Passed" if row["success"] else "Failed")))
+        body.append(Tr(*cells))
+
+    return Container(
+        DivVStacked(
+            Card(
+                H3("Batch Verification Results"),
+                P(f"{passed} of {len(rows)} labels passed."),
+            ),
+            Card(
+                Table(
+                    Thead(
+                        Tr(
+                            Th("Row"),
+                            Th("Image"),
+                            Th("Brand Name"),
+                            *[Th(field) for field in fields],
+                            Th("Status"),
+                        )
+                    ),
+                    Tbody(*body),
+                ),
+                style="overflow-x: auto; max-width: 100%;",
+            ),
+            A("← Verify More Labels", href="/batch", style="margin-top: 1rem;"),
+            style="gap: 1.5rem; align-items: flex-start;",
+        ),
+        style="padding: 2rem;",
+    )
+
+
+# Re-encodes the chosen photo on a canvas and swaps it into the file input.
+# The original's size goes in hidden fields; on any failure, or if the result
+# is not smaller, the original is uploaded unchanged.
+CLIENT_RESIZE_SCRIPT = """
+(() => {
+  async function shrink(input) {
+    const fields = input.form.elements;
+    for (const name of ["original_bytes", "original_width", "original_height"]) {
+      fields[name].value = "";
+    }
+    const file = input.files[0];
+    if (!file || !file.type.startsWith("image/")) return;
+
+    const bitmap = await createImageBitmap(file, { imageOrientation: "from-image" });
+    const { width, height } = bitmap;
+    const scale = Math.min(1, Number(input.dataset.maxEdge) / Math.max(width, height));
+    const canvas = document.createElement("canvas");
+    canvas.width = Math.round(width * scale);
+    canvas.height = Math.round(height * scale);
+    const context = canvas.getContext("2d");
+    // JPEG has no transparency; keep transparent labels readable on white
+    context.fillStyle = "#fff";
+    context.fillRect(0, 0, canvas.width, canvas.height);
+    context.drawImage(bitmap, 0, 0, canvas.width, canvas.height);
+    bitmap.close();
+    const blob = await new Promise((resolve) =>
+      canvas.toBlob(resolve, "image/jpeg", Number(input.dataset.quality))
+    );
+    if (!blob || blob.size >= file.size) return;
+
+    const name = file.name.replace(/\\.[^.]*$/, "") + ".jpg";
+    const transfer = new DataTransfer();
+    transfer.items.add(new File([blob], name, { type: "image/jpeg" }));
+    input.files = transfer.files;
+    fields.original_bytes.value = file.size;
+    fields.original_width.value = width;
+    fields.original_height.value = height;
+  }
+
+  document.addEventListener("change", async (event) => {
+    const input = event.target;
+    if (!input.matches("input[type=file][data-max-edge]")) return;
+    const button = input.form.querySelector("button[type=submit]");
+    button.disabled = true;
+    try {
+      await shrink(input);
+    } catch (error) {
+      console.warn("Could not resize the photo; uploading the original", error);
+    } finally {
+      button.disabled = false;
+    }
+  });
+})();
+"""
+
+
+def build_label_image_input():
+    """File input for the label, shrunk in the browser when enabled"""
+    if CLIENT_RESIZE_MAX_EDGE <= 0:
+        return (
+            Input(name="label_image", type="file", accept="image/*", required=True),
+        )
+    return (
+        Input(
+            name="label_image",
+            type="file",
+            accept="image/*",
+            required=True,
+            data_max_edge=CLIENT_RESIZE_MAX_EDGE,
+            data_quality=CLIENT_RESIZE_QUALITY,
+        ),
+        Input(type="hidden", name="original_bytes"),
+        Input(type="hidden", name="original_width"),
+        Input(type="hidden", name="original_height"),
+        Script(CLIENT_RESIZE_SCRIPT),
+    )
+
+
 @rt("/")
 def get():
     form = Form(
@@ -145,12 +693,7 @@ def get():
                 ),
                 DivVStacked(
                     Label("Upload Label Image", cls="whitespace-nowrap"),
-                    Input(
-                        name="label_image",
-                        type="file",
-                        accept="image/*",
-                        required=True,
-                    ),
+                    *build_label_image_input(),
                     style="gap: 0.5rem; align-items: flex-start;",
                 ),
                 Button("Verify Label", type="submit", cls=ButtonT.primary),
@@ -167,6 +710,14 @@ def get():
     return Container(
         Style(
             """
+            .job-spinner {
+                width: 30px;
+                height: 30px;
+                border: 4px solid #f3f3f3;
+                border-top: 4px solid #3498db;
+                border-radius: 50%;
+                animation: spin 1s linear infinite;
+            }
             .htmx-request ~ #results {
                 display: flex;
                 justify-content: center;
@@ -189,11 +740,79 @@ def get():
         """
         ),
         form,
+        DivHStacked(
+            A("Verify many labels at once →", href="/batch"),
+            A("Verification history →", href="/history"),
+            style="gap: 2rem;",
+        ),
         Div(id="results"),
         style="padding: 2rem;",
     )
 
 
+@rt("/batch")
+def get():
+    form = Form(
+        Card(
+            H2("Batch Label Verification"),
+            P(
+                "Upload a ZIP of label images and a CSV or JSONL manifest with "
+                "image, brand_name, product_type, alcohol_content and "
+                "net_contents columns.",
+                style="color: #666;",
+            ),
+            DivVStacked(
+                DivVStacked(
+                    Label("Label Images (ZIP)", cls="whitespace-nowrap"),
+                    Input(
+                        name="label_images", type="file", accept=".zip", required=True
+                    ),
+                    style="gap: 0.5rem; align-items: flex-start;",
+                ),
+                DivVStacked(
+                    Label("Manifest (CSV or JSONL)", cls="whitespace-nowrap"),
+                    Input(
+                        name="manifest",
+                        type="file",
+                        accept=".csv,.jsonl",
+                        required=True,
+                    ),
+                    style="gap: 0.5rem; align-items: flex-start;",
+                ),
+                Button("Verify Labels", type="submit", cls=ButtonT.primary),
+                style="gap: 1.5rem; align-items: flex-start;",
+            ),
+            style="max-width: 600px; text-align: left",
+        ),
+        enctype="multipart/form-data",
+        cls="space-y-4",
+        hx_post="/verify/batch",
+        hx_target="#results",
+        hx_swap="innerHTML show:#results:top smooth",
+    )
+    return Container(form, Div(id="results"), style="padding: 2rem;")
+
+
+def build_upload_sizes(transmitted_bytes, original_bytes, width, height):
+    """Original and transmitted image sizes, counting the bytes in metrics
+
+    The original_* fields are only sent when the browser shrank the photo.
+    """
+    resized = original_bytes.isdigit()
+    upload = {
+        "transmitted_bytes": transmitted_bytes,
+        "original_bytes": int(original_bytes) if resized else transmitted_bytes,
+        "resized": resized,
+    }
+    if resized and width.isdigit() and height.isdigit():
+        upload["original_width"] = int(width)
+        upload["original_height"] = int(height)
+    label = "yes" if resized else "no"
+    upload_bytes.inc(upload["original_bytes"], size="original", resized=label)
+    upload_bytes.inc(transmitted_bytes, size="transmitted", resized=label)
+    return upload
+
+
 @rt("/verify")
 async def post(
     brand_name: str,
@@ -202,76 +821,472 @@ async def post(
     net_contents_value: float,
     net_contents_unit: str,
     label_image: UploadFile,
+    original_bytes: str = "",
+    original_width: str = "",
+    original_height: str = "",
 ):
-    error = validate_form(alcohol_content, label_image, net_contents_unit)
-    if error:
-        return error
+    timings = {}
+    with collect_timings(timings):
+        with timed_stage("validate_form"):
+            error = validate_form(alcohol_content, label_image, net_contents_unit)
+        if error:
+            return error
 
-    try:
         if net_contents_value == int(net_contents_value):
             net_contents = f"{int(net_contents_value)} {net_contents_unit}"
         else:
             net_contents = f"{net_contents_value} {net_contents_unit}"
 
-        content = await label_image.read()
-        ocr = LlmOCR()
-        #
-        # results = await LabelVerifier(ocr).verify(
-        #     {
-        #         "brand_name": brand_name,
-        #         "product_type": product_type,
-        #         "alcohol_content": alcohol_content,
-        #         "net_contents": net_contents,
-        #     },
-        #     content,
-        # )
-        prompt = f"""
-                    You are a TTB Label Verification AI. Extract all text from this alcohol beverage label image and verify it matches the for
-
-            **CRITICAL:** Return ONLY raw JSON. Do NOT wrap in markdown code fences. Do NOT include ```json or ``` markers.m data.
-
-            **OUTPUT FORMAT:**
-            Return ONLY a JSON object (no markdown, no extra text) with this exact structure:
-            {{
-            "success": boolean,
-            "checks": [
-                {{"field": "Brand Name", "expected": "{brand_name}", "found": boolean}},
-                {{"field": "Product Type", "expected": "{product_type}", "found": boolean}},
-                {{"field": "Alcohol Content", "expected": "{alcohol_content}%", "found": boolean}},
-                {{"field": "Net Contents", "expected": "{net_contents}", "found": boolean}},
-                {{"field": "Government Warning", "expected": "Present", "found": boolean}}
-            ],
-            "extracted_text": "all text visible on the label"
-            }}
-
-            **MATCHING RULES:**
-            - Case-insensitive matching
-            - Allow minor spacing/formatting differences
-            - For alcohol content, match the number (e.g., "40% alc/vol" matches "40")
-            - For net contents, match number and unit together
-            - Government Warning: check if "GOVERNMENT WARNING" text is present
-            - Set "success" to true only if ALL checks have "found": true
-        """
-        results = ocr.client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[
-                prompt,
-                types.Part.from_bytes(
-                    data=content,
-                    mime_type="image/jpeg",
-                ),
-            ],
+        try:
+            with timed_stage("upload_read"):
+                content = await read_upload(label_image, MAX_UPLOAD_BYTES)
+            with timed_stage("image_header"):
+                footprint = image_footprint(content, MAX_UPLOAD_PIXELS)
+            if footprint is not None and not decode_budget.fits(footprint):
+                raise UploadTooLarge("The image is too large to process.")
+        except UploadTooLarge as e:
+            return build_too_large_response(str(e))
+    if footprint is None:
+        return build_error_ui(
+            "Upload Error", "The uploaded file could not be read as an image."
+        )
+    # The upload stays in memory until a worker has verified it
+    if not decode_budget.hold(len(content)):
+        return build_busy_response()
+    upload = build_upload_sizes(
+        len(content), original_bytes, original_width, original_height
+    )
+    form_data = {
+        "brand_name": brand_name,
+        "product_type": product_type,
+        "alcohol_content": alcohol_content,
+        "net_contents": net_contents,
+    }
+    # Everything that changes the outcome for the same image and form values
+    verify_config = json.dumps(
+        {
+            "engine": VERIFY_ENGINE,
+            "tolerances": MATCH_TOLERANCES,
+            "preprocess": repr(TESSERACT_PREPROCESS),
+            "form": form_data,
+        },
+        sort_keys=True,
+    )
+    # Hashed once off the loop; the OCR cache reuses it via known_image_hash
+    content_hash = await asyncio.to_thread(image_hash, content)
+    flight_key = make_cache_key(content_hash, verify_config)
+
+    async def verify(job):
+        stored = None
+        if RESULTS_REUSE_TTL > 0:
+            stored = await asyncio.to_thread(
+                results_store.find, content_hash, flight_key, RESULTS_REUSE_TTL
+            )
+        if stored is not None:
+            return stored["id"], {**stored["results"], "reused": True}
+        with collect_timings(timings), known_image_hash(content, content_hash):
+            with timed_stage("decode_admission"):
+                await decode_budget.acquire(footprint)
+            try:
+                # Streaming costs the structured single-shot path, so only
+                # ask for it when the page will show checks as they arrive
+                results = await get_verifier().verify(
+                    form_data,
+                    content,
+                    on_check=job.add_check if STREAM_RESULTS else None,
+                )
+            finally:
+                decode_budget.release(footprint)
+        await asyncio.to_thread(
+            results_store.record,
+            job.id,
+            content_hash,
+            flight_key,
+            form_data,
+            results,
+            VERIFY_ENGINE,
+            timings,
+            upload,
+        )
+        return job.id, results
+
+    async def run(job):
+        try:
+            job.result_id, results = await verify_flight.do(
+                flight_key, lambda: verify(job)
+            )
+        except Exception:
+            verifications.inc(engine=VERIFY_ENGINE, tier="", outcome="error")
+            raise
+        finally:
+            decode_budget.unhold(len(content))
+        if results.get("reused"):
+            # Stored results were never streamed; send their checks now
+            for check in results["checks"]:
+                job.add_check(check)
+        await recheck_store.aset(
+            job.id,
+            json.dumps(
+                {
+                    "form_data": form_data,
+                    "extracted_text": results.get("extracted_text", ""),
+                }
+            ),
         )
-        print("LLM: ", results.text)
+        outcome = "pass" if results.get("success") else "fail"
+        verifications.inc(
+            engine=VERIFY_ENGINE, tier=results.get("tier", ""), outcome=outcome
+        )
+        return results
 
-        results_dict = json.loads(results.text) if results.text else {}
-        return build_results_ui(results_dict)
+    try:
+        job = job_queue.submit(run)
+    except QueueFull:
+        decode_budget.unhold(len(content))
+        return build_busy_response()
+    if STREAM_RESULTS:
+        return build_streaming_ui(job.id)
+    return build_pending_ui(job.id)
 
-    except Exception as e:
+
+def build_job_ui(job):
+    """Build the current view of a job: pending, failed or its results"""
+    if job is None:
+        return build_error_ui(
+            "Job Not Found",
+            "This verification job has expired or does not exist. Please submit the label again.",
+        )
+    if not job.finished:
+        return build_pending_ui(job.id)
+    if job.status == "failed":
         return build_error_ui(
             "Processing Error",
-            f"An error occurred while processing the image: {str(e)}. Please try again with a different image or check that the image is readable.",
+            f"An error occurred while processing the image: {job.error}. Please try again with a different image or check that the image is readable.",
+        )
+    results = job.result
+    if job.remote:
+        # Finished in another worker process; its result is in the store
+        entry = results_store.get(job.result_id)
+        if entry is None:
+            return build_job_ui(None)
+        results = entry["results"]
+    stored = recheck_store.get(job.id)
+    form_data = json.loads(stored)["form_data"] if stored else None
+    with timed_stage("render"):
+        return build_results_ui(
+            results, result_id=job.id if stored else None, form_data=form_data
         )
 
 
-serve(port=int(os.getenv("PORT", 5001)))
+def load_recheck_entry(result_id):
+    """Form values and extracted text of a result, from memory or the store"""
+    stored = recheck_store.get(result_id)
+    if stored is not None:
+        return json.loads(stored)
+    entry = results_store.get(result_id)
+    if entry is None:
+        return None
+    return {
+        "form_data": entry["form_data"],
+        "extracted_text": entry["results"]["extracted_text"],
+    }
+
+
+@rt("/results/{result_id}/recheck")
+def post(
+    result_id: str,
+    brand_name: str,
+    product_type: str,
+    alcohol_content: float,
+    net_contents: str = "",
+):
+    stored = load_recheck_entry(result_id)
+    if stored is None:
+        return build_error_ui(
+            "Result Expired",
+            "The extracted text for this label is no longer available. Please upload the label again.",
+        )
+    if alcohol_content < 0 or alcohol_content > 100:
+        return build_error_ui(
+            "Validation Error", "Alcohol content must be between 0 and 100%."
+        )
+
+    form_data = {
+        "brand_name": brand_name,
+        "product_type": product_type,
+        "alcohol_content": alcohol_content,
+        "net_contents": net_contents.strip(),
+    }
+    extracted_text = stored["extracted_text"]
+    with timed_stage("recheck"):
+        results = LabelVerifier(None, MATCH_TOLERANCES).check_text(
+            form_data, extracted_text
+        )
+
+    # Later re-checks start from the corrected values
+    recheck_store.set(
+        result_id,
+        json.dumps({"form_data": form_data, "extracted_text": extracted_text}),
+    )
+    with timed_stage("render"):
+        return build_results_ui(results, result_id=result_id, form_data=form_data)
+
+
+@rt("/jobs/{job_id}")
+def get(job_id: str):
+    return build_job_ui(job_queue.get(job_id))
+
+
+@rt("/jobs/{job_id}/stream")
+async def get(job_id: str):
+    async def events():
+        # Lookups and rendering may read the shared SQLite stores
+        job = await asyncio.to_thread(job_queue.get, job_id)
+        sent = 0
+        while job is not None:
+            while sent < len(job.checks):
+                yield sse_message(build_check_row(job.checks[sent]), event="check")
+                sent += 1
+            if job.finished:
+                break
+            if job.remote:
+                # Running in another worker, which cannot wake this one;
+                # its checks arrive with the results
+                await asyncio.sleep(1)
+                job = await asyncio.to_thread(job_queue.get, job_id)
+            elif not await job.wait_for_update(timeout=15):
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+        yield sse_message(await asyncio.to_thread(build_job_ui, job), event="done")
+
+    return EventStream(events())
+
+
+HISTORY_PAGE_SIZE = 25
+
+
+def build_history_ui(entries, brand="", has_more=False):
+    """Build a page of stored results, newest first"""
+    body = []
+    for entry in entries:
+        results = entry["results"]
+        passed = results["success"]
+        body.append(
+            Tr(
+                Td(
+                    time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created_at"]))
+                ),
+                Td(A(entry["form_data"]["brand_name"], href=f"/history/{entry['id']}")),
+                Td(entry["form_data"]["product_type"]),
+                Td(results.get("tier") or entry["engine"]),
+                Td(
+                    "✓ Passed" if passed else "✗ Failed",
+                    style=f"color: {'green' if passed else 'red'};",
+                ),
+            )
+        )
+
+    older = None
+    if has_more:
+        query = {"before": entries[-1]["id"]}
+        if brand:
+            query["brand"] = brand
+        older = A("Older results →", href=f"/history?{urlencode(query)}")
+
+    return Container(
+        DivVStacked(
+            Card(
+                H2("Verification History"),
+                Form(
+                    DivHStacked(
+                        Input(name="brand", value=brand, placeholder="Brand name"),
+                        Button("Filter", type="submit"),
+                        style="gap: 0.5rem;",
+                    ),
+                    method="get",
+                    action="/history",
+                ),
+            ),
+            Card(
+                Table(
+                    Thead(
+                        Tr(
+                            Th("Verified"),
+                            Th("Brand Name"),
+                            Th("Product Type"),
+                            Th("Engine"),
+                            Th("Status"),
+                        )
+                    ),
+                    Tbody(*body),
+                )
+                if body
+                else P("No stored results."),
+                style="overflow-x: auto; max-width: 100%;",
+            ),
+            older,
+            A("← Verify a Label", href="/"),
+            style="gap: 1.5rem; align-items: flex-start;",
+        ),
+        style="padding: 2rem;",
+    )
+
+
+@rt("/history")
+async def get(brand: str = "", before: str = ""):
+    # Fetch one extra row to know whether an older page exists
+    entries = await asyncio.to_thread(
+        results_store.page,
+        brand_name=brand or None,
+        before=before or None,
+        limit=HISTORY_PAGE_SIZE + 1,
+    )
+    with timed_stage("render"):
+        return build_history_ui(
+            entries[:HISTORY_PAGE_SIZE],
+            brand=brand,
+            has_more=len(entries) > HISTORY_PAGE_SIZE,
+        )
+
+
+def build_upload_note(upload):
+    """One line on how large the label image was, before and after resizing"""
+    if not upload:
+        return ""
+    note = f"Uploaded {upload['transmitted_bytes'] / 1e6:.2f} MB"
+    if upload["resized"]:
+        note += f", shrunk in the browser from {upload['original_bytes'] / 1e6:.2f} MB"
+        if "original_width" in upload:
+            note += f" ({upload['original_width']}×{upload['original_height']})"
+    return P(note, style="font-size: 0.8rem; color: #999;")
+
+
+@rt("/history/{result_id}")
+async def get(result_id: str):
+    entry = await asyncio.to_thread(results_store.get, result_id)
+    if entry is None:
+        return Container(
+            build_error_ui("Result Not Found", "No stored result has this ID."),
+            style="padding: 2rem;",
+        )
+    with timed_stage("render"):
+        return Container(
+            Div(
+                build_results_ui(
+                    entry["results"],
+                    result_id=entry["id"],
+                    form_data=entry["form_data"],
+                ),
+                id="results",
+            ),
+            build_upload_note(entry["upload"]),
+            A("← Verification history", href="/history"),
+            style="padding: 2rem;",
+        )
+
+
+@rt("/verify/batch")
+async def post(label_images: UploadFile, manifest: UploadFile, concurrency: int = 0):
+    try:
+        manifest_bytes = await read_upload(manifest, MAX_UPLOAD_BYTES, name="manifest")
+        rows = parse_manifest(manifest.filename or "", manifest_bytes)
+        archive = await read_upload(label_images, MAX_BATCH_BYTES, name="ZIP archive")
+        # The extracted images are held for the whole batch
+        images = load_zip_images(
+            archive, max_bytes=min(MAX_ARCHIVE_BYTES, decode_budget.max_held)
+        )
+    except UploadTooLarge as e:
+        return build_batch_too_large_response(str(e))
+    except ValueError as e:
+        return build_error_ui("Batch Upload Error", str(e))
+    # Only the extracted images are needed from here on
+    del archive
+
+    held = sum(len(image) for image in images.values())
+    if not decode_budget.hold(held):
+        return build_busy_response()
+    try:
+        limit = (
+            min(concurrency, BATCH_CONCURRENCY)
+            if concurrency > 0
+            else BATCH_CONCURRENCY
+        )
+        verifier = AdmittedVerifier(
+            LabelVerifier(tesseract_ocr, MATCH_TOLERANCES),
+            decode_budget,
+            MAX_UPLOAD_PIXELS,
+        )
+        results = await verify_batch(verifier, rows, images, concurrency=limit)
+    finally:
+        decode_budget.unhold(held)
+    return build_batch_results_ui(results)
+
+
+def get_stats():
+    stats = {
+        "ocr_cache": ocr_cache.stats(),
+        "verify_flight": verify_flight.stats(),
+        "jobs": job_queue.stats(),
+        "cascade": cascade_verifier.stats(),
+        "gemini": get_gemini_client().stats(),
+        "results_store": results_store.stats(),
+        "decode_budget": decode_budget.stats(),
+        "ocr_backends": ocr_backends.stats(),
+        "startup": startup_report,
+    }
+    if llm_fallback is not None:
+        stats["llm_fallback"] = llm_fallback.stats()
+    if tesseract_pool is not None:
+        stats["tesseract_pool"] = tesseract_pool.stats()
+    tesseract = ocr_backends.loaded("tesseract")
+    if tesseract is not None:
+        # Flattened to step_count, step_total_ms and step_mean_ms for /metrics
+        stats["tesseract_steps"] = {
+            f"{step}_{name}": value
+            for step, values in tesseract.timings.summary().items()
+            for name, value in values.items()
+        }
+    if tesseract_ocr.near_duplicates is not None:
+        stats["tesseract_near_duplicates"] = tesseract_ocr.near_duplicates.stats()
+        stats["llm_near_duplicates"] = llm_ocr.near_duplicates.stats()
+    return stats
+
+
+@rt("/stats")
+def get():
+    return get_stats()
+
+
+component_stats = registry.gauge(
+    "ttb_component_stats",
+    "Cache, queue and pool counters, as reported on /stats",
+    labelnames=("component", "stat"),
+)
+
+
+@rt("/metrics")
+def get():
+    for component, values in get_stats().items():
+        for stat, value in values.items():
+            component_stats.set(value, component=component, stat=stat)
+    return Response(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+startup_report["import_s"] = time.perf_counter() - IMPORT_STARTED
+
+if __name__ == "__main__":
+    if WEB_CONCURRENCY > 1:
+        import uvicorn
+
+        # Each worker imports main:app afresh and inherits SHARED_CACHE_DB
+        os.environ.setdefault("SHARED_CACHE_DB", SHARED_CACHE_DB)
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=int(os.getenv("PORT", 5001)),
+            workers=WEB_CONCURRENCY,
+        )
+    else:
+        serve(port=int(os.getenv("PORT", 5001)))
@@ -0,0 +1,173 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = [*zip(labelnames, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for key, value in sorted(self._values.items()):
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        series = self._values.setdefault(
+            key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        )
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series["buckets"][index] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    def count(self, **labels):
+        series = self._values.get(self._key(labels))
+        return series["count"] if series else 0
+
+    def _render_value(self, key, series):
+        lines = []
+        for bound, count in zip(self.buckets, series["buckets"]):
+            labels = _format_labels(self.labelnames, key, [("le", bound)])
+            lines.append(f"{self.name}_bucket{labels} {count}")
+        labels = _format_labels(self.labelnames, key, [("le", "+Inf")])
+        lines.append(f"{self.name}_bucket{labels} {series['count']}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {series['sum']}")
+        lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def _register(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+stage_seconds = registry.histogram(
+    "ttb_stage_duration_seconds",
+    "Time spent in each stage of label verification",
+    labelnames=("stage", "engine"),
+)
+stage_errors = registry.counter(
+    "ttb_stage_errors_total",
+    "Exceptions raised per verification stage",
+    labelnames=("stage", "engine"),
+)
+verifications = registry.counter(
+    "ttb_verifications_total",
+    "Completed verifications by configured engine and the tier that answered",
+    labelnames=("engine", "tier", "outcome"),
+)
+
+upload_bytes = registry.counter(
+    "ttb_upload_bytes_total",
+    "Label image bytes as chosen by the user and as transmitted to /verify",
+    labelnames=("size", "resized"),
+)
+
+
+# Per-request breakdown: while set, timed_stage also adds each stage's time here
+current_timings = ContextVar("current_timings", default=None)
+
+
+@contextmanager
+def collect_timings(timings):
+    """Add the seconds spent in each timed_stage within the block to timings"""
+    token = current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        current_timings.reset(token)
+
+
+@contextmanager
+def timed_stage(stage, engine="", histogram=None, errors=None):
+    """Record how long the block takes, counting it as an error if it raises"""
+    histogram = histogram if histogram is not None else stage_seconds
+    errors = errors if errors is not None else stage_errors
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        errors.inc(stage=stage, engine=engine)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed, stage=stage, engine=engine)
+        timings = current_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
@@ -0,0 +1,99 @@
+import asyncio
+import io
+import logging
+import time
+from PIL import Image
+from ocr_service import OCRService
+
+logger = logging.getLogger(__name__)
+
+
+def blank_label(size=(200, 60)) -> bytes:
+    """Small white PNG, enough to make an engine load everything it needs"""
+    buffer = io.BytesIO()
+    Image.new("L", size, 255).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def warm_once(backend):
+    await backend.extract_text(blank_label())
+
+
+class BackendRegistry:
+    """OCR engines by name, each built by its factory on first use
+
+    Engines import their SDKs when first called, so a deployment only loads
+    the engines it uses. `prewarm` builds chosen engines at startup and runs
+    a dummy OCR through each, so the first real request does not pay for
+    SDK imports, worker process spawns or connection setup.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self._factories = {}
+        self._warmers = {}
+        self._backends = {}
+        self.load_seconds = {}
+        self.warm_seconds = {}
+        self.warm_failures = 0
+
+    def register(self, name, factory, warm=warm_once):
+        """Add an engine; warm(backend) is awaited when it is pre-warmed"""
+        self._factories[name] = factory
+        self._warmers[name] = warm
+
+    def get(self, name):
+        backend = self._backends.get(name)
+        if backend is None:
+            start = self.clock()
+            backend = self._factories[name]()
+            self.load_seconds[name] = self.clock() - start
+            self._backends[name] = backend
+        return backend
+
+    def loaded(self, name):
+        """The engine if it has already been built, without building it"""
+        return self._backends.get(name)
+
+    async def _warm(self, name):
+        start = self.clock()
+        try:
+            await self._warmers[name](self.get(name))
+        except Exception as e:
+            # A cold engine is only slower, so start serving anyway
+            self.warm_failures += 1
+            logger.warning("Pre-warming OCR backend %s failed: %s", name, e)
+        self.warm_seconds[name] = self.clock() - start
+
+    async def prewarm(self, names):
+        """Build and exercise the named engines concurrently"""
+        unknown = [name for name in names if name not in self._factories]
+        if unknown:
+            raise ValueError(f"Unknown OCR backends: {', '.join(unknown)}")
+        await asyncio.gather(*(self._warm(name) for name in names))
+
+    def stats(self) -> dict:
+        stats = {"loaded": len(self._backends), "warm_failures": self.warm_failures}
+        for name, seconds in self.load_seconds.items():
+            stats[f"{name}_load_s"] = seconds
+        for name, seconds in self.warm_seconds.items():
+            stats[f"{name}_warm_s"] = seconds
+        return stats
+
+
+class LazyOCR(OCRService):
+    """Stand-in for a registry engine that builds it on first use"""
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    @property
+    def engine(self) -> str:
+        return self.registry.get(self.name).engine
+
+    def cache_key(self) -> str:
+        return self.registry.get(self.name).cache_key()
+
+    async def extract_text(self, image_bytes: bytes) -> str:
+        return await self.registry.get(self.name).extract_text(image_bytes)
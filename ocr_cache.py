@@ -0,0 +1,308 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from ocr_service import OCRService
+
+
+# The upload being handled and its digest, so it is hashed once per request
+current_upload = ContextVar("current_upload", default=None)
+
+
+def image_hash(image_bytes: bytes) -> str:
+    """Content hash of the raw upload bytes"""
+    upload = current_upload.get()
+    if upload is not None and upload[0] is image_bytes:
+        return upload[1]
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+@contextmanager
+def known_image_hash(image_bytes, content_hash):
+    """Reuse content_hash for image_bytes within the block instead of rehashing"""
+    token = current_upload.set((image_bytes, content_hash))
+    try:
+        yield
+    finally:
+        current_upload.reset(token)
+
+
+def make_cache_key(content_hash: str, engine_key: str) -> str:
+    """Key an OCR result on the image's image_hash plus the engine and its config"""
+    digest = hashlib.sha256(engine_key.encode())
+    digest.update(b"\0")
+    digest.update(content_hash.encode())
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """In-memory LRU of OCR results with TTL expiry and an optional disk store
+
+    `shared` is a SharedCacheStore behind the LRU, so worker processes serving
+    the same app find each other's entries. The LRU is locked because the same
+    cache is used from the event loop and from sync routes in the threadpool.
+    """
+
+    # Expired rows are deleted from the shared store once every this many sets
+    PRUNE_EVERY = 256
+
+    def __init__(
+        self,
+        max_entries=256,
+        ttl_seconds=24 * 3600,
+        disk_dir=None,
+        clock=time.time,
+        shared=None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.clock = clock
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._sets = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.shared_hits = 0
+        self.shared_errors = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def _expired(self, stored_at):
+        return (
+            self.ttl_seconds is not None and self.clock() - stored_at > self.ttl_seconds
+        )
+
+    def _remember(self, key, stored_at, text):
+        with self._lock:
+            self._entries[key] = (stored_at, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _disk_path(self, key):
+        return self.disk_dir / f"{key}.json"
+
+    def _read_disk(self, key):
+        path = self._disk_path(key)
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+        if self._expired(entry["stored_at"]):
+            path.unlink(missing_ok=True)
+            return None
+        return entry["stored_at"], entry["text"]
+
+    def _write_disk(self, key, stored_at, text):
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps({"stored_at": stored_at, "text": text}))
+        os.replace(tmp_path, path)
+
+    def _read_shared(self, key):
+        try:
+            entry = self.shared.get(key)
+            if entry is not None and self._expired(entry[0]):
+                self.shared.delete(key)
+                return None
+        except sqlite3.OperationalError:
+            # Locked by another worker for longer than the busy timeout;
+            # running OCR again beats holding up the request
+            self.shared_errors += 1
+            return None
+        return entry
+
+    def _get_memory(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+        return None
+
+    def _read_stores(self, key):
+        """(stored_at, text, source) from the disk or shared store, or None"""
+        if self.disk_dir:
+            entry = self._read_disk(key)
+            if entry is not None:
+                return (*entry, "disk")
+        if self.shared is not None:
+            entry = self._read_shared(key)
+            if entry is not None:
+                return (*entry, "shared")
+        return None
+
+    def _found(self, key, found):
+        if found is None:
+            self.misses += 1
+            return None
+        stored_at, text, source = found
+        self._remember(key, stored_at, text)
+        self.hits += 1
+        if source == "disk":
+            self.disk_hits += 1
+        else:
+            self.shared_hits += 1
+        return text
+
+    @property
+    def _has_stores(self):
+        return self.disk_dir is not None or self.shared is not None
+
+    def get(self, key):
+        """Return cached text for key, or None on a miss"""
+        text = self._get_memory(key)
+        if text is not None:
+            return text
+        return self._found(key, self._read_stores(key) if self._has_stores else None)
+
+    async def aget(self, key):
+        """get() for the event loop; disk and shared reads run in a thread"""
+        text = self._get_memory(key)
+        if text is not None:
+            return text
+        found = None
+        if self._has_stores:
+            found = await asyncio.to_thread(self._read_stores, key)
+        return self._found(key, found)
+
+    def _write_stores(self, key, stored_at, text):
+        if self.disk_dir:
+            self._write_disk(key, stored_at, text)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, text, stored_at)
+                self._sets += 1
+                if self.ttl_seconds is not None and self._sets % self.PRUNE_EVERY == 0:
+                    self.shared.prune(stored_at - self.ttl_seconds)
+            except sqlite3.OperationalError:
+                # Other workers miss this entry and run their own OCR
+                self.shared_errors += 1
+
+    def set(self, key, text):
+        stored_at = self.clock()
+        self._remember(key, stored_at, text)
+        if self._has_stores:
+            self._write_stores(key, stored_at, text)
+
+    async def aset(self, key, text):
+        """set() for the event loop; disk and shared writes run in a thread"""
+        stored_at = self.clock()
+        self._remember(key, stored_at, text)
+        if self._has_stores:
+            await asyncio.to_thread(self._write_stores, key, stored_at, text)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "shared_hits": self.shared_hits,
+            "shared_errors": self.shared_errors,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SingleFlight:
+    """Let concurrent callers with the same key await one shared call"""
+
+    def __init__(self):
+        self._calls = {}
+        self.started = 0
+        self.shared = 0
+
+    async def do(self, key, fn):
+        """Await fn() unless a call for key is already running, then await that"""
+        task = self._calls.get(key)
+        if task is not None:
+            self.shared += 1
+        else:
+            self.started += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Shield so one caller disconnecting does not cancel the others' work
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "shared": self.shared,
+            "in_flight": len(self._calls),
+        }
+
+
+class CachedOCR(OCRService):
+    """Serve repeated images from an OCRCache instead of re-running OCR
+
+    With a NearDuplicateIndex, an exact miss falls back to the text of a
+    perceptually near-identical image (re-exported, resized, PNG vs JPEG).
+    """
+
+    def __init__(self, ocr_service, cache=None, flight=None, near_duplicates=None):
+        self.ocr_service = ocr_service
+        self.cache = cache if cache is not None else OCRCache()
+        self.flight = flight if flight is not None else SingleFlight()
+        self.near_duplicates = near_duplicates
+
+    @property
+    def engine(self) -> str:
+        return self.ocr_service.engine
+
+    def cache_key(self) -> str:
+        return self.ocr_service.cache_key()
+
+    async def extract_text(self, image_bytes: bytes) -> str:
+        key = make_cache_key(image_hash(image_bytes), self.cache_key())
+        text = await self.cache.aget(key)
+        if text is not None:
+            return text
+
+        phash = None
+        if self.near_duplicates is not None:
+            phash = await asyncio.to_thread(self.near_duplicates.hash, image_bytes)
+            text = await self._near_duplicate_text(phash)
+            if text is not None:
+                await self.cache.aset(key, text)
+                return text
+
+        async def extract_and_store():
+            text = await self.ocr_service.extract_text(image_bytes)
+            # No text is more likely a failed read than a blank label, so
+            # the next request for this image tries again
+            if text.strip():
+                await self.cache.aset(key, text)
+                if self.near_duplicates is not None:
+                    self.near_duplicates.add(phash, key)
+            return text
+
+        return await self.flight.do(key, extract_and_store)
+
+    async def _near_duplicate_text(self, phash):
+        for near_key in self.near_duplicates.find(phash):
+            text = await self.cache.aget(near_key)
+            if text is not None:
+                self.near_duplicates.record(hit=True)
+                return text
+        self.near_duplicates.record(hit=False)
+        return None
@@ -1,41 +1,103 @@
 import asyncio
 import io
-import pytesseract
+import time
 from abc import ABC, abstractmethod
 from PIL import Image
-from google import genai
+from llm_client import get_gemini_client
+from image_preprocessing import StepTimings, preprocess as preprocess_image
+from upload_optimizer import UploadBudget, optimize_upload
 
 
 class OCRService(ABC):
+    # Short engine name used as the metrics label, e.g. "tesseract"
+    engine = ""
+
     @abstractmethod
     async def extract_text(self, image_bytes: bytes) -> str:
         """Extract raw text from image"""
         pass
 
+    def cache_key(self) -> str:
+        """Identify the engine and any config that changes its output"""
+        return type(self).__name__
+
+
+def load_image(image_bytes: bytes, preprocess=None):
+    """Decode an image, optionally running the preprocessing pipeline"""
+    if preprocess is None:
+        return Image.open(io.BytesIO(image_bytes)), {}
+    return preprocess_image(image_bytes, preprocess)
+
+
+def run_tesseract(image_bytes: bytes, lang="eng", config="", preprocess=None):
+    """Run Tesseract synchronously, returning the text and per-step timings"""
+    import pytesseract
+
+    image, timings = load_image(image_bytes, preprocess)
+    start = time.perf_counter()
+    text = pytesseract.image_to_string(image, lang=lang, config=config)
+    timings["ocr"] = time.perf_counter() - start
+    return text, timings
+
 
 class TesseractOCR(OCRService):
-    async def extract_text(self, image_bytes: bytes) -> str:
+    engine = "tesseract"
 
-        image = Image.open(io.BytesIO(image_bytes))
-        text = await asyncio.to_thread(pytesseract.image_to_string, image)
+    def __init__(self, lang="eng", config="", pool=None, preprocess=None):
+        self.lang = pool.lang if pool is not None else lang
+        self.config = config
+        self.pool = pool
+        self.preprocess = preprocess
+        self.timings = StepTimings()
+
+    def cache_key(self) -> str:
+        return f"{type(self).__name__}:lang={self.lang}:config={self.config}:preprocess={self.preprocess}"
+
+    async def extract_text(self, image_bytes: bytes) -> str:
+        if self.pool is not None:
+            text, timings = await self.pool.extract_text(
+                image_bytes, config=self.config, preprocess=self.preprocess
+            )
+        else:
+            text, timings = await asyncio.to_thread(
+                run_tesseract,
+                image_bytes,
+                lang=self.lang,
+                config=self.config,
+                preprocess=self.preprocess,
+            )
+        self.timings.record(timings)
         return text
 
 
 class LlmOCR(OCRService):
-    def __init__(self, api_key=None):
-        self.client = genai.Client()
+    PROMPT = "Extract all text from this alcohol beverage label image. Include brand name, product type, alcohol content, volume, warnings, and any other text visible on the label. Return just the text you see."
+    engine = "gemini"
 
-    async def extract_text(self, image_bytes: bytes) -> str:
+    def __init__(self, client=None, model=None, upload_budget=UploadBudget()):
+        self.client = client or get_gemini_client()
+        self.model = model or self.client.model
+        self.upload_budget = upload_budget
 
-        # Convert bytes to PIL Image
-        image = Image.open(io.BytesIO(image_bytes))
+    def cache_key(self) -> str:
+        return (
+            f"{type(self).__name__}:model={self.model}:prompt={self.PROMPT}"
+            f":upload={self.upload_budget}"
+        )
 
-        prompt = "Extract all text from this alcohol beverage label image. Include brand name, product type, alcohol content, volume, warnings, and any other text visible on the label. Return just the text you see."
+    async def extract_text(self, image_bytes: bytes) -> str:
+        from google.genai import types
 
-        def generate():
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash", contents=[prompt, image]
-            )
-            return response.text or ""
+        # Send the real format, downscaled and re-encoded to the upload budget
+        data, mime_type = await asyncio.to_thread(
+            optimize_upload, image_bytes, self.upload_budget
+        )
+        image = types.Part.from_bytes(data=data, mime_type=mime_type)
 
-        return await asyncio.to_thread(generate)
+        response = await self.client.generate_content(
+            [self.PROMPT, image], model=self.model
+        )
+        if not response.text:
+            # Empty or blocked; raising keeps it out of the OCR cache
+            raise ValueError("Gemini returned an empty reply")
+        return response.text
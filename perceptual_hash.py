@@ -0,0 +1,97 @@
+import io
+from collections import OrderedDict
+from PIL import Image, UnidentifiedImageError
+from utils.bk_tree import BKTree
+
+DEFAULT_HASH_SIZE = 16
+
+
+def dhash(image_bytes: bytes, hash_size=DEFAULT_HASH_SIZE) -> int | None:
+    """Difference hash of an image, or None if it cannot be decoded
+
+    The image is shrunk to (hash_size + 1) x hash_size grayscale and each bit
+    records whether a pixel is brighter than its right neighbour, so
+    re-encoding, resizing and format changes leave most bits unchanged.
+    """
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        # Let libjpeg decode at a reduced scale; only a tiny thumbnail is needed
+        image.draft("L", (hash_size * 8, hash_size * 8))
+        image = image.convert("L").resize(
+            (hash_size + 1, hash_size), Image.Resampling.BOX
+        )
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None
+
+    pixels = image.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            left, right = pixels[offset + col], pixels[offset + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+class NearDuplicateIndex:
+    """Map perceptual hashes to cache keys and find near-identical images"""
+
+    def __init__(self, max_distance=10, max_entries=10000, hash_size=DEFAULT_HASH_SIZE):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.hash_size = hash_size
+        self._entries = OrderedDict()
+        self._tree = BKTree()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def hash(self, image_bytes):
+        return dhash(image_bytes, self.hash_size)
+
+    def _rebuild(self):
+        # BK-trees cannot delete nodes; rebuild once evicted nodes pile up
+        self._tree = BKTree()
+        for phash in self._entries:
+            self._tree.add(phash, phash)
+
+    def add(self, phash, cache_key):
+        if phash is None:
+            return
+        if phash not in self._entries:
+            self._tree.add(phash, phash)
+        self._entries[phash] = cache_key
+        self._entries.move_to_end(phash)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        if len(self._tree) > 2 * self.max_entries:
+            self._rebuild()
+
+    def find(self, phash):
+        """Return cache keys of stored images within max_distance, nearest first"""
+        if phash is None:
+            return []
+        keys = [
+            self._entries[match]
+            for _, match in self._tree.search(phash, self.max_distance)
+            if match in self._entries
+        ]
+        return keys
+
+    def record(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "max_distance": self.max_distance,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,188 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    image_hash TEXT NOT NULL,
+    cache_key TEXT NOT NULL,
+    brand_name TEXT NOT NULL,
+    form_data TEXT NOT NULL,
+    extracted_text TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    checks TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    tier TEXT,
+    timings TEXT NOT NULL,
+    upload TEXT,
+    fallback INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS results_image_hash ON results (image_hash, created_at);
+CREATE INDEX IF NOT EXISTS results_brand_name
+    ON results (brand_name COLLATE NOCASE, created_at);
+CREATE INDEX IF NOT EXISTS results_created_at ON results (created_at);
+"""
+# Columns added after the first release, created on older databases at open
+ADDED_COLUMNS = {
+    "upload": "TEXT",
+    "fallback": "INTEGER NOT NULL DEFAULT 0",
+}
+
+
+class ResultsStore:
+    """SQLite history of verification results, in WAL mode
+
+    WAL lets readers (history pages, other processes) run while a result is
+    being written. The database is opened on first use, so importing the app
+    does not create it.
+    """
+
+    def __init__(self, path, clock=time.time):
+        self.path = Path(path)
+        self.clock = clock
+        self._conn = None
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.reuses = 0
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL stays consistent across crashes without an fsync per commit
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            columns = {
+                row["name"] for row in conn.execute("PRAGMA table_info(results)")
+            }
+            for name, definition in ADDED_COLUMNS.items():
+                if name not in columns:
+                    conn.execute(f"ALTER TABLE results ADD COLUMN {name} {definition}")
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return conn.execute(sql, params).fetchall()
+
+    def record(
+        self,
+        result_id,
+        image_hash,
+        cache_key,
+        form_data,
+        results,
+        engine,
+        timings,
+        upload=None,
+    ):
+        """Store one verification result; run off the event loop
+
+        upload holds the original and transmitted sizes of the label image.
+        """
+        self._execute(
+            "INSERT OR REPLACE INTO results "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                result_id,
+                self.clock(),
+                image_hash,
+                cache_key,
+                form_data["brand_name"],
+                json.dumps(form_data),
+                results.get("extracted_text", ""),
+                int(bool(results.get("success"))),
+                json.dumps(results.get("checks", [])),
+                engine,
+                results.get("tier"),
+                json.dumps(timings),
+                json.dumps(upload) if upload else None,
+                int(bool(results.get("fallback"))),
+            ),
+        )
+        self.writes += 1
+
+    def _entry(self, row):
+        results = {
+            "success": bool(row["success"]),
+            "checks": json.loads(row["checks"]),
+            "extracted_text": row["extracted_text"],
+        }
+        if row["tier"]:
+            results["tier"] = row["tier"]
+        if row["fallback"]:
+            results["fallback"] = True
+        return {
+            "id": row["id"],
+            "created_at": row["created_at"],
+            "image_hash": row["image_hash"],
+            "form_data": json.loads(row["form_data"]),
+            "results": results,
+            "engine": row["engine"],
+            "timings": json.loads(row["timings"]),
+            "upload": json.loads(row["upload"]) if row["upload"] else None,
+        }
+
+    def get(self, result_id):
+        rows = self._execute("SELECT * FROM results WHERE id = ?", (result_id,))
+        return self._entry(rows[0]) if rows else None
+
+    def find(self, image_hash, cache_key, max_age=None):
+        """Most recent stored result for the same image, form and engine
+
+        Degraded results are never reused: local fallbacks while Gemini was
+        unavailable, and answers from a tier other than the configured engine
+        (the cascade engine answers from either tier by design).
+        """
+        sql = (
+            "SELECT * FROM results WHERE image_hash = ? AND cache_key = ?"
+            " AND fallback = 0"
+            " AND (tier IS NULL OR tier = engine OR engine = 'cascade')"
+        )
+        params = [image_hash, cache_key]
+        if max_age is not None:
+            sql += " AND created_at >= ?"
+            params.append(self.clock() - max_age)
+        rows = self._execute(sql + " ORDER BY created_at DESC LIMIT 1", params)
+        if not rows:
+            return None
+        self.reuses += 1
+        return self._entry(rows[0])
+
+    def page(self, brand_name=None, image_hash=None, before=None, limit=20):
+        """Newest-first results, continuing after the result id `before`"""
+        sql = "SELECT * FROM results WHERE 1 = 1"
+        params = []
+        if brand_name:
+            sql += " AND brand_name = ? COLLATE NOCASE"
+            params.append(brand_name)
+        if image_hash:
+            sql += " AND image_hash = ?"
+            params.append(image_hash)
+        if before:
+            # Keyset pagination stays fast however deep the history goes
+            sql += (
+                " AND (created_at, id) < "
+                "(SELECT created_at, id FROM results WHERE id = ?)"
+            )
+            params.append(before)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(limit)
+        return [self._entry(row) for row in self._execute(sql, params)]
+
+    def stats(self) -> dict:
+        return {"writes": self.writes, "reuses": self.reuses}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,198 @@
+import re
+from functools import lru_cache
+from utils.aho_corasick import AhoCorasick
+from utils.fuzzy_match import allowed_edits, approximate_find
+
+FORM_CONTENTS_PATTERN = re.compile(r"(\d+\.?\d*)\s*([a-zA-Z.]+)")
+
+# Normalize common unit variations, then match any way the label may print them
+UNIT_ALIASES = {"ml": "ml", "oz": "oz", "floz": "oz", "l": "l"}
+UNIT_PATTERNS = {
+    "ml": r"(?:mL|ml|ML)",
+    "oz": r"(?:oz|OZ|fl\.?\s*oz)",
+    "l": r"(?:L|l)",
+}
+WARNING_WORDS = ("government", "warning")
+
+
+def normalize_text(text):
+    """Lowercase and drop spaces so OCR spacing errors do not matter"""
+    return text.lower().replace(" ", "")
+
+
+def format_alcohol(alcohol_value):
+    """Render 45.0 as "45" so it matches how labels print whole numbers"""
+    if alcohol_value == int(alcohol_value):
+        return str(int(alcohol_value))
+    return str(alcohol_value)
+
+
+@lru_cache(maxsize=1024)
+def compile_alcohol_pattern(alcohol_str):
+    return re.compile(
+        rf"{alcohol_str}\s*%|\b{alcohol_str}\s*(?:alc|abv|alcohol)|\b{alcohol_str}\s*(?:proof)",
+        re.IGNORECASE,
+    )
+
+
+@lru_cache(maxsize=1024)
+def compile_contents_pattern(net_contents):
+    """Compile the label pattern for a form value like "750 mL", or None"""
+    form_match = FORM_CONTENTS_PATTERN.search(net_contents)
+    if not form_match:
+        return None
+
+    volume_number = form_match.group(1)
+    volume_unit = form_match.group(2).lower().replace(".", "")
+    normalized_unit = UNIT_ALIASES.get(volume_unit, volume_unit)
+    unit_pattern = UNIT_PATTERNS.get(normalized_unit, re.escape(volume_unit))
+
+    return re.compile(rf"\b{volume_number}\s{{0,3}}{unit_pattern}\b", re.IGNORECASE)
+
+
+class CompiledRules:
+    """Verification rules for one form record, compiled once and reused"""
+
+    def __init__(self, form_data):
+        self.brand_name = form_data["brand_name"]
+        self.brand = normalize_text(self.brand_name)
+        self.product_type = form_data["product_type"]
+        self.product = normalize_text(self.product_type)
+        self.alcohol_str = format_alcohol(form_data["alcohol_content"])
+        self.alcohol_pattern = compile_alcohol_pattern(self.alcohol_str)
+        self.net_contents = form_data.get("net_contents")
+        self.contents_pattern = (
+            compile_contents_pattern(self.net_contents) if self.net_contents else None
+        )
+
+    @property
+    def needles(self):
+        return (self.brand, self.product, *WARNING_WORDS)
+
+    def check(
+        self,
+        extracted_text,
+        tolerances=None,
+        on_check=None,
+        normalized=None,
+        exact_hits=None,
+        search=None,
+    ) -> dict:
+        """Run every check against extracted text
+
+        normalized, exact_hits and search let RuleIndex share one automaton
+        pass and one regex evaluation per distinct pattern across records.
+        """
+        tolerances = tolerances or {}
+        if normalized is None:
+            normalized = normalize_text(extracted_text)
+
+        def matches(pattern):
+            if search is not None:
+                return search(pattern)
+            return bool(pattern.search(extracted_text))
+
+        def contains(field, needle):
+            if exact_hits is not None:
+                if not needle or needle in exact_hits:
+                    return True
+            elif needle in normalized:
+                return True
+            tolerance = allowed_edits(needle, tolerances.get(field, 0))
+            if tolerance <= 0:
+                return False
+            return approximate_find(needle, normalized, tolerance) is not None
+
+        results = {"success": True, "checks": [], "extracted_text": extracted_text}
+
+        def add_check(field_name, expected_value, found):
+            check = {"field": field_name, "expected": expected_value, "found": found}
+            results["checks"].append(check)
+            if not found:
+                results["success"] = False
+            if on_check is not None:
+                on_check(check)
+
+        add_check("Brand Name", self.brand_name, contains("brand_name", self.brand))
+        add_check(
+            "Product Type", self.product_type, contains("product_type", self.product)
+        )
+        add_check(
+            "Alcohol Content", f"{self.alcohol_str}%", matches(self.alcohol_pattern)
+        )
+        if self.net_contents:
+            contents_found = self.contents_pattern is not None and matches(
+                self.contents_pattern
+            )
+            add_check("Net Contents", self.net_contents, contents_found)
+
+        warning_found = all(
+            contains("government_warning", word) for word in WARNING_WORDS
+        )
+        add_check("Government Warning", "Present", warning_found)
+        return results
+
+    def check_many(self, texts, tolerances=None):
+        """Check this record against many extracted texts"""
+        return [self.check(text, tolerances) for text in texts]
+
+
+@lru_cache(maxsize=1024)
+def _compile_cached(brand_name, product_type, alcohol_content, net_contents):
+    return CompiledRules(
+        {
+            "brand_name": brand_name,
+            "product_type": product_type,
+            "alcohol_content": alcohol_content,
+            "net_contents": net_contents,
+        }
+    )
+
+
+def compile_rules(form_data) -> CompiledRules:
+    """Return the compiled rules for a form record, reusing earlier compiles"""
+    return _compile_cached(
+        form_data["brand_name"],
+        form_data["product_type"],
+        form_data["alcohol_content"],
+        form_data.get("net_contents"),
+    )
+
+
+class RuleIndex:
+    """Check many form records against a text with one automaton pass"""
+
+    def __init__(self, records, tolerances=None):
+        self.rules = [compile_rules(record) for record in records]
+        self.tolerances = tolerances or {}
+        self.automaton = AhoCorasick(
+            {needle for rules in self.rules for needle in rules.needles}
+        )
+
+    def check(self, extracted_text) -> list:
+        """Return one results dict per record, in record order"""
+        normalized = normalize_text(extracted_text)
+        exact_hits = self.automaton.find_all(normalized)
+        regex_results = {}
+
+        def search(pattern):
+            # Records often share an ABV or volume; evaluate each pattern once
+            if pattern not in regex_results:
+                regex_results[pattern] = bool(pattern.search(extracted_text))
+            return regex_results[pattern]
+
+        return [
+            rules.check(
+                extracted_text,
+                self.tolerances,
+                normalized=normalized,
+                exact_hits=exact_hits,
+                search=search,
+            )
+            for rules in self.rules
+        ]
+
+    def check_many(self, texts):
+        """Yield the per-record results for each text in turn"""
+        for text in texts:
+            yield self.check(text)
@@ -0,0 +1,81 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class SharedCacheStore:
+    """Key/value table in a SQLite file shared by every worker process
+
+    With several web workers each one keeps its own in-memory LRU; this store
+    sits behind them so an entry written by one worker is found by the others.
+    Several stores (one table each) can share a database file. WAL mode lets
+    readers carry on while another process writes, and the database is opened
+    on first use so importing the app does not create it.
+
+    `timeout` is how long a call waits on another process's write lock before
+    raising sqlite3.OperationalError; callers treat that as a miss.
+    """
+
+    def __init__(self, path, table="entries", clock=time.time, timeout=2.0):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table!r}")
+        self.path = Path(path)
+        self.table = table
+        self.clock = clock
+        self.timeout = timeout
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, check_same_thread=False, timeout=self.timeout
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                    "key TEXT PRIMARY KEY, stored_at REAL NOT NULL, value TEXT NOT NULL)"
+                )
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self.table}_stored_at "
+                    f"ON {self.table} (stored_at)"
+                )
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return conn.execute(sql, params).fetchall()
+
+    def get(self, key):
+        """Return (stored_at, value) for key, or None"""
+        rows = self._execute(
+            f"SELECT stored_at, value FROM {self.table} WHERE key = ?", (key,)
+        )
+        return rows[0] if rows else None
+
+    def set(self, key, value, stored_at=None):
+        stored_at = self.clock() if stored_at is None else stored_at
+        self._execute(
+            f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?)",
+            (key, stored_at, value),
+        )
+
+    def delete(self, key):
+        self._execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def prune(self, before):
+        """Delete entries stored before the given time"""
+        self._execute(f"DELETE FROM {self.table} WHERE stored_at < ?", (before,))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
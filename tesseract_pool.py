@@ -0,0 +1,147 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from ocr_service import load_image, run_tesseract
+
+# Per-worker engine, kept loaded for the life of the worker process
+_engine = None
+
+
+def _init_worker(lang):
+    """Load the Tesseract engine and language data once per worker"""
+    global _engine
+    try:
+        import tesserocr
+    except ImportError:
+        # Without tesserocr each call falls back to the pytesseract CLI
+        return
+    _engine = tesserocr.PyTessBaseAPI(lang=lang)
+
+
+def _extract(image_bytes, lang, config, preprocess):
+    if _engine is None or config:
+        return run_tesseract(
+            image_bytes, lang=lang, config=config, preprocess=preprocess
+        )
+    image, timings = load_image(image_bytes, preprocess)
+    start = time.perf_counter()
+    _engine.SetImage(image)
+    text = _engine.GetUTF8Text()
+    timings["ocr"] = time.perf_counter() - start
+    return text, timings
+
+
+def _ping():
+    return os.getpid()
+
+
+class PoolSaturated(Exception):
+    """Raised when the pool's request queue is full"""
+
+
+class TesseractPool:
+    """Long-lived OCR worker processes with a bounded request queue"""
+
+    def __init__(self, size=None, max_queue=64, lang="eng"):
+        self.size = size or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.lang = lang
+        self._executor = None
+        self._slots = asyncio.Semaphore(self.size)
+        self.pending = 0
+        self.completed = 0
+        self.restarts = 0
+        self.health_checks = 0
+        self.health_failures = 0
+        self._health_task = None
+
+    def _ensure_started(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size,
+                # Forking a threaded server process can deadlock the child
+                mp_context=multiprocessing.get_context("forkserver"),
+                initializer=_init_worker,
+                initargs=(self.lang,),
+            )
+        return self._executor
+
+    def _restart(self, broken):
+        # Several callers can see the same crash; only replace the pool once
+        if self._executor is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.restarts += 1
+        return self._ensure_started()
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on a worker, restarting the pool once if it crashed"""
+        if self.pending >= self.size + self.max_queue:
+            raise PoolSaturated(f"OCR queue is full ({self.max_queue} waiting)")
+
+        self.pending += 1
+        try:
+            async with self._slots:
+                loop = asyncio.get_running_loop()
+                executor = self._ensure_started()
+                try:
+                    result = await loop.run_in_executor(executor, fn, *args)
+                except BrokenProcessPool:
+                    executor = self._restart(executor)
+                    result = await loop.run_in_executor(executor, fn, *args)
+                self.completed += 1
+                return result
+        finally:
+            self.pending -= 1
+
+    async def extract_text(self, image_bytes: bytes, config="", preprocess=None):
+        """Return the OCR text and per-step timings from a worker"""
+        return await self.run(_extract, image_bytes, self.lang, config, preprocess)
+
+    async def health_check(self, timeout=10) -> bool:
+        """Check that a worker answers, restarting the pool if it does not"""
+        self.health_checks += 1
+        try:
+            await asyncio.wait_for(self.run(_ping), timeout)
+            return True
+        except (asyncio.TimeoutError, BrokenProcessPool):
+            self.health_failures += 1
+            if self._executor is not None:
+                self._restart(self._executor)
+            return False
+
+    async def _check_periodically(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            # A ping queued behind real work could time out on a healthy
+            # pool, and calls that complete already show it is alive
+            if self._executor is not None and self.pending == 0:
+                await self.health_check()
+
+    def start_health_checks(self, interval):
+        """Ping an idle pool every `interval` seconds until shutdown"""
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._check_periodically(interval))
+
+    def stats(self) -> dict:
+        running = min(self.pending, self.size)
+        return {
+            "size": self.size,
+            "running": running,
+            "queued": self.pending - running,
+            "completed": self.completed,
+            "restarts": self.restarts,
+            "health_checks": self.health_checks,
+            "health_failures": self.health_failures,
+        }
+
+    def shutdown(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,245 @@
+import asyncio
+import io
+import zipfile
+import pytest
+from PIL import Image
+from starlette.testclient import TestClient
+import main
+from admission import (
+    MemoryBudget,
+    UploadTooLarge,
+    decode_footprint,
+    image_footprint,
+    read_upload,
+)
+
+FORM = {
+    "brand_name": "Hammer Whiskey",
+    "product_type": "Bourbon",
+    "alcohol_content": "45",
+    "net_contents_value": "750",
+    "net_contents_unit": "mL",
+}
+
+
+class MockUploadFile:
+    """Mock UploadFile that hands out its bytes in chunks"""
+
+    def __init__(self, content, size=None):
+        self.buffer = io.BytesIO(content)
+        self.size = size
+        self.reads = 0
+
+    async def read(self, size=-1):
+        self.reads += 1
+        return self.buffer.read(size)
+
+
+def png_bytes(size, mode="RGB"):
+    buffer = io.BytesIO()
+    Image.new(mode, size, "white" if mode == "RGB" else 255).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_read_upload_stops_at_limit():
+    """Test reading gives up once the limit is passed, without reading the rest"""
+    upload = MockUploadFile(b"x" * 1000)
+    with pytest.raises(UploadTooLarge):
+        await read_upload(upload, max_bytes=250, chunk_size=100)
+    assert upload.reads == 3
+
+    assert await read_upload(MockUploadFile(b"x" * 250), 250, chunk_size=100) == (
+        b"x" * 250
+    )
+
+
+@pytest.mark.asyncio
+async def test_read_upload_trusts_known_size():
+    """Test an upload with a known size over the limit is refused unread"""
+    upload = MockUploadFile(b"x" * 10, size=10_000)
+    with pytest.raises(UploadTooLarge):
+        await read_upload(upload, max_bytes=1000)
+    assert upload.reads == 0
+
+
+def test_image_footprint_uses_header_only():
+    """Test the pixel limit and footprint come from the image header"""
+    image = png_bytes((400, 300))
+    assert image_footprint(image, max_pixels=120_000) == decode_footprint(400, 300, 3)
+    with pytest.raises(UploadTooLarge, match="megapixels"):
+        image_footprint(image, max_pixels=100_000)
+    assert image_footprint(b"not an image", max_pixels=100_000) is None
+
+
+def test_grayscale_footprint_counts_rgb_conversion():
+    """Test single-band images are budgeted as if converted to RGB"""
+    assert decode_footprint(100, 100, 1) == decode_footprint(100, 100, 3)
+
+
+@pytest.mark.asyncio
+async def test_budget_queues_until_memory_is_released():
+    """Test a decode that does not fit waits for earlier ones to finish"""
+    budget = MemoryBudget(100, upload_share=0)
+    await budget.acquire(60)
+    waiting = asyncio.ensure_future(budget.acquire(60))
+    await asyncio.sleep(0)
+    assert not waiting.done()
+    assert budget.stats()["waiting"] == 1
+
+    budget.release(60)
+    await waiting
+    assert budget.stats()["in_use"] == 60
+    assert budget.stats()["waited"] == 1
+
+
+@pytest.mark.asyncio
+async def test_budget_admits_in_arrival_order():
+    """Test a small request does not jump ahead of a waiting large one"""
+    budget = MemoryBudget(100, upload_share=0)
+    await budget.acquire(50)
+    large = asyncio.ensure_future(budget.acquire(80))
+    await asyncio.sleep(0)
+    small = asyncio.ensure_future(budget.acquire(10))
+    await asyncio.sleep(0)
+    assert not small.done()
+
+    budget.release(50)
+    await large
+    await asyncio.sleep(0)
+    assert small.done()
+    assert budget.in_use == 90
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_lets_next_one_in():
+    """Test cancelling a waiting decode frees its place in line"""
+    budget = MemoryBudget(100, upload_share=0)
+    await budget.acquire(50)
+    large = asyncio.ensure_future(budget.acquire(80))
+    await asyncio.sleep(0)
+    small = asyncio.ensure_future(budget.acquire(40))
+    await asyncio.sleep(0)
+
+    large.cancel()
+    await asyncio.sleep(0)
+    await small
+    assert budget.in_use == 90
+    assert budget.stats()["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_budget_rejects_footprint_that_can_never_fit():
+    """Test a decode larger than the whole budget is refused"""
+    budget = MemoryBudget(100, upload_share=0)
+    assert not budget.fits(101)
+    with pytest.raises(UploadTooLarge):
+        await budget.acquire(101)
+
+
+def test_queued_uploads_share_is_refused_not_waited_for():
+    """Test held uploads have their own share and are refused once it is full"""
+    budget = MemoryBudget(100, upload_share=0.25)
+    assert budget.hold(20)
+    assert not budget.hold(10)
+    assert budget.stats()["refused"] == 1
+    assert not budget.fits(76)
+
+    budget.unhold(20)
+    assert budget.hold(25)
+    assert budget.stats()["held"] == 25
+
+
+def post_label(client, content):
+    return client.post(
+        "/verify",
+        data=FORM,
+        files={"label_image": ("label.png", content, "image/png")},
+    )
+
+
+def test_verify_rejects_too_many_pixels(monkeypatch):
+    """Test /verify answers 413 from the header of an oversized image"""
+    monkeypatch.setattr(main, "MAX_UPLOAD_PIXELS", 10_000)
+    response = post_label(TestClient(main.app), png_bytes((200, 200)))
+    assert response.status_code == 413
+    assert "Image Too Large" in response.text
+
+
+def test_verify_rejects_too_many_bytes(monkeypatch):
+    """Test /verify answers 413 when the upload is over the byte limit"""
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 100)
+    response = post_label(TestClient(main.app), png_bytes((200, 200)))
+    assert response.status_code == 413
+    assert "Image Too Large" in response.text
+
+
+def test_verify_rejects_oversized_body_before_parsing(monkeypatch):
+    """Test the Content-Length check refuses a large body before the form is read"""
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 100)
+
+    def fail(*args):
+        raise AssertionError("upload was read")
+
+    monkeypatch.setattr(main, "read_upload", fail)
+    response = post_label(TestClient(main.app), b"x" * 100_000)
+    assert response.status_code == 413
+    assert "The upload is larger than" in response.text
+
+
+def test_verify_rejects_unreadable_image():
+    """Test a file that is not an image is refused before it is queued"""
+    response = post_label(TestClient(main.app), b"not an image")
+    assert "could not be read as an image" in response.text
+    assert "/jobs/" not in response.text
+
+
+def test_verify_is_busy_when_queued_uploads_fill_their_share(monkeypatch):
+    """Test an upload that would push queued uploads over their share gets 503"""
+    budget = MemoryBudget(10_000_000)
+    budget.hold(budget.max_held)
+    monkeypatch.setattr(main, "decode_budget", budget)
+    response = post_label(TestClient(main.app), png_bytes((200, 200)))
+    assert response.status_code == 503
+    assert "Server Busy" in response.text
+
+
+def post_batch(client, archive):
+    manifest = (
+        "image,brand_name,product_type,alcohol_content,net_contents\n"
+        "label.png,Hammer Whiskey,Bourbon,45,750 mL\n"
+    )
+    return client.post(
+        "/verify/batch",
+        files={
+            "label_images": ("labels.zip", archive, "application/zip"),
+            "manifest": ("manifest.csv", manifest, "text/csv"),
+        },
+    )
+
+
+def test_batch_rejects_oversized_body_before_parsing(monkeypatch):
+    """Test /verify/batch refuses a body over its limit by Content-Length"""
+    monkeypatch.setattr(main, "MAX_BATCH_BYTES", 100)
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 100)
+    response = post_batch(TestClient(main.app), b"x" * 200_000)
+    assert response.status_code == 413
+    assert "Batch Too Large" in response.text
+
+
+def test_batch_applies_pixel_limit_per_image(monkeypatch):
+    """Test an oversized image in a batch fails its row and frees the budget"""
+    monkeypatch.setattr(main, "MAX_UPLOAD_PIXELS", 10_000)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("label.png", png_bytes((200, 200)))
+    held = main.decode_budget.held
+
+    response = post_batch(TestClient(main.app), buffer.getvalue())
+    assert "megapixels" in response.text
+    assert main.decode_budget.held == held
+
+
+def test_htmx_swaps_413_responses():
+    """Test the htmx config shows the 413 error card instead of dropping it"""
+    assert '"code": "413", "swap": true' in main.htmx_config.content
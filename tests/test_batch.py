@@ -0,0 +1,149 @@
+import asyncio
+import io
+import json
+import zipfile
+import pytest
+from ocr_service import OCRService
+from verifier import LabelVerifier
+from utils.batch import (
+    MANIFEST_FIELDS,
+    load_zip_images,
+    parse_manifest,
+    verify_batch,
+)
+
+LABEL_TEXT = """
+HAMMER WHISKEY
+Kentucky Straight Bourbon Whiskey
+45% Alc./Vol.
+750 mL
+GOVERNMENT WARNING
+"""
+
+
+class TrackingOCR(OCRService):
+    """Mock OCR that tracks how many calls run at once"""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+
+    async def extract_text(self, image_bytes: bytes) -> str:
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return image_bytes.decode()
+
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def make_row(row, image, brand_name="Hammer Whiskey"):
+    return {
+        "row": row,
+        "image": image,
+        "brand_name": brand_name,
+        "product_type": "Kentucky Straight Bourbon Whiskey",
+        "alcohol_content": 45.0,
+        "net_contents": "750 mL",
+    }
+
+
+def test_parse_csv_manifest():
+    """Test that CSV manifest rows are parsed with typed alcohol content"""
+    manifest = (
+        "image,brand_name,product_type,alcohol_content,net_contents\n"
+        "a.png,Hammer Whiskey,Bourbon,45,750 mL\n"
+    )
+    rows = parse_manifest("manifest.csv", manifest.encode())
+
+    assert rows == [
+        {
+            "row": 1,
+            "image": "a.png",
+            "brand_name": "Hammer Whiskey",
+            "product_type": "Bourbon",
+            "alcohol_content": 45.0,
+            "net_contents": "750 mL",
+        }
+    ]
+
+
+def test_parse_jsonl_manifest():
+    """Test that JSONL manifest rows are parsed"""
+    lines = [
+        json.dumps(make_row(0, "a.png") | {"alcohol_content": "40"}),
+        json.dumps(make_row(0, "b.png")),
+    ]
+    rows = parse_manifest("manifest.jsonl", "\n".join(lines).encode())
+
+    assert [row["image"] for row in rows] == ["a.png", "b.png"]
+    assert rows[0]["alcohol_content"] == 40.0
+
+
+def test_parse_manifest_rejects_missing_fields():
+    """Test that rows without required fields are rejected"""
+    manifest = "image,brand_name\na.png,Hammer Whiskey\n"
+    with pytest.raises(ValueError):
+        parse_manifest("manifest.csv", manifest.encode())
+
+
+def test_parse_manifest_rejects_non_object_and_null_rows():
+    """Test that JSONL rows must be objects and null counts as missing"""
+    row = {field: "x" for field in MANIFEST_FIELDS}
+    row["alcohol_content"] = "40"
+    manifest = json.dumps(row) + "\n[1, 2]\n"
+    with pytest.raises(ValueError, match="row 2 is not an object"):
+        parse_manifest("manifest.jsonl", manifest.encode())
+
+    row["brand_name"] = None
+    with pytest.raises(ValueError, match="missing: brand_name"):
+        parse_manifest("manifest.jsonl", json.dumps(row).encode())
+
+
+def test_load_zip_images_skips_non_images():
+    """Test that only image files are read from the archive"""
+    archive = make_zip({"labels/a.png": b"a", "notes.txt": b"ignore"})
+
+    assert load_zip_images(archive) == {"a.png": b"a"}
+
+
+def test_load_zip_images_rejects_duplicate_file_names():
+    """Test that same-named images in different folders are not mixed up"""
+    archive = make_zip({"front/1.png": b"front", "back/1.png": b"back"})
+
+    with pytest.raises(ValueError, match="1.png"):
+        load_zip_images(archive)
+
+
+@pytest.mark.asyncio
+async def test_verify_batch_reports_each_row():
+    """Test per-row results including a missing image"""
+    images = {
+        "good.png": LABEL_TEXT.encode(),
+        "bad.png": LABEL_TEXT.replace("HAMMER", "OTHER").encode(),
+    }
+    rows = [make_row(1, "good.png"), make_row(2, "bad.png"), make_row(3, "none.png")]
+
+    results = await verify_batch(LabelVerifier(TrackingOCR()), rows, images)
+
+    assert [result["success"] for result in results] == [True, False, False]
+    assert results[2]["error"] == "Image not found in ZIP"
+
+
+@pytest.mark.asyncio
+async def test_verify_batch_limits_concurrency():
+    """Test that no more than the configured number of OCR calls overlap"""
+    ocr = TrackingOCR()
+    images = {f"{i}.png": LABEL_TEXT.encode() for i in range(10)}
+    rows = [make_row(i, f"{i}.png") for i in range(10)]
+
+    await verify_batch(LabelVerifier(ocr), rows, images, concurrency=3)
+
+    assert ocr.max_active == 3
@@ -0,0 +1,59 @@
+from benchmark import (
+    build_corpus,
+    compare,
+    metric,
+    parse_thresholds,
+    percentile,
+)
+
+
+def results(**values):
+    return {
+        "metrics": {
+            name.replace("__", "."): metric(value, "s", better)
+            for name, (value, better) in values.items()
+        }
+    }
+
+
+def test_corpus_varies_one_axis_at_a_time():
+    """Test the corpus has the base label plus one label per listed variant"""
+    corpus = build_corpus({"scale": (0.5,), "rotation": (5.0,)})
+    assert list(corpus) == ["base", "scale=0.5", "rotation=5.0"]
+    assert all(image.startswith(b"\x89PNG") for image in corpus.values())
+
+
+def test_percentile_uses_nearest_rank():
+    """Test p50 and p95 over a known sample"""
+    samples = list(range(1, 101))
+    assert percentile(samples, 0.50) == 50
+    assert percentile(samples, 0.95) == 95
+    assert percentile([3.0], 0.95) == 3.0
+
+
+def test_compare_flags_slower_latency_and_lower_throughput():
+    """Test regressions respect each metric's better direction"""
+    baseline = results(latency=(1.0, "lower"), throughput=(100.0, "higher"))
+    current = results(latency=(1.3, "lower"), throughput=(70.0, "higher"))
+
+    regressions = compare(current, baseline, parse_thresholds(["0.2"]))
+
+    assert [name for name, *_ in regressions] == ["latency", "throughput"]
+
+
+def test_compare_ignores_improvements_and_new_metrics():
+    """Test faster runs and metrics missing from the baseline pass"""
+    baseline = results(latency=(1.0, "lower"))
+    current = results(latency=(0.5, "lower"), added=(9.0, "lower"))
+
+    assert compare(current, baseline, parse_thresholds(None)) == []
+
+
+def test_per_prefix_thresholds():
+    """Test the longest matching prefix threshold applies"""
+    baseline = results(memory__peak=(100.0, "lower"), extract__p50=(1.0, "lower"))
+    current = results(memory__peak=(115.0, "lower"), extract__p50=(1.15, "lower"))
+
+    regressions = compare(current, baseline, parse_thresholds(["0.2", "memory=0.1"]))
+
+    assert [name for name, *_ in regressions] == ["memory.peak"]
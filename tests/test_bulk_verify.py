@@ -0,0 +1,110 @@
+import json
+import pytest
+from bulk_verify import load_checkpoint, main, verify_directory
+from ocr_service import OCRService
+from verifier import LabelVerifier
+
+LABEL_TEXT = """
+HAMMER WHISKEY
+Bourbon
+45% Alc./Vol.
+750 mL
+GOVERNMENT WARNING
+"""
+
+
+class MockOCR(OCRService):
+    """Mock OCR that returns the same label text for every image"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def extract_text(self, image_bytes: bytes) -> str:
+        self.calls += 1
+        return LABEL_TEXT
+
+
+def make_rows(count):
+    return [
+        {
+            "row": number,
+            "image": f"label{number}.png",
+            "brand_name": "Hammer Whiskey",
+            "product_type": "Bourbon",
+            "alcohol_content": 45.0,
+            "net_contents": "750 mL",
+        }
+        for number in range(1, count + 1)
+    ]
+
+
+def read_results(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_verify_directory_streams_jsonl(tmp_path):
+    """Test every row is written as one JSON line, missing images as errors"""
+    for number in (1, 2):
+        (tmp_path / f"label{number}.png").write_bytes(b"image")
+    output_path = tmp_path / "results.jsonl"
+    verifier = LabelVerifier(MockOCR())
+
+    with output_path.open("a") as output:
+        counts = await verify_directory(verifier, make_rows(3), tmp_path, output, 2)
+
+    results = {result["row"]: result for result in read_results(output_path)}
+    assert counts == {"passed": 2, "failed": 0, "errors": 1}
+    assert results[1]["success"] is True
+    assert results[3]["error"] == "Image not found"
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_checkpointed_rows(tmp_path):
+    """Test a second run only verifies rows missing from the output"""
+    for number in (1, 2, 3):
+        (tmp_path / f"label{number}.png").write_bytes(b"image")
+    output_path = tmp_path / "results.jsonl"
+    rows = make_rows(3)
+
+    with output_path.open("a") as output:
+        await verify_directory(LabelVerifier(MockOCR()), rows[:2], tmp_path, output, 1)
+
+    completed = load_checkpoint(output_path)
+    pending = [row for row in rows if row["row"] not in completed]
+    ocr = MockOCR()
+    with output_path.open("a") as output:
+        await verify_directory(LabelVerifier(ocr), pending, tmp_path, output, 1)
+
+    assert completed == {1, 2}
+    assert ocr.calls == 1
+    assert sorted(result["row"] for result in read_results(output_path)) == [1, 2, 3]
+
+
+def test_checkpoint_retries_rows_that_errored(tmp_path):
+    """Test rows written with an error are verified again on resume"""
+    output_path = tmp_path / "results.jsonl"
+    output_path.write_text(
+        '{"row": 1, "success": true, "error": null}\n'
+        '{"row": 2, "success": false, "error": "OCR queue is full"}\n'
+    )
+
+    assert load_checkpoint(output_path) == {1}
+
+
+def test_checkpoint_truncates_partial_last_line(tmp_path):
+    """Test a line cut off by a crash is dropped so the row is redone"""
+    output_path = tmp_path / "results.jsonl"
+    output_path.write_text('{"row": 1, "success": true}\n{"row": 2, "succ')
+
+    assert load_checkpoint(output_path) == {1}
+    assert output_path.read_text() == '{"row": 1, "success": true}\n'
+
+
+def test_cli_reports_bad_manifest(tmp_path, capsys):
+    """Test an unreadable manifest exits with an error instead of a traceback"""
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("image,brand_name\n")
+
+    assert main([str(tmp_path), str(manifest)]) == 2
+    assert "Cannot read manifest" in capsys.readouterr().err
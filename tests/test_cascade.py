@@ -0,0 +1,175 @@
+import pytest
+from cascade import CascadeVerifier, FallbackVerifier, text_confidence
+from llm_client import CircuitOpen
+from ocr_service import OCRService
+from verifier import LabelVerifier
+
+GOOD_TEXT = """
+HAMMER WHISKEY
+Kentucky Straight Bourbon Whiskey
+45% Alc./Vol.
+750 mL
+GOVERNMENT WARNING
+"""
+
+FORM_DATA = {
+    "brand_name": "Hammer Whiskey",
+    "product_type": "Kentucky Straight Bourbon Whiskey",
+    "alcohol_content": 45.0,
+    "net_contents": "750 mL",
+}
+
+
+class MockOCR(OCRService):
+    """Mock OCR that returns fixed text and counts calls"""
+
+    def __init__(self, text_to_return):
+        self.text_to_return = text_to_return
+        self.calls = 0
+
+    async def extract_text(self, image_bytes: bytes) -> str:
+        self.calls += 1
+        return self.text_to_return
+
+
+def make_cascade(local_text, llm_text=GOOD_TEXT):
+    local_ocr, llm_ocr = MockOCR(local_text), MockOCR(llm_text)
+    cascade = CascadeVerifier(LabelVerifier(local_ocr), LabelVerifier(llm_ocr))
+    return cascade, local_ocr, llm_ocr
+
+
+def test_text_confidence_scores_clean_text_higher():
+    """Test that garbled OCR output scores lower than clean text"""
+    assert text_confidence(GOOD_TEXT) == 1.0
+    assert text_confidence("~~ ,,| }{ ¥§ HAMMER") < 0.5
+    assert text_confidence("") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_cascade_stays_local_when_checks_pass():
+    """Test that a clean label never reaches the LLM"""
+    cascade, local_ocr, llm_ocr = make_cascade(GOOD_TEXT)
+
+    results = await cascade.verify(FORM_DATA, b"image")
+
+    assert results["success"] is True
+    assert results["tier"] == "tesseract"
+    assert llm_ocr.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_cascade_escalates_on_failed_check():
+    """Test that a failed local check is re-run on the LLM"""
+    cascade, _, llm_ocr = make_cascade(GOOD_TEXT.replace("HAMMER", "HAMNER"))
+
+    results = await cascade.verify(FORM_DATA, b"image")
+
+    assert results["success"] is True
+    assert results["tier"] == "llm"
+    assert results["escalation_reason"] == "failed_checks"
+    assert llm_ocr.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cascade_escalates_on_low_confidence():
+    """Test that garbled OCR output escalates even if checks pass"""
+    noisy = GOOD_TEXT + " ~~ |} {| ¥§ ^^ ~| ]] [[ ~~ |} {| ¥§ ^^ ~| ]] [["
+    cascade, _, _ = make_cascade(noisy)
+
+    results = await cascade.verify(FORM_DATA, b"image")
+
+    assert results["escalation_reason"] == "low_confidence"
+
+
+@pytest.mark.asyncio
+async def test_cascade_counts_tiers():
+    """Test that per-tier counters report the escalation rate"""
+    cascade, _, _ = make_cascade(GOOD_TEXT)
+    await cascade.verify(FORM_DATA, b"image")
+    cascade.local_verifier = LabelVerifier(MockOCR("nothing useful"))
+    await cascade.verify(FORM_DATA, b"image")
+
+    stats = cascade.stats()
+
+    assert stats["tesseract_results"] == 1
+    assert stats["llm_results"] == 1
+    assert stats["escalation_rate"] == 0.5
+
+
+class UnavailableVerifier:
+    """Mock LLM verifier whose client refuses every call"""
+
+    def __init__(self, error=None):
+        self.error = error or CircuitOpen("circuit breaker is open")
+        self.calls = 0
+
+    async def verify(self, form_data, image_bytes, on_check=None):
+        self.calls += 1
+        raise self.error
+
+
+@pytest.mark.asyncio
+async def test_fallback_verifier_uses_local_ocr_when_llm_unavailable():
+    """Test that an open circuit degrades to Tesseract instead of failing"""
+    local_ocr = MockOCR(GOOD_TEXT)
+    verifier = FallbackVerifier(UnavailableVerifier(), LabelVerifier(local_ocr))
+    streamed = []
+
+    results = await verifier.verify(FORM_DATA, b"img", on_check=streamed.append)
+
+    assert results["success"] is True
+    assert results["tier"] == "tesseract"
+    assert results["fallback"] is True
+    assert len(streamed) == len(results["checks"])
+    assert verifier.stats()["fallbacks"] == 1
+
+
+class FailsMidStreamVerifier:
+    """Mock LLM verifier that streams one check, then loses Gemini"""
+
+    async def verify(self, form_data, image_bytes, on_check=None):
+        on_check({"field": "Brand Name", "expected": "Hammer", "found": True})
+        raise CircuitOpen("circuit breaker is open")
+
+
+@pytest.mark.asyncio
+async def test_fallback_after_partial_stream_does_not_repeat_checks():
+    """Test the fallback is not streamed once the LLM has sent checks"""
+    local_ocr = MockOCR(GOOD_TEXT)
+    streamed = []
+    fallback = FallbackVerifier(FailsMidStreamVerifier(), LabelVerifier(local_ocr))
+    results = await fallback.verify(FORM_DATA, b"img", on_check=streamed.append)
+    assert results["fallback"] is True
+    assert len(streamed) == 1
+
+    streamed = []
+    cascade = CascadeVerifier(
+        LabelVerifier(MockOCR("@@ ## !!")), FailsMidStreamVerifier()
+    )
+    results = await cascade.verify(FORM_DATA, b"img", on_check=streamed.append)
+    assert results["fallback"] is True
+    assert len(streamed) == 1
+
+
+@pytest.mark.asyncio
+async def test_fallback_verifier_raises_other_errors():
+    """Test that bugs in the LLM path are not hidden by the fallback"""
+    verifier = FallbackVerifier(
+        UnavailableVerifier(ValueError("bad reply")), LabelVerifier(MockOCR(""))
+    )
+    with pytest.raises(ValueError):
+        await verifier.verify(FORM_DATA, b"img")
+
+
+@pytest.mark.asyncio
+async def test_cascade_keeps_local_result_when_llm_unavailable():
+    """Test that escalation failures return the local result"""
+    local_ocr = MockOCR("HAMMER WHISKEY only")
+    cascade = CascadeVerifier(LabelVerifier(local_ocr), UnavailableVerifier())
+
+    results = await cascade.verify(FORM_DATA, b"img")
+
+    assert results["tier"] == "tesseract"
+    assert results["fallback"] is True
+    assert results["escalation_reason"] == "failed_checks"
+    assert cascade.stats()["llm_fallbacks"] == 1
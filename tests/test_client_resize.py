@@ -0,0 +1,76 @@
+import io
+from types import SimpleNamespace
+from PIL import Image
+from starlette.testclient import TestClient
+import main
+
+FORM = {
+    "brand_name": "Hammer Whiskey",
+    "product_type": "Bourbon",
+    "alcohol_content": "45",
+    "net_contents_value": "750",
+    "net_contents_unit": "mL",
+}
+
+
+def png_bytes(size):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "white").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_client_resize_is_off_by_default():
+    """Test the form uploads the original file unless resizing is configured"""
+    html = TestClient(main.app).get("/").text
+    assert "data-max-edge" not in html
+    assert "original_bytes" not in html
+
+
+def test_client_resize_adds_script_and_original_size_fields(monkeypatch):
+    """Test enabling resizing renders the canvas script and hidden fields"""
+    monkeypatch.setattr(main, "CLIENT_RESIZE_MAX_EDGE", 2048)
+    html = TestClient(main.app).get("/").text
+    assert 'data-max-edge="2048"' in html
+    assert 'data-quality="0.85"' in html
+    assert 'name="original_bytes"' in html
+    assert "DataTransfer" in html
+
+
+def test_upload_sizes_record_browser_resize():
+    """Test both sizes are kept when the browser shrank the photo"""
+    upload = main.build_upload_sizes(400_000, "6000000", "8000", "6000")
+    assert upload == {
+        "transmitted_bytes": 400_000,
+        "original_bytes": 6_000_000,
+        "resized": True,
+        "original_width": 8000,
+        "original_height": 6000,
+    }
+    assert main.build_upload_sizes(5000, "", "", "") == {
+        "transmitted_bytes": 5000,
+        "original_bytes": 5000,
+        "resized": False,
+    }
+
+
+def test_verify_accepts_empty_original_size_fields(monkeypatch):
+    """Test the hidden fields may be left empty when no resize happened"""
+    submitted = []
+
+    def submit(fn):
+        submitted.append(fn)
+        return SimpleNamespace(id="job-1")
+
+    monkeypatch.setattr(main, "job_queue", SimpleNamespace(submit=submit))
+    response = TestClient(main.app).post(
+        "/verify",
+        data={
+            **FORM,
+            "original_bytes": "",
+            "original_width": "",
+            "original_height": "",
+        },
+        files={"label_image": ("label.jpg", png_bytes((200, 100)), "image/jpeg")},
+    )
+    assert "/jobs/job-1" in response.text
+    assert len(submitted) == 1
@@ -0,0 +1,95 @@
+import json
+import httpx
+import pytest
+from google.genai import errors
+import main
+from fake_gemini import LABEL_TEXT, FakeModels, canned_reply, make_fake_client
+from jobs import JobQueue
+from llm_client import GeminiClient
+from llm_verifier import LlmVerifier
+from results_store import ResultsStore
+from load_test import run_load, summarize
+from tests.test_llm_client import FORM_DATA, png_bytes
+
+
+def test_canned_reply_echoes_structured_payload():
+    """Test verification requests get a passing result for their form values"""
+    payload = json.dumps({"brand_name": "Old Tom", "product_type": "Gin"})
+    reply = json.loads(canned_reply([payload, b"image"]))
+
+    assert reply["success"] is True
+    assert reply["checks"][0] == {
+        "field": "Brand Name",
+        "expected": "Old Tom",
+        "found": True,
+    }
+
+
+def test_canned_reply_for_ocr_prompt_is_label_text():
+    """Test OCR-style prompts get plain label text"""
+    assert canned_reply(["Extract all text from this label"]) == LABEL_TEXT
+
+
+@pytest.mark.asyncio
+async def test_fake_models_inject_quota_and_server_errors():
+    """Test the configured error rate produces 429s and 503s"""
+    models = FakeModels(latency=0, jitter=0, error_rate=1.0, seed=1)
+    codes = set()
+    for _ in range(20):
+        with pytest.raises(errors.APIError) as raised:
+            await models.generate_content("model", ["hi"])
+        codes.add(raised.value.code)
+
+    assert codes == {429, 503}
+    assert models.errors == 20
+
+
+@pytest.mark.asyncio
+async def test_llm_verifier_runs_against_fake_client():
+    """Test the structured and streaming LLM paths work without credentials"""
+    client = GeminiClient(client=make_fake_client(latency=0.01, jitter=0))
+    verifier = LlmVerifier(client=client)
+    streamed = []
+
+    results = await verifier.verify(FORM_DATA, png_bytes())
+    streamed_results = await verifier.verify(
+        FORM_DATA, png_bytes(), on_check=streamed.append
+    )
+
+    assert results["success"] is True
+    assert results["checks"][0]["expected"] == "Old Tom"
+    assert streamed == streamed_results["checks"]
+
+
+def test_summarize_reports_percentiles_and_errors():
+    """Test latency percentiles only count successful requests"""
+    samples = [(seconds / 100, "ok") for seconds in range(1, 101)]
+    samples += [(5.0, "rejected")] * 10
+
+    summary = summarize(samples, wall_seconds=10)
+
+    assert summary["p50_s"] == 0.5
+    assert summary["p99_s"] == 0.99
+    assert summary["throughput_per_s"] == 10
+    assert summary["outcomes"] == {"ok": 100, "rejected": 10}
+    assert summary["error_rate"] == pytest.approx(10 / 110)
+
+
+@pytest.mark.asyncio
+async def test_load_generator_drives_verify_route(monkeypatch, tmp_path):
+    """Test the load generator submits labels and waits for their results"""
+    fake = GeminiClient(client=make_fake_client(latency=0.01, jitter=0))
+    monkeypatch.setattr(main, "VERIFY_ENGINE", "llm")
+    monkeypatch.setattr(main, "job_queue", JobQueue(workers=2))
+    monkeypatch.setattr(main, "results_store", ResultsStore(tmp_path / "results.db"))
+    monkeypatch.setattr(main.llm_fallback.llm_verifier, "client", fake)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        samples, wall = await run_load(
+            client, rate=50, duration=0.2, poll_interval=0.01
+        )
+    await main.job_queue.stop()
+
+    assert len(samples) == 10
+    assert summarize(samples, wall)["outcomes"] == {"ok": 10}
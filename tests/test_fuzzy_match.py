@@ -0,0 +1,61 @@
+from utils.fuzzy_match import allowed_edits, approximate_find, parse_tolerances
+
+
+def test_exact_substring_has_zero_edits():
+    """Test that an exact occurrence is found with distance 0"""
+    assert approximate_find("oldtom", "xxoldtomyy", 0) == 0
+
+
+def test_substitution_within_tolerance():
+    """Test that an OCR digit-for-letter swap counts as one edit"""
+    assert approximate_find("oldtom", "label:0ldtomgin", 1) == 1
+    assert approximate_find("bourbon", "straightb0urb0nwhiskey", 2) == 2
+
+
+def test_insertion_and_deletion_within_tolerance():
+    """Test that dropped and extra characters are tolerated"""
+    assert approximate_find("whiskey", "xxwhskeyxx", 1) == 1
+    assert approximate_find("whiskey", "xxwhiiskeyxx", 1) == 1
+
+
+def test_too_many_edits_is_not_found():
+    """Test that matches needing more edits than allowed are rejected"""
+    assert approximate_find("bourbon", "straightb0urb0nwhiskey", 1) is None
+    assert approximate_find("hammer", "nothing here", 2) is None
+
+
+def test_matches_naive_edit_distance():
+    """Test against a straightforward dynamic-programming reference"""
+
+    def reference(pattern, text):
+        previous = [0] * (len(text) + 1)
+        for i, p in enumerate(pattern, start=1):
+            current = [i] + [0] * len(text)
+            for j, t in enumerate(text, start=1):
+                current[j] = min(
+                    previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (p != t)
+                )
+            previous = current
+        return min(previous)
+
+    cases = [("abc", "xaxbxcx"), ("abcd", "dcba"), ("aaaa", "aaa"), ("c", "dd")]
+    for pattern, text in cases:
+        distance = reference(pattern, text)
+        for k in range(4):
+            expected = distance if distance <= k else None
+            assert approximate_find(pattern, text, k) == expected
+
+
+def test_allowed_edits_scales_with_length():
+    """Test that short values get fewer edits than requested"""
+    assert allowed_edits("ox", 2) == 0
+    assert allowed_edits("oldtomdistillery", 2) == 2
+
+
+def test_parse_tolerances():
+    """Test the MATCH_TOLERANCES setting format"""
+    assert parse_tolerances("brand_name=1, product_type=2") == {
+        "brand_name": 1,
+        "product_type": 2,
+    }
+    assert parse_tolerances("") == {}
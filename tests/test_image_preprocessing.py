@@ -0,0 +1,64 @@
+import io
+from image_preprocessing import PreprocessConfig, estimate_skew, preprocess
+from ocr_service import TesseractOCR
+from tests.test_ocr import generate_test_label
+
+
+def encode(img, format="PNG"):
+    img_bytes = io.BytesIO()
+    img.save(img_bytes, format=format)
+    return img_bytes.getvalue()
+
+
+def test_preprocess_downscales_large_jpeg():
+    """Test that oversized photos are capped at the configured long edge"""
+    photo = generate_test_label().resize((2800, 3600))
+    config = PreprocessConfig(max_long_edge=1200, deskew=False, binarize=False)
+
+    image, timings = preprocess(encode(photo, "JPEG"), config)
+
+    assert max(image.size) == 1200
+    assert image.mode == "L"
+    assert {"decode", "normalize_size", "grayscale"} <= timings.keys()
+
+
+def test_preprocess_upscales_small_images():
+    """Test that tiny images are enlarged to the minimum long edge"""
+    small = generate_test_label().resize((350, 450))
+    config = PreprocessConfig(min_long_edge=900, deskew=False, binarize=False)
+
+    image, _ = preprocess(encode(small), config)
+
+    assert max(image.size) == 900
+
+
+def test_preprocess_binarizes_to_black_and_white():
+    """Test that binarization leaves only ink and background values"""
+    config = PreprocessConfig(deskew=False)
+
+    image, timings = preprocess(encode(generate_test_label()), config)
+
+    assert set(image.tobytes()) <= {0, 255}
+    assert "binarize" in timings
+
+
+def test_estimate_skew_detects_rotated_label():
+    """Test that a rotated label is detected and corrected"""
+    rotated = generate_test_label().rotate(3, fillcolor="white", expand=True)
+
+    angle = estimate_skew(rotated, PreprocessConfig())
+
+    assert abs(angle + 3) <= 0.5
+
+
+def test_estimate_skew_leaves_straight_label():
+    """Test that an upright label is not rotated"""
+    assert estimate_skew(generate_test_label(), PreprocessConfig()) == 0
+
+
+def test_preprocess_config_changes_cache_key():
+    """Test that preprocessing settings are part of the OCR cache key"""
+    plain = TesseractOCR()
+    preprocessed = TesseractOCR(preprocess=PreprocessConfig())
+
+    assert plain.cache_key() != preprocessed.cache_key()
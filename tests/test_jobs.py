@@ -0,0 +1,123 @@
+import asyncio
+import pytest
+from jobs import JobQueue, QueueFull
+
+
+@pytest.mark.asyncio
+async def test_submit_returns_immediately_and_runs_in_background():
+    """Test that a job is queued right away and completes later"""
+    queue = JobQueue(workers=1)
+
+    async def work(job):
+        await asyncio.sleep(0.01)
+        return {"success": True}
+
+    job = queue.submit(work)
+    assert not job.finished
+
+    await queue.join()
+    assert queue.get(job.id).status == "done"
+    assert job.result == {"success": True}
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_job_records_error():
+    """Test that an exception marks the job failed instead of killing the worker"""
+    queue = JobQueue(workers=1)
+
+    async def broken(job):
+        raise ValueError("unreadable image")
+
+    async def fine(job):
+        return "ok"
+
+    failed = queue.submit(broken)
+    succeeded = queue.submit(fine)
+    await queue.join()
+
+    assert failed.status == "failed"
+    assert failed.error == "unreadable image"
+    assert succeeded.status == "done"
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_new_jobs():
+    """Test backpressure when the queue is at max depth"""
+    queue = JobQueue(workers=1, max_depth=1)
+    release = asyncio.Event()
+
+    async def blocked(job):
+        await release.wait()
+
+    queue.submit(blocked)
+    await asyncio.sleep(0)
+    queue.submit(blocked)
+    with pytest.raises(QueueFull):
+        queue.submit(blocked)
+    assert queue.stats()["rejected"] == 1
+
+    release.set()
+    await queue.join()
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_workers_bound_concurrency():
+    """Test that no more jobs run at once than there are workers"""
+    queue = JobQueue(workers=2)
+    active = []
+    peak = []
+
+    async def work(job):
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.01)
+        active.pop()
+
+    for _ in range(6):
+        queue.submit(work)
+    await queue.join()
+
+    assert max(peak) == 2
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_finished_jobs_expire():
+    """Test that finished jobs are dropped after the TTL"""
+    queue = JobQueue(workers=1, ttl_seconds=0)
+
+    async def work(job):
+        return "ok"
+
+    job = queue.submit(work)
+    await queue.join()
+    job.finished_at -= 1
+    queue.submit(work)
+
+    assert queue.get(job.id) is None
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_job_wakes_waiters_on_new_checks():
+    """Test that streamed checks wake up subscribers before the job ends"""
+    queue = JobQueue(workers=1)
+    release = asyncio.Event()
+
+    async def work(job):
+        job.add_check({"field": "Brand Name", "found": True})
+        await release.wait()
+        return {"success": True}
+
+    job = queue.submit(work)
+    assert await job.wait_for_update(timeout=1)
+    assert job.checks == [{"field": "Brand Name", "found": True}]
+    assert not job.finished
+
+    release.set()
+    assert await job.wait_for_update(timeout=1)
+    assert job.finished
+    await queue.stop()
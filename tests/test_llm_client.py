@@ -0,0 +1,392 @@
+import asyncio
+import io
+import json
+import pytest
+from types import SimpleNamespace
+from PIL import Image
+from google.genai import errors
+from llm_client import CircuitBreaker, CircuitOpen, GeminiClient, TokenBucket
+from pydantic import ValidationError
+from llm_verifier import SYSTEM_INSTRUCTION, LlmVerifier, PartialChecksParser
+from ocr_service import LlmOCR
+
+
+class FakeModels:
+    """Stand-in for genai's async models API"""
+
+    def __init__(self, text="HAMMER WHISKEY", delay=0.0, failures=()):
+        self.text = text
+        self.delay = delay
+        self.failures = list(failures)
+        self.active = 0
+        self.max_active = 0
+        self.calls = []
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls.append({"model": model, "contents": contents, "config": config})
+        if self.failures:
+            raise self.failures.pop(0)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return SimpleNamespace(text=self.text)
+
+    async def generate_content_stream(self, model, contents, config=None):
+        self.calls.append({"model": model, "contents": contents, "config": config})
+        if self.failures:
+            raise self.failures.pop(0)
+
+        async def chunks():
+            for start in range(0, len(self.text), 7):
+                yield SimpleNamespace(text=self.text[start : start + 7])
+
+        return chunks()
+
+
+def fake_client(**kwargs):
+    models = FakeModels(**kwargs)
+    return models, SimpleNamespace(aio=SimpleNamespace(models=models))
+
+
+def api_error(code):
+    error_class = errors.ClientError if code < 500 else errors.ServerError
+    return error_class(code, {"error": {"code": code, "message": "fake error"}})
+
+
+class FakeClock:
+    """Manually advanced clock for rate limit and breaker tests"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def png_bytes():
+    img_bytes = io.BytesIO()
+    Image.new("RGB", (10, 10), "white").save(img_bytes, format="PNG")
+    return img_bytes.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_client_caps_concurrent_calls():
+    """Test that no more than max_concurrency calls are in flight"""
+    models, client = fake_client(delay=0.01)
+    gemini = GeminiClient(client=client, max_concurrency=2)
+
+    await asyncio.gather(*(gemini.generate_content(["hi"]) for _ in range(6)))
+
+    assert models.max_active == 2
+    assert gemini.stats()["calls"] == 6
+
+
+@pytest.mark.asyncio
+async def test_client_times_out_slow_calls():
+    """Test that a slow call is abandoned after the per-call timeout"""
+    _, client = fake_client(delay=1.0)
+    gemini = GeminiClient(client=client, timeout_seconds=0.01, max_retries=0)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await gemini.generate_content(["hi"])
+    assert gemini.stats()["timeouts"] == 1
+    assert gemini.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_client_retries_quota_and_server_errors():
+    """Test that 429 and 5xx replies are retried until a call succeeds"""
+    models, client = fake_client(failures=[api_error(429), api_error(503)])
+    gemini = GeminiClient(client=client, backoff_base=0.001)
+
+    response = await gemini.generate_content(["hi"])
+
+    assert response.text == "HAMMER WHISKEY"
+    assert len(models.calls) == 3
+    assert gemini.stats()["retries"] == 2
+    assert gemini.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_client_does_not_retry_bad_requests():
+    """Test that a 400 is raised at once and does not trip the breaker"""
+    models, client = fake_client(failures=[api_error(400)])
+    gemini = GeminiClient(client=client, backoff_base=0.001)
+
+    with pytest.raises(errors.ClientError):
+        await gemini.generate_content(["hi"])
+    assert len(models.calls) == 1
+    assert gemini.breaker.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_client_stream_retries_before_first_chunk():
+    """Test that a stream that fails to start is retried"""
+    models, client = fake_client(text="OLD TOM", failures=[api_error(429)])
+    gemini = GeminiClient(client=client, backoff_base=0.001)
+
+    chunks = [chunk.text async for chunk in gemini.generate_content_stream(["hi"])]
+
+    assert "".join(chunks) == "OLD TOM"
+    assert len(models.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_rejects_calls():
+    """Test that repeated quota errors open the circuit and stop calling Gemini"""
+    models, client = fake_client(failures=[api_error(429)] * 10)
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    gemini = GeminiClient(client=client, backoff_base=0.001, breaker=breaker)
+
+    with pytest.raises(errors.ClientError):
+        await gemini.generate_content(["hi"])
+    with pytest.raises(CircuitOpen):
+        await gemini.generate_content(["hi"])
+
+    assert len(models.calls) == 3
+    assert gemini.stats()["circuit_open"] == 1
+    assert gemini.stats()["rejected"] == 1
+
+
+def test_circuit_half_open_probe_closes_or_reopens():
+    """Test that one probe is let through after the reset timeout"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30, clock=clock)
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_unanswered_half_open_probe_expires():
+    """Test that a probe that never reports back does not block forever"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30, clock=clock)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_lets_next_call_probe():
+    """Test that cancelling the half-open probe call frees the probe slot"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30, clock=clock)
+    breaker.record_failure()
+    clock.now += 30
+    _, client = fake_client(delay=10)
+    gemini = GeminiClient(client=client, breaker=breaker)
+
+    probe = asyncio.ensure_future(gemini.generate_content(["hi"]))
+    await asyncio.sleep(0.01)
+    assert breaker.state == "half_open"
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert breaker.state == "open"
+    assert breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_calls_after_burst():
+    """Test that calls beyond the burst wait for tokens to refill"""
+    bucket = TokenBucket(rate=100, capacity=2)
+    start = asyncio.get_running_loop().time()
+
+    for _ in range(4):
+        await bucket.acquire()
+
+    elapsed = asyncio.get_running_loop().time() - start
+    assert elapsed >= 0.015
+    assert bucket.waits == 2
+
+
+@pytest.mark.asyncio
+async def test_llm_ocr_uses_shared_client():
+    """Test that LlmOCR goes through the async client"""
+    models, client = fake_client(text="OLD TOM")
+    ocr = LlmOCR(client=GeminiClient(client=client, model="test-model"))
+
+    assert await ocr.extract_text(png_bytes()) == "OLD TOM"
+    assert models.calls[0]["model"] == "test-model"
+
+
+@pytest.mark.asyncio
+async def test_llm_ocr_raises_on_empty_reply():
+    """Test that an empty or blocked reply fails instead of reading as no text"""
+    _, client = fake_client(text=None)
+    ocr = LlmOCR(client=GeminiClient(client=client))
+
+    with pytest.raises(ValueError, match="empty reply"):
+        await ocr.extract_text(png_bytes())
+
+
+FORM_DATA = {
+    "brand_name": "Old Tom",
+    "product_type": "Gin",
+    "alcohol_content": 40.0,
+    "net_contents": "750 mL",
+}
+
+REPLY = {
+    "success": False,
+    "checks": [
+        {"field": "Brand Name", "expected": "Old {Tom}", "found": True},
+        {"field": "Product Type", "expected": 'Gin "Dry"', "found": False},
+    ],
+    "extracted_text": "OLD TOM",
+}
+
+
+def test_partial_checks_parser_emits_each_completed_check():
+    """Test that checks are returned as soon as their object closes"""
+    parser = PartialChecksParser()
+    text = json.dumps(REPLY)
+    first_end = text.index("true}") + len("true}")
+
+    assert parser.feed(text[:20]) == []
+    assert parser.feed(text[20:first_end]) == [REPLY["checks"][0]]
+    assert parser.feed(text[first_end:]) == [REPLY["checks"][1]]
+    assert parser.feed("") == []
+
+
+@pytest.mark.asyncio
+async def test_llm_verifier_streams_checks():
+    """Test that streaming mode reports checks before returning the result"""
+    _, client = fake_client(text=json.dumps(REPLY))
+    verifier = LlmVerifier(client=GeminiClient(client=client))
+    streamed = []
+
+    results = await verifier.verify(FORM_DATA, png_bytes(), on_check=streamed.append)
+
+    assert streamed == REPLY["checks"]
+    assert results == REPLY
+
+
+@pytest.mark.asyncio
+async def test_llm_verifier_parses_json_reply():
+    """Test that the verifier returns the model's JSON results"""
+    reply = {"success": True, "checks": [], "extracted_text": "OLD TOM"}
+    models, client = fake_client(text=json.dumps(reply))
+    verifier = LlmVerifier(client=GeminiClient(client=client))
+
+    results = await verifier.verify(
+        {
+            "brand_name": "Old Tom",
+            "product_type": "Gin",
+            "alcohol_content": 40.0,
+            "net_contents": "750 mL",
+        },
+        png_bytes(),
+    )
+
+    assert results == reply
+    assert "Old Tom" in models.calls[0]["contents"][0]
+
+
+@pytest.mark.asyncio
+async def test_llm_verifier_sends_real_mime_type():
+    """Test that a PNG upload is labelled image/png, not image/jpeg"""
+    models, client = fake_client(text=json.dumps(REPLY))
+    verifier = LlmVerifier(client=GeminiClient(client=client))
+
+    await verifier.verify(FORM_DATA, png_bytes())
+
+    image_part = models.calls[0]["contents"][1]
+    assert image_part.inline_data.mime_type == "image/png"
+    assert image_part.inline_data.data == png_bytes()
+
+
+@pytest.mark.asyncio
+async def test_structured_mode_sends_compact_payload_and_schema():
+    """Test that instructions go in the system instruction, not every prompt"""
+    models, client = fake_client(text=json.dumps(REPLY))
+    verifier = LlmVerifier(client=GeminiClient(client=client))
+
+    await verifier.verify(FORM_DATA, png_bytes())
+
+    call = models.calls[0]
+    assert json.loads(call["contents"][0]) == {
+        "brand_name": "Old Tom",
+        "product_type": "Gin",
+        "alcohol_content": "40.0%",
+        "net_contents": "750 mL",
+    }
+    assert call["config"].system_instruction == SYSTEM_INSTRUCTION
+    assert call["config"].response_mime_type == "application/json"
+    assert call["config"].response_schema is not None
+
+
+@pytest.mark.asyncio
+async def test_structured_mode_recomputes_success():
+    """Test that success reflects the checks, not the model's own flag"""
+    reply = {**REPLY, "success": True}
+    _, client = fake_client(text=json.dumps(reply))
+    verifier = LlmVerifier(client=GeminiClient(client=client))
+
+    results = await verifier.verify(FORM_DATA, png_bytes())
+
+    assert results["success"] is False
+
+
+@pytest.mark.asyncio
+async def test_structured_mode_rejects_replies_outside_schema():
+    """Test that a malformed reply raises instead of returning partial data"""
+    _, client = fake_client(text=json.dumps({"checks": "none"}))
+    verifier = LlmVerifier(client=GeminiClient(client=client))
+
+    with pytest.raises(ValidationError):
+        await verifier.verify(FORM_DATA, png_bytes())
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("structured", [True, False])
+async def test_empty_reply_raises(structured):
+    """Test that an empty reply fails instead of returning no checks"""
+    _, client = fake_client(text=None)
+    verifier = LlmVerifier(client=GeminiClient(client=client), structured=structured)
+
+    with pytest.raises(ValueError, match="empty reply"):
+        await verifier.verify(FORM_DATA, png_bytes())
+
+
+@pytest.mark.asyncio
+async def test_inline_prompt_mode_rejects_reply_without_checks():
+    """Test that the inline prompt's reply is checked against the schema too"""
+    _, client = fake_client(text=json.dumps({"success": True}))
+    verifier = LlmVerifier(client=GeminiClient(client=client), structured=False)
+
+    with pytest.raises(ValidationError):
+        await verifier.verify(FORM_DATA, png_bytes())
+
+
+@pytest.mark.asyncio
+async def test_inline_prompt_mode_without_schema():
+    """Test that structured=False keeps the original inline prompt"""
+    models, client = fake_client(text=json.dumps(REPLY))
+    verifier = LlmVerifier(client=GeminiClient(client=client), structured=False)
+
+    results = await verifier.verify(FORM_DATA, png_bytes())
+
+    assert results == REPLY
+    assert "MATCHING RULES" in models.calls[0]["contents"][0]
+    assert models.calls[0]["config"] is None
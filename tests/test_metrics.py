@@ -0,0 +1,103 @@
+import pytest
+from metrics import Registry, collect_timings, stage_seconds, timed_stage
+from ocr_backends import BackendRegistry, LazyOCR
+from ocr_cache import CachedOCR
+from ocr_service import OCRService, TesseractOCR
+from verifier import LabelVerifier
+
+
+class MockOCR(OCRService):
+    engine = "mock"
+
+    async def extract_text(self, image_bytes: bytes) -> str:
+        return "HAMMER WHISKEY Bourbon 45% 750 mL GOVERNMENT WARNING"
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test Prometheus histogram output for a labelled series"""
+    registry = Registry()
+    histogram = registry.histogram(
+        "test_seconds", "Test latency", labelnames=("stage",), buckets=(0.1, 1)
+    )
+    histogram.observe(0.05, stage="ocr")
+    histogram.observe(0.5, stage="ocr")
+
+    output = registry.render()
+
+    assert "# TYPE test_seconds histogram" in output
+    assert 'test_seconds_bucket{stage="ocr",le="0.1"} 1' in output
+    assert 'test_seconds_bucket{stage="ocr",le="1"} 2' in output
+    assert 'test_seconds_bucket{stage="ocr",le="+Inf"} 2' in output
+    assert 'test_seconds_count{stage="ocr"} 2' in output
+
+
+def test_counter_escapes_label_values():
+    """Test that quotes in label values do not break the exposition format"""
+    registry = Registry()
+    counter = registry.counter("test_total", "Test counter", labelnames=("engine",))
+    counter.inc(engine='say "hi"')
+    counter.inc(2, engine='say "hi"')
+
+    assert 'test_total{engine="say \\"hi\\""} 3' in registry.render()
+
+
+def test_timed_stage_counts_errors():
+    """Test that an exception inside a stage is timed and counted"""
+    registry = Registry()
+    histogram = registry.histogram("t_seconds", "t", labelnames=("stage", "engine"))
+    errors = registry.counter("t_errors", "t", labelnames=("stage", "engine"))
+
+    with pytest.raises(ValueError):
+        with timed_stage("ocr", "tesseract", histogram=histogram, errors=errors):
+            raise ValueError("bad image")
+
+    assert histogram.count(stage="ocr", engine="tesseract") == 1
+    assert errors.value(stage="ocr", engine="tesseract") == 1
+
+
+@pytest.mark.asyncio
+async def test_label_verifier_records_ocr_and_verification_stages():
+    """Test that verification spans are recorded per engine"""
+    before_ocr = stage_seconds.count(stage="ocr", engine="mock")
+    before_verify = stage_seconds.count(stage="verification", engine="mock")
+
+    await LabelVerifier(MockOCR()).verify(
+        {
+            "brand_name": "Hammer Whiskey",
+            "product_type": "Bourbon",
+            "alcohol_content": 45.0,
+            "net_contents": "750 mL",
+        },
+        b"image",
+    )
+
+    assert stage_seconds.count(stage="ocr", engine="mock") == before_ocr + 1
+    assert stage_seconds.count(stage="verification", engine="mock") == before_verify + 1
+
+
+def test_collect_timings_records_stages_in_block():
+    """Test per-request timings only cover stages run inside the block"""
+    registry = Registry()
+    histogram = registry.histogram("t_seconds", "test", labelnames=("stage", "engine"))
+    errors = registry.counter("t_errors", "test", labelnames=("stage", "engine"))
+    timings = {}
+
+    with collect_timings(timings):
+        with timed_stage("ocr", histogram=histogram, errors=errors):
+            pass
+        with timed_stage("ocr", histogram=histogram, errors=errors):
+            pass
+    with timed_stage("render", histogram=histogram, errors=errors):
+        pass
+
+    assert list(timings) == ["ocr"]
+    assert histogram.count(stage="ocr", engine="") == 2
+
+
+def test_wrapped_engines_report_their_short_name():
+    """Test that caching and lazy loading do not change the engine label"""
+    registry = BackendRegistry()
+    registry.register("tesseract", TesseractOCR)
+
+    assert CachedOCR(LazyOCR(registry, "tesseract")).engine == "tesseract"
+    assert CachedOCR(MockOCR()).engine == "mock"
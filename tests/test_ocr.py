@@ -1,37 +1,54 @@
 import io
 import pytest
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageChops, ImageDraw, ImageFont
 from ocr_service import TesseractOCR
 
 
-def generate_test_label():
-    """Generate a simple whiskey label image with PIL"""
-    img = Image.new("RGB", (700, 900), color="white")
+FONT_DIR = "/usr/share/fonts/truetype/dejavu"
+FONT_FAMILIES = {
+    "sans": ("DejaVuSans-Bold.ttf", "DejaVuSans.ttf"),
+    "serif": ("DejaVuSerif-Bold.ttf", "DejaVuSerif.ttf"),
+    "mono": ("DejaVuSansMono-Bold.ttf", "DejaVuSansMono.ttf"),
+}
+
+
+def generate_test_label(scale=1.0, font="sans", noise=0.0, rotation=0.0):
+    """Generate a simple whiskey label image with PIL
+
+    scale resizes the 700x900 layout, font picks a FONT_FAMILIES entry,
+    noise is the sigma of Gaussian noise added to every pixel and rotation
+    tilts the finished label by that many degrees.
+    """
+
+    def px(value):
+        return round(value * scale)
+
+    img = Image.new("RGB", (px(700), px(900)), color="white")
     draw = ImageDraw.Draw(img)
 
+    bold_name, regular_name = FONT_FAMILIES[font]
     try:
-        font_large = ImageFont.truetype(
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 70
-        )
-        font_medium = ImageFont.truetype(
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 45
-        )
-        font_small = ImageFont.truetype(
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 28
-        )
-    except:
+        font_large = ImageFont.truetype(f"{FONT_DIR}/{bold_name}", px(70))
+        font_medium = ImageFont.truetype(f"{FONT_DIR}/{regular_name}", px(45))
+        font_small = ImageFont.truetype(f"{FONT_DIR}/{regular_name}", px(28))
+    except OSError:
         font_large = ImageFont.load_default()
         font_medium = ImageFont.load_default()
         font_small = ImageFont.load_default()
 
+    center = px(350)
     y_position = 120
     draw.text(
-        (350, y_position), "HAMMER WHISKEY", fill="black", font=font_large, anchor="mm"
+        (center, px(y_position)),
+        "HAMMER WHISKEY",
+        fill="black",
+        font=font_large,
+        anchor="mm",
     )
 
     y_position += 120
     draw.text(
-        (350, y_position),
+        (center, px(y_position)),
         "Kentucky Straight Bourbon Whiskey",
         fill="black",
         font=font_medium,
@@ -40,15 +57,21 @@ def generate_test_label():
 
     y_position += 100
     draw.text(
-        (350, y_position), "45% Alc./Vol.", fill="black", font=font_medium, anchor="mm"
+        (center, px(y_position)),
+        "45% Alc./Vol.",
+        fill="black",
+        font=font_medium,
+        anchor="mm",
     )
 
     y_position += 100
-    draw.text((350, y_position), "750 mL", fill="black", font=font_medium, anchor="mm")
+    draw.text(
+        (center, px(y_position)), "750 mL", fill="black", font=font_medium, anchor="mm"
+    )
 
     y_position += 150
     draw.text(
-        (350, y_position),
+        (center, px(y_position)),
         "GOVERNMENT WARNING",
         fill="black",
         font=font_small,
@@ -57,7 +80,7 @@ def generate_test_label():
     y_position += 40
     warning = "According to the Surgeon General, women should not\ndrink alcoholic beverages during pregnancy because\nof the risk of birth defects."
     draw.text(
-        (350, y_position),
+        (center, px(y_position)),
         warning,
         fill="black",
         font=font_small,
@@ -65,6 +88,13 @@ def generate_test_label():
         align="center",
     )
 
+    if noise:
+        grain = Image.effect_noise(img.size, noise).convert("RGB")
+        img = ImageChops.add(img, grain, offset=-128)
+    if rotation:
+        img = img.rotate(
+            rotation, Image.Resampling.BICUBIC, expand=True, fillcolor="white"
+        )
     return img
 
 
@@ -0,0 +1,129 @@
+import logging
+import os
+import subprocess
+import sys
+import pytest
+import main
+from ocr_backends import BackendRegistry, LazyOCR, blank_label
+from ocr_service import OCRService, TesseractOCR
+
+
+class RecordingOCR(OCRService):
+    """Mock OCR that records the images it was given"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.images = []
+
+    def cache_key(self) -> str:
+        return "recording"
+
+    async def extract_text(self, image_bytes: bytes) -> str:
+        self.images.append(image_bytes)
+        if self.fail:
+            raise RuntimeError("engine missing")
+        return "HAMMER WHISKEY"
+
+
+def test_backend_is_built_on_first_use_only():
+    """Test factories run lazily and once"""
+    registry = BackendRegistry()
+    built = []
+    registry.register("mock", lambda: built.append(1) or RecordingOCR())
+    assert built == []
+
+    assert registry.get("mock") is registry.get("mock")
+    assert built == [1]
+    assert "mock_load_s" in registry.stats()
+
+
+@pytest.mark.asyncio
+async def test_lazy_ocr_delegates_to_registry_backend():
+    """Test LazyOCR builds the engine on its first call"""
+    registry = BackendRegistry()
+    registry.register("mock", RecordingOCR)
+    ocr = LazyOCR(registry, "mock")
+    assert registry.stats()["loaded"] == 0
+
+    assert await ocr.extract_text(b"image") == "HAMMER WHISKEY"
+    assert ocr.cache_key() == "recording"
+    assert registry.stats()["loaded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_prewarm_runs_one_dummy_ocr():
+    """Test pre-warming builds the engine and OCRs a blank label"""
+    registry = BackendRegistry()
+    registry.register("mock", RecordingOCR)
+    registry.register("unused", RecordingOCR)
+
+    await registry.prewarm(["mock"])
+    assert registry.get("mock").images == [blank_label()]
+    stats = registry.stats()
+    assert "mock_warm_s" in stats
+    assert stats["loaded"] == 1
+
+
+@pytest.mark.asyncio
+async def test_prewarm_failure_does_not_stop_startup():
+    """Test a failing engine is counted and startup carries on"""
+    registry = BackendRegistry()
+    registry.register("broken", lambda: RecordingOCR(fail=True))
+
+    await registry.prewarm(["broken"])
+    assert registry.stats()["warm_failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_prewarm_rejects_unknown_backend():
+    """Test a misspelled backend name fails loudly"""
+    registry = BackendRegistry()
+    with pytest.raises(ValueError, match="tesseract"):
+        await registry.prewarm(["tesseract"])
+
+
+def test_tesseract_step_timings_are_in_stats(monkeypatch):
+    """Test /stats reports Tesseract's per-step timings once it has been built"""
+    registry = BackendRegistry()
+    registry.register("tesseract", TesseractOCR)
+    monkeypatch.setattr(main, "ocr_backends", registry)
+    assert "tesseract_steps" not in main.get_stats()
+
+    registry.get("tesseract").timings.record({"decode": 0.01, "ocr": 0.5})
+    steps = main.get_stats()["tesseract_steps"]
+    assert steps["ocr_count"] == 1
+    assert steps["ocr_mean_ms"] == 500
+    assert steps["decode_total_ms"] == 10
+    assert registry.loaded("gemini") is None
+
+
+@pytest.mark.asyncio
+async def test_startup_report_is_logged(monkeypatch, caplog):
+    """Test the startup report goes to the app's logger"""
+    registry = BackendRegistry()
+    registry.register("mock", RecordingOCR)
+    monkeypatch.setattr(main, "ocr_backends", registry)
+    monkeypatch.setattr(main, "OCR_PREWARM", ["mock"])
+
+    with caplog.at_level(logging.INFO, logger="main"):
+        await main.startup()
+    assert "Startup: imported in" in caplog.text
+    assert "mock" in caplog.text
+
+
+def test_importing_app_does_not_load_ocr_sdks(tmp_path):
+    """Test the Gemini SDK and pytesseract stay unloaded until used"""
+    code = (
+        "import sys, main; "
+        "print('google.genai' in sys.modules, 'pytesseract' in sys.modules)"
+    )
+    env = {**os.environ, "RESULTS_DB": str(tmp_path / "results.db")}
+    env.pop("GEMINI_FAKE", None)
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    ).stdout
+    assert output.split() == ["False", "False"]
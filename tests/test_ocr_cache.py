@@ -0,0 +1,217 @@
+import asyncio
+import threading
+import time
+import pytest
+from ocr_service import OCRService
+from ocr_cache import (
+    CachedOCR,
+    OCRCache,
+    SingleFlight,
+    image_hash,
+    known_image_hash,
+    make_cache_key,
+)
+
+
+class CountingOCR(OCRService):
+    """Mock OCR that records how many times it was called"""
+
+    def __init__(self, text_to_return="HAMMER WHISKEY", engine="mock"):
+        self.text_to_return = text_to_return
+        self.engine = engine
+        self.calls = 0
+
+    def cache_key(self) -> str:
+        return self.engine
+
+    async def extract_text(self, image_bytes: bytes) -> str:
+        self.calls += 1
+        return self.text_to_return
+
+
+class SlowOCR(CountingOCR):
+    """Mock OCR that stays in flight long enough for duplicates to arrive"""
+
+    async def extract_text(self, image_bytes: bytes) -> str:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return self.text_to_return
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_cached_ocr_reuses_result_for_same_image():
+    """Test that resubmitting the same image skips OCR"""
+    ocr = CountingOCR()
+    cached = CachedOCR(ocr, OCRCache())
+
+    first = await cached.extract_text(b"label")
+    second = await cached.extract_text(b"label")
+
+    assert first == second == "HAMMER WHISKEY"
+    assert ocr.calls == 1
+    assert cached.cache.stats()["hits"] == 1
+    assert cached.cache.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_ocr_does_not_store_empty_text():
+    """Test that an empty OCR result is returned but read again next time"""
+    ocr = CountingOCR(text_to_return=" \n")
+    cached = CachedOCR(ocr, OCRCache())
+
+    assert await cached.extract_text(b"label") == " \n"
+    await cached.extract_text(b"label")
+
+    assert ocr.calls == 2
+    assert cached.cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cached_ocr_misses_for_different_image():
+    """Test that a different image is not served from cache"""
+    ocr = CountingOCR()
+    cached = CachedOCR(ocr, OCRCache())
+
+    await cached.extract_text(b"label one")
+    await cached.extract_text(b"label two")
+
+    assert ocr.calls == 2
+
+
+def test_cache_key_depends_on_engine_config():
+    """Test that the same image under different engines gets different keys"""
+    content_hash = image_hash(b"label")
+    assert make_cache_key(content_hash, "tesseract:eng") != make_cache_key(
+        content_hash, "tesseract:deu"
+    )
+    assert make_cache_key(content_hash, "tesseract:eng") == make_cache_key(
+        content_hash, "tesseract:eng"
+    )
+
+
+def test_known_image_hash_is_reused_only_for_the_same_upload():
+    """Test that a hash computed by the route is not recomputed for that upload"""
+    upload = b"label"
+    with known_image_hash(upload, "precomputed"):
+        assert image_hash(upload) == "precomputed"
+        assert image_hash(b"other") == image_hash(b"other") != "precomputed"
+    assert image_hash(upload) != "precomputed"
+
+
+def test_cache_evicts_least_recently_used():
+    """Test that the oldest untouched entry is evicted when full"""
+    cache = OCRCache(max_entries=2)
+    cache.set("a", "text a")
+    cache.set("b", "text b")
+    cache.get("a")
+    cache.set("c", "text c")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "text a"
+    assert cache.get("c") == "text c"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_expires_entries_after_ttl():
+    """Test that entries older than the TTL are treated as misses"""
+    clock = FakeClock()
+    cache = OCRCache(ttl_seconds=60, clock=clock)
+    cache.set("a", "text a")
+
+    clock.now += 30
+    assert cache.get("a") == "text a"
+
+    clock.now += 31
+    assert cache.get("a") is None
+
+
+def test_lookup_is_not_broken_by_eviction_in_another_thread():
+    """Test a key evicted by another thread mid-lookup does not raise"""
+    cache = OCRCache(max_entries=1, ttl_seconds=60)
+    cache.set("key", "HAMMER WHISKEY")
+    evicting = []
+
+    def clock():
+        # Called by the TTL check between finding the entry and touching it
+        if not evicting:
+            evicting.append(threading.Thread(target=cache.set, args=("other", "x")))
+            evicting[0].start()
+            evicting[0].join(timeout=0.2)
+        return time.time()
+
+    cache.clock = clock
+    assert cache.get("key") == "HAMMER WHISKEY"
+    evicting[0].join()
+    assert cache.get("other") == "x"
+
+
+def test_cache_persists_to_disk(tmp_path):
+    """Test that a new cache instance reads results written by another"""
+    OCRCache(disk_dir=tmp_path).set("a", "text a")
+
+    cache = OCRCache(disk_dir=tmp_path)
+
+    assert cache.get("a") == "text a"
+    assert cache.stats()["disk_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_images_share_one_ocr_call():
+    """Test that duplicate in-flight submissions await a single OCR call"""
+    ocr = SlowOCR()
+    cached = CachedOCR(ocr, OCRCache())
+
+    results = await asyncio.gather(*(cached.extract_text(b"label") for _ in range(3)))
+
+    assert results == ["HAMMER WHISKEY"] * 3
+    assert ocr.calls == 1
+    assert cached.flight.stats()["shared"] == 2
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_errors_and_then_retries():
+    """Test that waiters see the shared failure and a later call starts fresh"""
+    flight = SingleFlight()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("quota exceeded")
+
+    results = await asyncio.gather(
+        flight.do("key", failing), flight.do("key", failing), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len(calls) == 1
+
+    with pytest.raises(RuntimeError):
+        await flight.do("key", failing)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_cancelled_caller():
+    """Test that cancelling one waiter does not cancel the shared call"""
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.create_task(flight.do("key", slow))
+    second = asyncio.create_task(flight.do("key", slow))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "done"
@@ -0,0 +1,112 @@
+import io
+import random
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+from ocr_cache import CachedOCR, OCRCache
+from perceptual_hash import NearDuplicateIndex, dhash
+from utils.bk_tree import BKTree, hamming_distance
+from tests.test_ocr_cache import CountingOCR
+
+
+def make_label(text="HAMMER WHISKEY", size=(600, 400)):
+    """Draw a simple label with a border and a few lines of text"""
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=40)
+    draw.rectangle([10, 10, size[0] - 10, size[1] - 10], outline="black", width=8)
+    draw.text((60, 80), text, fill="black", font=font)
+    draw.text((60, 200), "Bourbon Whiskey", fill="black", font=font)
+    draw.ellipse([420, 250, 560, 370], fill="darkred")
+    return image
+
+
+def encode(image, fmt="PNG", **kwargs):
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+def test_dhash_survives_reencoding_and_resizing():
+    """Test re-exported copies of a label hash to nearby values"""
+    label = make_label()
+    original = dhash(encode(label))
+    variants = [
+        encode(label, "JPEG", quality=40),
+        encode(label.resize((300, 200)), "JPEG", quality=85),
+        encode(label.resize((1200, 800))),
+    ]
+    for variant in variants:
+        assert hamming_distance(original, dhash(variant)) <= 10
+
+
+def test_dhash_separates_different_labels():
+    """Test unrelated artwork hashes far apart"""
+    first = dhash(encode(make_label()))
+    other = Image.new("RGB", (600, 400), "white")
+    ImageDraw.Draw(other).rectangle([0, 200, 600, 400], fill="navy")
+    assert hamming_distance(first, dhash(encode(other))) > 40
+
+
+def test_dhash_returns_none_for_undecodable_bytes():
+    """Test non-image uploads are skipped rather than raising"""
+    assert dhash(b"not an image") is None
+
+
+def test_bk_tree_matches_linear_scan():
+    """Test BK-tree search returns the same matches as a brute-force scan"""
+    rng = random.Random(7)
+    keys = [rng.getrandbits(32) for _ in range(500)]
+    tree = BKTree()
+    for key in keys:
+        tree.add(key, key)
+
+    for _ in range(20):
+        query = rng.getrandbits(32)
+        expected = sorted(
+            (hamming_distance(query, key), key)
+            for key in keys
+            if hamming_distance(query, key) <= 12
+        )
+        assert sorted(tree.search(query, 12)) == expected
+
+
+def test_index_evicts_oldest_entries():
+    """Test the index stays within its size limit"""
+    index = NearDuplicateIndex(max_distance=0, max_entries=2)
+    for phash in (1, 2, 4):
+        index.add(phash, f"key-{phash}")
+
+    assert index.find(1) == []
+    assert index.find(4) == ["key-4"]
+    assert index.stats()["evictions"] == 1
+    assert index.stats()["size"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_ocr_reuses_text_for_near_duplicate():
+    """Test a re-exported JPEG of an already OCR'd PNG skips OCR"""
+    ocr = CountingOCR()
+    cached = CachedOCR(ocr, OCRCache(), near_duplicates=NearDuplicateIndex())
+    label = make_label()
+
+    await cached.extract_text(encode(label))
+    text = await cached.extract_text(encode(label.resize((450, 300)), "JPEG"))
+
+    assert text == "HAMMER WHISKEY"
+    assert ocr.calls == 1
+    assert cached.near_duplicates.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_ocr_runs_ocr_for_different_label():
+    """Test a different label is still OCR'd"""
+    ocr = CountingOCR()
+    cached = CachedOCR(ocr, OCRCache(), near_duplicates=NearDuplicateIndex())
+    other = Image.new("RGB", (600, 400), "white")
+    ImageDraw.Draw(other).rectangle([0, 200, 600, 400], fill="navy")
+
+    await cached.extract_text(encode(make_label()))
+    await cached.extract_text(encode(other))
+
+    assert ocr.calls == 2
+    assert cached.near_duplicates.stats()["misses"] == 2
@@ -0,0 +1,92 @@
+import json
+from starlette.testclient import TestClient
+import main
+from results_store import ResultsStore
+
+STORED_TEXT = """
+HAMMER WHISKEY
+Kentucky Straight Bourbon Whiskey
+45% Alc./Vol.
+750 mL
+GOVERNMENT WARNING
+"""
+
+FORM_DATA = {
+    "brand_name": "Hamer Whiskey",
+    "product_type": "Kentucky Straight Bourbon Whiskey",
+    "alcohol_content": 45.0,
+    "net_contents": "750 mL",
+}
+
+
+def recheck(client, result_id, **fields):
+    data = {**FORM_DATA, **fields}
+    return client.post(f"/results/{result_id}/recheck", data=data)
+
+
+def test_recheck_uses_stored_text():
+    """Test corrected fields are checked against the stored OCR text"""
+    main.recheck_store.set(
+        "result-1",
+        json.dumps({"form_data": FORM_DATA, "extracted_text": STORED_TEXT}),
+    )
+    client = TestClient(main.app)
+
+    response = recheck(client, "result-1")
+    assert "Verification Failed" in response.text
+
+    response = recheck(client, "result-1", brand_name="Hammer Whiskey")
+    assert "Verification Passed" in response.text
+    assert "/results/result-1/recheck" in response.text
+
+
+def test_recheck_remembers_corrected_values():
+    """Test the re-check form is pre-filled with the last submitted values"""
+    main.recheck_store.set(
+        "result-2",
+        json.dumps({"form_data": FORM_DATA, "extracted_text": STORED_TEXT}),
+    )
+    client = TestClient(main.app)
+
+    recheck(client, "result-2", brand_name="Hammer Whiskey")
+    stored = json.loads(main.recheck_store.get("result-2"))
+    assert stored["form_data"]["brand_name"] == "Hammer Whiskey"
+    assert stored["extracted_text"] == STORED_TEXT
+
+
+def test_recheck_expired_result(monkeypatch, tmp_path):
+    """Test a missing result asks for the label to be uploaded again"""
+    monkeypatch.setattr(main, "results_store", ResultsStore(tmp_path / "results.db"))
+    client = TestClient(main.app)
+    response = recheck(client, "missing")
+    assert "Result Expired" in response.text
+
+
+def test_recheck_validates_alcohol():
+    """Test alcohol content outside 0-100% is rejected"""
+    main.recheck_store.set(
+        "result-3",
+        json.dumps({"form_data": FORM_DATA, "extracted_text": STORED_TEXT}),
+    )
+    client = TestClient(main.app)
+    response = recheck(client, "result-3", alcohol_content=150)
+    assert "Validation Error" in response.text
+
+
+def test_recheck_falls_back_to_results_store(monkeypatch, tmp_path):
+    """Test results re-checked after a restart are loaded from the store"""
+    store = ResultsStore(tmp_path / "results.db")
+    store.record(
+        "stored-1",
+        "hash",
+        "key",
+        FORM_DATA,
+        {"success": False, "checks": [], "extracted_text": STORED_TEXT},
+        "tesseract",
+        {},
+    )
+    monkeypatch.setattr(main, "results_store", store)
+    client = TestClient(main.app)
+
+    response = recheck(client, "stored-1", brand_name="Hammer Whiskey")
+    assert "Verification Passed" in response.text
@@ -0,0 +1,168 @@
+import sqlite3
+import pytest
+from results_store import ResultsStore
+
+FORM_DATA = {
+    "brand_name": "Hammer Whiskey",
+    "product_type": "Bourbon",
+    "alcohol_content": 45.0,
+    "net_contents": "750 mL",
+}
+RESULTS = {
+    "success": True,
+    "checks": [{"field": "Brand Name", "expected": "Hammer Whiskey", "found": True}],
+    "extracted_text": "HAMMER WHISKEY",
+    "tier": "tesseract",
+}
+
+
+class FakeClock:
+    """Manually advanced clock for ordering and age tests"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultsStore(tmp_path / "results.db", clock=FakeClock())
+    yield store
+    store.close()
+
+
+def record(store, result_id, brand_name="Hammer Whiskey", image_hash="abc"):
+    form_data = {**FORM_DATA, "brand_name": brand_name}
+    store.record(
+        result_id,
+        image_hash,
+        f"key-{image_hash}",
+        form_data,
+        RESULTS,
+        "cascade",
+        {"ocr": 0.5},
+    )
+
+
+def test_store_round_trips_a_result(store):
+    """Test form data, checks, engine and timings are stored"""
+    record(store, "r1")
+    entry = store.get("r1")
+
+    assert entry["form_data"] == FORM_DATA
+    assert entry["results"] == RESULTS
+    assert entry["engine"] == "cascade"
+    assert entry["timings"] == {"ocr": 0.5}
+    assert store.get("missing") is None
+
+
+def test_store_uses_wal_mode(store, tmp_path):
+    """Test the database is in write-ahead-log mode"""
+    record(store, "r1")
+    conn = sqlite3.connect(tmp_path / "results.db")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_history_pages_newest_first(store):
+    """Test keyset pages continue after the last result of the previous page"""
+    for number in range(5):
+        record(store, f"r{number}")
+
+    first = store.page(limit=2)
+    second = store.page(before=first[-1]["id"], limit=2)
+    last = store.page(before=second[-1]["id"], limit=2)
+
+    assert [entry["id"] for entry in first + second + last] == [
+        "r4",
+        "r3",
+        "r2",
+        "r1",
+        "r0",
+    ]
+
+
+def test_history_filters_by_brand_and_image(store):
+    """Test brand lookups ignore case and image lookups match the hash"""
+    record(store, "r1", brand_name="Old Tom", image_hash="one")
+    record(store, "r2", brand_name="Hammer Whiskey", image_hash="two")
+
+    assert [entry["id"] for entry in store.page(brand_name="old tom")] == ["r1"]
+    assert [entry["id"] for entry in store.page(image_hash="two")] == ["r2"]
+
+
+def test_find_reuses_recent_matching_result(store):
+    """Test stored results are found by image and key, within max_age"""
+    record(store, "r1", image_hash="abc")
+
+    assert store.find("abc", "key-abc")["id"] == "r1"
+    assert store.find("abc", "key-other") is None
+    assert store.find("abc", "key-abc", max_age=0) is None
+    assert store.stats()["reuses"] == 1
+
+
+def test_store_records_upload_sizes(store):
+    """Test original and transmitted upload sizes are kept with the result"""
+    upload = {"transmitted_bytes": 400, "original_bytes": 4000, "resized": True}
+    store.record("r1", "abc", "key", FORM_DATA, RESULTS, "llm", {}, upload)
+    record(store, "r2")
+
+    assert store.get("r1")["upload"] == upload
+    assert store.get("r2")["upload"] is None
+
+
+def test_store_adds_upload_column_to_older_databases(tmp_path):
+    """Test a database created before upload sizes were stored is migrated"""
+    path = tmp_path / "results.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE results (id TEXT PRIMARY KEY, created_at REAL NOT NULL, "
+        "image_hash TEXT NOT NULL, cache_key TEXT NOT NULL, "
+        "brand_name TEXT NOT NULL, form_data TEXT NOT NULL, "
+        "extracted_text TEXT NOT NULL, success INTEGER NOT NULL, "
+        "checks TEXT NOT NULL, engine TEXT NOT NULL, tier TEXT, "
+        "timings TEXT NOT NULL)"
+    )
+    conn.close()
+
+    store = ResultsStore(path)
+    record(store, "r1")
+    assert store.get("r1")["upload"] is None
+    store.close()
+
+
+def test_find_skips_degraded_results(store):
+    """Test fallback answers and off-engine tiers are stored but never reused"""
+    fallback = {**RESULTS, "tier": "tesseract", "fallback": True}
+    store.record("r1", "abc", "key", FORM_DATA, fallback, "llm", {})
+    store.record("r2", "abc", "key", FORM_DATA, RESULTS, "llm", {})
+
+    assert store.get("r1")["results"]["fallback"] is True
+    assert store.find("abc", "key") is None
+
+    store.record("r3", "abc", "key", FORM_DATA, RESULTS, "cascade", {})
+    assert store.find("abc", "key")["id"] == "r3"
+
+
+def test_store_adds_fallback_column_to_older_databases(tmp_path):
+    """Test every column added since the first release is created on open"""
+    path = tmp_path / "results.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE results (id TEXT PRIMARY KEY, created_at REAL NOT NULL, "
+        "image_hash TEXT NOT NULL, cache_key TEXT NOT NULL, "
+        "brand_name TEXT NOT NULL, form_data TEXT NOT NULL, "
+        "extracted_text TEXT NOT NULL, success INTEGER NOT NULL, "
+        "checks TEXT NOT NULL, engine TEXT NOT NULL, tier TEXT, "
+        "timings TEXT NOT NULL, upload TEXT)"
+    )
+    conn.close()
+
+    store = ResultsStore(path)
+    store.record(
+        "r1", "abc", "key", FORM_DATA, {**RESULTS, "fallback": True}, "llm", {}
+    )
+    assert store.get("r1")["results"]["fallback"] is True
+    store.close()
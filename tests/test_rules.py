@@ -0,0 +1,81 @@
+from rules import CompiledRules, RuleIndex, compile_rules
+from utils.aho_corasick import AhoCorasick
+
+LABEL_TEXT = """
+HAMMER WHISKEY
+Kentucky Straight Bourbon Whiskey
+45% Alc./Vol.
+750 mL
+GOVERNMENT WARNING
+"""
+
+
+def make_record(brand_name, alcohol_content=45.0, net_contents="750 mL"):
+    return {
+        "brand_name": brand_name,
+        "product_type": "Kentucky Straight Bourbon Whiskey",
+        "alcohol_content": alcohol_content,
+        "net_contents": net_contents,
+    }
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    """Test that every pattern is found in a single pass, including overlaps"""
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+
+    assert automaton.find_all("ushers") == {"he", "she", "hers"}
+    assert automaton.find_all("nothing") == set()
+
+
+def test_compile_rules_reuses_compiled_record():
+    """Test that the same form values compile only once"""
+    assert compile_rules(make_record("Hammer Whiskey")) is compile_rules(
+        make_record("Hammer Whiskey")
+    )
+
+
+def test_compiled_rules_check_many_texts():
+    """Test one record against several extracted texts"""
+    rules = CompiledRules(make_record("Hammer Whiskey"))
+
+    results = rules.check_many([LABEL_TEXT, LABEL_TEXT.replace("750 mL", "1 L")])
+
+    assert [result["success"] for result in results] == [True, False]
+
+
+def test_rule_index_matches_single_record_checks():
+    """Test that the shared-pass index agrees with per-record checking"""
+    records = [
+        make_record("Hammer Whiskey"),
+        make_record("Other Brand"),
+        make_record("Hammer Whiskey", alcohol_content=40.0),
+        make_record("Hammer Whiskey", net_contents="1 L"),
+    ]
+    index = RuleIndex(records)
+
+    indexed = index.check(LABEL_TEXT)
+    expected = [CompiledRules(record).check(LABEL_TEXT) for record in records]
+
+    assert indexed == expected
+    assert [result["success"] for result in indexed] == [True, False, False, False]
+
+
+def test_rule_index_applies_tolerances():
+    """Test that fuzzy fallback still runs for records missed by the automaton"""
+    index = RuleIndex([make_record("Hammer Whiskey")], tolerances={"brand_name": 1})
+
+    [result] = index.check(LABEL_TEXT.replace("HAMMER", "HAMNER"))
+
+    assert result["success"] is True
+
+
+def test_rule_index_checks_many_texts():
+    """Test bulk re-verification of stored texts against updated records"""
+    index = RuleIndex([make_record("Hammer Whiskey"), make_record("Old Tom")])
+
+    results = list(index.check_many([LABEL_TEXT, "OLD TOM " + LABEL_TEXT]))
+
+    assert [[r["success"] for r in row] for row in results] == [
+        [True, False],
+        [True, True],
+    ]
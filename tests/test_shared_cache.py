@@ -0,0 +1,169 @@
+import asyncio
+import json
+import sqlite3
+import pytest
+from starlette.testclient import TestClient
+import main
+from jobs import JobQueue
+from ocr_cache import OCRCache
+from results_store import ResultsStore
+from shared_cache import SharedCacheStore
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_store_round_trip_and_prune(tmp_path):
+    """Test values are stored with their time and old ones can be pruned"""
+    clock = FakeClock()
+    store = SharedCacheStore(tmp_path / "shared.db", "entries", clock=clock)
+    store.set("old", "a")
+    clock.now += 10
+    store.set("new", "b")
+
+    assert store.get("old") == (1000.0, "a")
+    store.prune(1005.0)
+    assert store.get("old") is None
+    assert store.get("new") == (1010.0, "b")
+    store.close()
+
+
+def test_store_is_not_created_until_used(tmp_path):
+    """Test constructing a store does not touch the filesystem"""
+    SharedCacheStore(tmp_path / "shared.db")
+    assert not (tmp_path / "shared.db").exists()
+
+
+def test_store_rejects_bad_table_name(tmp_path):
+    """Test table names are limited to identifiers"""
+    with pytest.raises(ValueError):
+        SharedCacheStore(tmp_path / "shared.db", "entries; DROP TABLE x")
+
+
+def test_cache_entry_written_by_one_worker_is_hit_by_another(tmp_path):
+    """Test two caches over one shared store act like two worker processes"""
+    path = tmp_path / "shared.db"
+    first = OCRCache(shared=SharedCacheStore(path, "ocr_cache"))
+    second = OCRCache(shared=SharedCacheStore(path, "ocr_cache"))
+
+    first.set("key", "HAMMER WHISKEY")
+    assert second.get("key") == "HAMMER WHISKEY"
+    assert second.stats()["shared_hits"] == 1
+
+    # Later lookups are served from the second worker's own memory
+    assert second.get("key") == "HAMMER WHISKEY"
+    assert second.stats()["shared_hits"] == 1
+
+
+def test_expired_shared_entry_is_a_miss(tmp_path):
+    """Test the cache TTL also applies to entries from the shared store"""
+    clock = FakeClock()
+    path = tmp_path / "shared.db"
+    first = OCRCache(ttl_seconds=60, clock=clock, shared=SharedCacheStore(path))
+    second = OCRCache(ttl_seconds=60, clock=clock, shared=SharedCacheStore(path))
+
+    first.set("key", "HAMMER WHISKEY")
+    clock.now += 61
+    assert second.get("key") is None
+    assert SharedCacheStore(path).get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_async_lookups_reach_the_shared_store(tmp_path):
+    """Test aget/aset read and write the shared store off the event loop"""
+    path = tmp_path / "shared.db"
+    first = OCRCache(shared=SharedCacheStore(path, "ocr_cache"))
+    second = OCRCache(shared=SharedCacheStore(path, "ocr_cache"))
+
+    await first.aset("key", "HAMMER WHISKEY")
+    assert await second.aget("key") == "HAMMER WHISKEY"
+    assert await second.aget("missing") is None
+    assert second.stats()["shared_hits"] == 1
+    assert second.stats()["misses"] == 1
+
+
+def test_locked_shared_store_skips_the_write(tmp_path):
+    """Test a store another process holds locked is skipped, not waited on"""
+    path = tmp_path / "shared.db"
+    cache = OCRCache(shared=SharedCacheStore(path, "ocr_cache", timeout=0.01))
+    cache.set("warm", "ready")
+    locker = sqlite3.connect(path)
+    locker.execute("BEGIN EXCLUSIVE")
+
+    cache.set("key", "HAMMER WHISKEY")
+    assert cache.get("key") == "HAMMER WHISKEY"
+    assert cache.stats()["shared_errors"] == 1
+    locker.rollback()
+    assert SharedCacheStore(path, "ocr_cache").get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_job_status_is_visible_to_other_workers(tmp_path):
+    """Test a job run by one queue can be looked up through another"""
+    path = tmp_path / "shared.db"
+    running = JobQueue(workers=1, index=SharedCacheStore(path, "jobs"))
+    other = JobQueue(workers=1, index=SharedCacheStore(path, "jobs"))
+
+    release = asyncio.Event()
+
+    async def work(job):
+        await release.wait()
+        job.result_id = "result-1"
+        return {"success": True}
+
+    job = running.submit(work)
+    # The index is written in a thread, after submit has returned
+    while (seen := other.get(job.id)) is None:
+        await asyncio.sleep(0.01)
+    assert seen.remote and not seen.finished
+
+    release.set()
+    await running.join()
+    seen = other.get(job.id)
+    assert seen.status == "done"
+    assert seen.result_id == "result-1"
+    assert other.get("missing") is None
+    await running.stop()
+
+
+def test_job_finished_in_another_worker_renders_stored_result(monkeypatch, tmp_path):
+    """Test /jobs/{id} loads results persisted by the worker that ran the job"""
+    store = ResultsStore(tmp_path / "results.db")
+    index = SharedCacheStore(tmp_path / "shared.db", "jobs")
+    monkeypatch.setattr(main, "results_store", store)
+    monkeypatch.setattr(main, "job_queue", JobQueue(index=index))
+    form_data = {
+        "brand_name": "Hammer Whiskey",
+        "product_type": "Bourbon",
+        "alcohol_content": 45.0,
+        "net_contents": "750 mL",
+    }
+    results = {
+        "success": True,
+        "checks": [
+            {"field": "Brand Name", "expected": "Hammer Whiskey", "found": True}
+        ],
+        "extracted_text": "HAMMER WHISKEY",
+    }
+    store.record("result-1", "hash", "key", form_data, results, "llm", {})
+    index.set(
+        "job-1",
+        json.dumps({"status": "done", "error": None, "result_id": "result-1"}),
+    )
+    index.set(
+        "job-2",
+        json.dumps({"status": "queued", "error": None, "result_id": None}),
+    )
+    client = TestClient(main.app)
+
+    assert "Verification Passed" in client.get("/jobs/job-1").text
+    assert 'hx-trigger="every 1s"' in client.get("/jobs/job-2").text
+    assert "Job Not Found" in client.get("/jobs/job-3").text
+    store.close()
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import time
+import pytest
+from tesseract_pool import PoolSaturated, TesseractPool
+
+
+def double(value):
+    return value * 2
+
+
+def slow(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def crash_once(marker):
+    """Kill the worker the first time, succeed afterwards"""
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return "recovered"
+
+
+@pytest.mark.asyncio
+async def test_pool_runs_work_on_workers():
+    """Test that submitted work runs in a worker process"""
+    pool = TesseractPool(size=2)
+    try:
+        assert await pool.run(double, 21) == 42
+        assert await pool.run(slow, 0) != os.getpid()
+        assert pool.stats()["completed"] == 2
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_long_lived_workers():
+    """Test that workers are not recreated per call"""
+    pool = TesseractPool(size=1)
+    try:
+        pids = {await pool.run(slow, 0) for _ in range(3)}
+        assert len(pids) == 1
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_restarts_after_worker_crash(tmp_path):
+    """Test that a crashed worker pool is replaced and the call retried"""
+    pool = TesseractPool(size=1)
+    try:
+        result = await pool.run(crash_once, str(tmp_path / "crashed"))
+        assert result == "recovered"
+        assert pool.stats()["restarts"] == 1
+        assert await pool.health_check()
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_idle_pool_is_pinged_periodically():
+    """Test health checks run in the background once the pool has started"""
+    pool = TesseractPool(size=1)
+    try:
+        await pool.run(double, 1)
+        pool.start_health_checks(0.05)
+        for _ in range(100):
+            if pool.stats()["health_checks"]:
+                break
+            await asyncio.sleep(0.05)
+        assert pool.stats()["health_checks"] >= 1
+        assert pool.stats()["health_failures"] == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_work_when_queue_is_full():
+    """Test that requests beyond the queue depth fail fast"""
+    pool = TesseractPool(size=1, max_queue=0)
+    try:
+        running = asyncio.create_task(pool.run(slow, 0.5))
+        await asyncio.sleep(0.05)
+        with pytest.raises(PoolSaturated):
+            await pool.run(double, 1)
+        await running
+    finally:
+        pool.shutdown()
@@ -0,0 +1,74 @@
+import io
+import logging
+import random
+from PIL import Image
+from upload_optimizer import UploadBudget, optimize_upload
+
+
+def encode(image, fmt, **kwargs):
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+def noisy_image(size):
+    """Random pixels compress badly, standing in for a large phone photo"""
+    rng = random.Random(0)
+    return Image.frombytes("RGB", size, rng.randbytes(size[0] * size[1] * 3))
+
+
+def decode(data):
+    return Image.open(io.BytesIO(data))
+
+
+def test_small_upload_passes_through_with_real_mime_type():
+    """Test a PNG within budget is sent as-is and labelled image/png"""
+    data = encode(Image.new("RGB", (400, 300), "white"), "PNG")
+
+    optimized, mime_type = optimize_upload(data, UploadBudget())
+
+    assert optimized == data
+    assert mime_type == "image/png"
+
+
+def test_large_upload_is_downscaled_to_long_edge():
+    """Test the long edge is capped while keeping the aspect ratio"""
+    data = encode(Image.new("RGB", (4000, 3000), "white"), "JPEG")
+
+    optimized, mime_type = optimize_upload(data, UploadBudget(max_long_edge=1000))
+
+    assert mime_type == "image/jpeg"
+    assert decode(optimized).size == (1000, 750)
+
+
+def test_upload_is_reencoded_to_byte_budget():
+    """Test quality (then size) is lowered until the upload fits"""
+    data = encode(noisy_image((1200, 900)), "PNG")
+    budget = UploadBudget(max_long_edge=2048, max_bytes=150_000)
+
+    optimized, mime_type = optimize_upload(data, budget)
+
+    assert mime_type == "image/jpeg"
+    assert len(optimized) <= 150_000
+    assert len(optimized) < len(data)
+
+
+def test_unsupported_format_is_converted():
+    """Test a GIF with transparency is flattened and sent as JPEG"""
+    image = Image.new("RGBA", (200, 100), (0, 0, 0, 0)).convert("P")
+    data = encode(image, "GIF")
+
+    optimized, mime_type = optimize_upload(data, UploadBudget())
+
+    assert mime_type == "image/jpeg"
+    assert decode(optimized).format == "JPEG"
+
+
+def test_optimizer_logs_sizes(caplog):
+    """Test before/after sizes are logged when an upload is re-encoded"""
+    data = encode(Image.new("RGB", (3000, 2000), "white"), "PNG")
+
+    with caplog.at_level(logging.INFO, logger="upload_optimizer"):
+        optimize_upload(data, UploadBudget(max_long_edge=1500))
+
+    assert f"PNG 3000x2000 {len(data)} bytes -> JPEG 1500x1000" in caplog.text
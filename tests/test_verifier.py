@@ -182,3 +182,112 @@ async def test_verify_whole_number_alcohol_content():
         c for c in results["checks"] if c["field"] == "Alcohol Content"
     )
     assert alcohol_check["found"] == True
+
+
+@pytest.mark.asyncio
+async def test_verify_reports_each_check_as_it_is_decided():
+    """Test that on_check receives every check in order"""
+    mock_text = """
+    HAMMER WHISKEY
+    Bourbon
+    45% Alc./Vol.
+    750 mL
+    GOVERNMENT WARNING
+    """
+
+    verifier = LabelVerifier(MockOCR(mock_text))
+    streamed = []
+
+    form_data = {
+        "brand_name": "Hammer Whiskey",
+        "product_type": "Bourbon",
+        "alcohol_content": 45.0,
+        "net_contents": "750 mL",
+    }
+
+    results = await verifier.verify(
+        form_data, b"fake_image_bytes", on_check=streamed.append
+    )
+
+    assert streamed == results["checks"]
+    assert [check["field"] for check in streamed][0] == "Brand Name"
+
+
+@pytest.mark.asyncio
+async def test_verify_tolerates_ocr_misreads_within_field_tolerance():
+    """Test that configured edits let common OCR misreads pass"""
+    mock_text = """
+    0LD TOM DISTILLERY
+    Kentucky Straight Bourb0n Whiskey
+    45% Alc./Vol.
+    750 mL
+    G0VERNMENT WARNING
+    """
+
+    verifier = LabelVerifier(
+        MockOCR(mock_text),
+        tolerances={"brand_name": 1, "product_type": 1, "government_warning": 1},
+    )
+
+    form_data = {
+        "brand_name": "Old Tom Distillery",
+        "product_type": "Kentucky Straight Bourbon Whiskey",
+        "alcohol_content": 45.0,
+        "net_contents": "750 mL",
+    }
+
+    results = await verifier.verify(form_data, b"fake_image_bytes")
+
+    assert results["success"] == True
+
+
+@pytest.mark.asyncio
+async def test_verify_is_exact_without_tolerance():
+    """Test that misreads still fail when no tolerance is configured"""
+    mock_text = """
+    0LD TOM DISTILLERY
+    Gin
+    45% Alc./Vol.
+    750 mL
+    GOVERNMENT WARNING
+    """
+
+    verifier = LabelVerifier(MockOCR(mock_text))
+
+    form_data = {
+        "brand_name": "Old Tom Distillery",
+        "product_type": "Gin",
+        "alcohol_content": 45.0,
+        "net_contents": "750 mL",
+    }
+
+    results = await verifier.verify(form_data, b"fake_image_bytes")
+
+    brand_check = next(c for c in results["checks"] if c["field"] == "Brand Name")
+    assert brand_check["found"] == False
+
+
+@pytest.mark.asyncio
+async def test_verify_rejects_misreads_beyond_tolerance():
+    """Test that a different brand is not accepted as a near match"""
+    mock_text = """
+    HAMMER WHISKEY
+    Gin
+    45% Alc./Vol.
+    750 mL
+    GOVERNMENT WARNING
+    """
+
+    verifier = LabelVerifier(MockOCR(mock_text), tolerances={"brand_name": 2})
+
+    form_data = {
+        "brand_name": "Hammond Whiskey",
+        "product_type": "Gin",
+        "alcohol_content": 45.0,
+        "net_contents": "750 mL",
+    }
+
+    results = await verifier.verify(form_data, b"fake_image_bytes")
+
+    brand_check = next(c for c in results["checks"] if c["field"] == "Brand Name")
+    assert brand_check["found"] == False
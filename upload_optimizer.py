@@ -0,0 +1,98 @@
+import io
+import logging
+import time
+from dataclasses import dataclass
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Formats Gemini accepts as-is, by Pillow format name
+MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+}
+
+
+@dataclass(frozen=True)
+class UploadBudget:
+    """Limits for images sent to Gemini; larger uploads are re-encoded as JPEG"""
+
+    max_long_edge: int = 2048
+    max_bytes: int = 1_500_000
+    quality: int = 85
+    min_quality: int = 55
+    quality_step: int = 10
+
+
+def _decode(image_bytes, budget):
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.format == "JPEG":
+        # Let libjpeg decode at a reduced scale instead of full resolution
+        scale = budget.max_long_edge / max(image.size)
+        if scale < 1:
+            image.draft("RGB", (int(image.width * scale), int(image.height * scale)))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        # JPEG has no alpha; flatten onto white so transparency is not black
+        background = Image.new("RGB", image.size, "white")
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba)
+        return background
+    return image.convert("RGB")
+
+
+def _encode_jpeg(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def optimize_upload(image_bytes: bytes, budget: UploadBudget) -> tuple[bytes, str]:
+    """Return bytes to send to Gemini and their true MIME type
+
+    Uploads already in an accepted format and within the budget are passed
+    through untouched. Others are downscaled to max_long_edge and re-encoded
+    as JPEG, lowering quality (then size) until they fit max_bytes.
+    """
+    start = time.perf_counter()
+    image = Image.open(io.BytesIO(image_bytes))
+    image_format, original_size = image.format, image.size
+    mime_type = MIME_TYPES.get(image_format)
+    if (
+        mime_type is not None
+        and max(original_size) <= budget.max_long_edge
+        and len(image_bytes) <= budget.max_bytes
+    ):
+        return image_bytes, mime_type
+
+    image = _decode(image_bytes, budget)
+    if max(image.size) > budget.max_long_edge:
+        image.thumbnail(
+            (budget.max_long_edge, budget.max_long_edge), Image.Resampling.LANCZOS
+        )
+
+    quality = budget.quality
+    data = _encode_jpeg(image, quality)
+    while len(data) > budget.max_bytes and max(image.size) > 1:
+        if quality - budget.quality_step >= budget.min_quality:
+            quality -= budget.quality_step
+        else:
+            # Quality is as low as text stays legible; shrink instead
+            image = image.resize(
+                (max(1, image.width * 3 // 4), max(1, image.height * 3 // 4)),
+                Image.Resampling.LANCZOS,
+            )
+        data = _encode_jpeg(image, quality)
+
+    logger.info(
+        "Gemini upload: %s %dx%d %d bytes -> JPEG %dx%d q%d %d bytes (%.1f ms)",
+        image_format,
+        *original_size,
+        len(image_bytes),
+        *image.size,
+        quality,
+        len(data),
+        (time.perf_counter() - start) * 1000,
+    )
+    return data, "image/jpeg"
@@ -0,0 +1,121 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import zipfile
+
+MANIFEST_FIELDS = [
+    "image",
+    "brand_name",
+    "product_type",
+    "alcohol_content",
+    "net_contents",
+]
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif")
+MAX_ARCHIVE_BYTES = 500 * 1024 * 1024
+
+
+def parse_manifest(filename, content):
+    """Parse a CSV or JSONL manifest of form rows into a list of dicts"""
+    text = content.decode("utf-8-sig")
+    if filename.lower().endswith(".jsonl"):
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    elif filename.lower().endswith(".csv"):
+        rows = list(csv.DictReader(io.StringIO(text)))
+    else:
+        raise ValueError("Manifest must be a .csv or .jsonl file.")
+
+    if not rows:
+        raise ValueError("Manifest contains no rows.")
+
+    parsed = []
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            raise ValueError(f"Manifest row {number} is not an object.")
+        missing = [
+            field
+            for field in MANIFEST_FIELDS
+            if row.get(field) is None or not str(row[field]).strip()
+        ]
+        if missing:
+            raise ValueError(f"Manifest row {number} is missing: {', '.join(missing)}")
+        try:
+            alcohol_content = float(row["alcohol_content"])
+        except (TypeError, ValueError):
+            raise ValueError(f"Manifest row {number} has an invalid alcohol_content.")
+
+        parsed.append(
+            {
+                "row": number,
+                "image": str(row["image"]).strip(),
+                "brand_name": str(row["brand_name"]).strip(),
+                "product_type": str(row["product_type"]).strip(),
+                "alcohol_content": alcohol_content,
+                "net_contents": str(row["net_contents"]).strip(),
+            }
+        )
+    return parsed
+
+
+def load_zip_images(content, max_bytes=MAX_ARCHIVE_BYTES):
+    """Read label images from a ZIP archive, keyed by file name"""
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(content))
+    except zipfile.BadZipFile:
+        raise ValueError("Label images must be uploaded as a ZIP archive.")
+
+    with archive:
+        entries = [
+            info
+            for info in archive.infolist()
+            if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)
+        ]
+        if sum(info.file_size for info in entries) > max_bytes:
+            raise ValueError("ZIP archive is too large once extracted.")
+        # Manifest rows name images by file name alone, so two folders with
+        # the same file name would silently match the wrong image
+        images = {}
+        for info in entries:
+            name = os.path.basename(info.filename)
+            if name in images:
+                raise ValueError(f"ZIP archive has more than one image named {name}.")
+            images[name] = archive.read(info)
+        return images
+
+
+async def verify_row(verifier, row, image_bytes, missing_error="Image not found"):
+    """Verify one manifest row, reporting failures in the result instead of raising"""
+    result = {
+        "row": row["row"],
+        "image": row["image"],
+        "brand_name": row["brand_name"],
+    }
+    if image_bytes is None:
+        return {**result, "success": False, "checks": [], "error": missing_error}
+
+    form_data = {field: row[field] for field in MANIFEST_FIELDS[1:]}
+    try:
+        results = await verifier.verify(form_data, image_bytes)
+    except Exception as e:
+        return {**result, "success": False, "checks": [], "error": str(e)}
+    return {
+        **result,
+        "success": results["success"],
+        "checks": results["checks"],
+        "error": None,
+    }
+
+
+async def verify_batch(verifier, rows, images, concurrency=4):
+    """Run verifier across manifest rows with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def verify_one(row):
+        image_bytes = images.get(os.path.basename(row["image"]))
+        if image_bytes is None:
+            return await verify_row(verifier, row, None, "Image not found in ZIP")
+        async with semaphore:
+            return await verify_row(verifier, row, image_bytes)
+
+    return await asyncio.gather(*(verify_one(row) for row in rows))
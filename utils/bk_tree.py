@@ -0,0 +1,48 @@
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """Metric tree that finds every stored key within a distance of a query"""
+
+    def __init__(self, distance=hamming_distance):
+        self.distance = distance
+        self.root = None
+        self.size = 0
+
+    def add(self, key, value):
+        node = (key, value, {})
+        if self.root is None:
+            self.root = node
+            self.size += 1
+            return
+        current = self.root
+        while True:
+            distance = self.distance(key, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                self.size += 1
+                return
+            current = child
+
+    def search(self, key, max_distance) -> list:
+        """Return (distance, value) pairs within max_distance, nearest first"""
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node_key, value, children = stack.pop()
+            distance = self.distance(key, node_key)
+            if distance <= max_distance:
+                found.append((distance, value))
+            # Triangle inequality: only children in this band can be close enough
+            for child_distance, child in children.items():
+                if abs(child_distance - distance) <= max_distance:
+                    stack.append(child)
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,59 @@
+def approximate_find(pattern, text, max_edits):
+    """Find pattern in text allowing up to max_edits insertions/deletions/substitutions
+
+    Uses Myers' bit-parallel algorithm, so the scan is linear in len(text)
+    with a handful of integer operations per character. Returns the
+    smallest edit distance found, or None if no substring is close enough.
+    """
+    m = len(pattern)
+    if m == 0:
+        return 0
+
+    # Bitmask per character marking where it occurs in the pattern
+    peq = {}
+    for index, char in enumerate(pattern):
+        peq[char] = peq.get(char, 0) | (1 << index)
+
+    full = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv, mv, score = full, 0, m
+    # Deleting the whole pattern always works, at a cost of m edits
+    best = m if m <= max_edits else None
+
+    for char in text:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        # No carry into the low bit: a match may start anywhere in the text
+        ph = (ph << 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+
+        if score <= max_edits and (best is None or score < best):
+            best = score
+            if best == 0:
+                break
+    return best
+
+
+def allowed_edits(pattern, tolerance):
+    """Cap a field's tolerance so short values cannot match almost anything"""
+    return min(tolerance, len(pattern) // 4)
+
+
+def parse_tolerances(spec):
+    """Parse "brand_name=1,product_type=2" into a dict of per-field edits"""
+    tolerances = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        field, _, edits = item.partition("=")
+        tolerances[field.strip()] = int(edits)
+    return tolerances